@@ -0,0 +1,194 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Benchmarks of reading, payload parsing and CSV/JSON Lines transformation
+
+Every scenario runs in a fresh interpreter, so that the peak RSS of one scenario does
+not leak into the next one.
+
+Usage: python3 -m benchmarks.run_benchmarks [--size-mb 50] [--scenario read] ...
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import SyntheticTrace
+
+
+def _read(dlt_file_path, use_mmap=False):
+    from dlt_transformipy import dlt_transformipy
+
+    dlt_file = dlt_transformipy.load(dlt_file_path, use_mmap=use_mmap)
+    dlt_file.read()
+    messages = len(dlt_file.get_messages())
+    dlt_file.clean_up()
+    return messages
+
+
+def _iter_messages(dlt_file_path):
+    from dlt_transformipy import dlt_transformipy
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    messages = 0
+    for _ in dlt_file.iter_messages():
+        messages += 1
+    return messages
+
+
+def _parse_payloads(dlt_file_path):
+    from dlt_transformipy import dlt_transformipy
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    messages = 0
+    for message in dlt_file.iter_messages():
+        len(message.payload)
+        messages += 1
+    return messages
+
+
+def _transform_csv(dlt_file_path):
+    from dlt_transformipy import dlt_transformipy
+    from dlt_transformipy.core.transform import transform_csv
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    with tempfile.TemporaryDirectory() as output_dir:
+        return transform_csv.transform(dlt_file, os.path.join(output_dir, "out.csv"))
+
+
+def _transform_jsonl(dlt_file_path):
+    from dlt_transformipy import dlt_transformipy
+    from dlt_transformipy.core.transform import transform_json
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    with tempfile.TemporaryDirectory() as output_dir:
+        return transform_json.transform(dlt_file, os.path.join(output_dir, "out.jsonl"))
+
+
+SCENARIOS = {
+    "read": _read,
+    "read_mmap": lambda dlt_file_path: _read(dlt_file_path, use_mmap=True),
+    "iter_messages": _iter_messages,
+    "parse_payloads": _parse_payloads,
+    "transform_csv": _transform_csv,
+    "transform_jsonl": _transform_jsonl,
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_scenario(scenario, dlt_file_path):
+    """Runs a single scenario in the current process
+
+    :returns: Messages, elapsed seconds and peak RSS in MB
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    messages = SCENARIOS[scenario](dlt_file_path)
+    elapsed = time.perf_counter() - start
+    return {
+        "scenario": scenario,
+        "messages": messages,
+        "seconds": elapsed,
+        "messages_per_second": messages / elapsed,
+        "mb_per_second": os.path.getsize(dlt_file_path) / 1000000 / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_isolated(scenario, dlt_file_path):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.run_benchmarks",
+            "--child",
+            scenario,
+            dlt_file_path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose-ratio", type=float, default=0.9)
+    parser.add_argument("--corrupt-ratio", type=float, default=0.0)
+    parser.add_argument(
+        "--dlt-file", help="Benchmark an existing DLT file instead of a synthetic one"
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run (repeatable, default: all)",
+    )
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(*args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        dlt_file_path = args.dlt_file
+        if dlt_file_path is None:
+            dlt_file_path = os.path.join(work_dir, "synthetic.dlt")
+            SyntheticTrace(
+                seed=args.seed,
+                verbose_ratio=args.verbose_ratio,
+                corrupt_ratio=args.corrupt_ratio,
+            ).write(dlt_file_path, byte_size=int(args.size_mb * 1000000))
+        print(
+            "{} ({:.1f} MB)".format(
+                dlt_file_path, os.path.getsize(dlt_file_path) / 1000000
+            )
+        )
+        print(
+            "{:<16}{:>12}{:>10}{:>14}{:>10}{:>14}".format(
+                "scenario", "messages", "seconds", "messages/s", "MB/s", "peak RSS MB"
+            )
+        )
+        for scenario in args.scenario or SCENARIOS:
+            result = _run_isolated(scenario, dlt_file_path)
+            print(
+                "{scenario:<16}{messages:>12}{seconds:>10.2f}"
+                "{messages_per_second:>14.0f}{mb_per_second:>10.1f}"
+                "{peak_rss_mb:>14.1f}".format(**result)
+            )
+
+
+if __name__ == "__main__":
+    main()
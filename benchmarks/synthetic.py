@@ -0,0 +1,361 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Generator of reproducible synthetic storaged DLT files (used by benchmarks and tests)
+
+Usage: python3 -m benchmarks.synthetic <output.dlt> [--messages N] [--seed S] ...
+"""
+
+import argparse
+import random
+from struct import pack
+
+TYPE_INFO_BOOL = 0x11
+TYPE_INFO_SINT8 = 0x21
+TYPE_INFO_SINT16 = 0x22
+TYPE_INFO_SINT32 = 0x23
+TYPE_INFO_SINT64 = 0x24
+TYPE_INFO_UINT8 = 0x41
+TYPE_INFO_UINT16 = 0x42
+TYPE_INFO_UINT32 = 0x43
+TYPE_INFO_UINT64 = 0x44
+TYPE_INFO_STRG_ASCII = 0x200
+TYPE_INFO_STRG_UTF8 = 0x8200
+TYPE_INFO_RAWD = 0x400
+
+_INTEGER_FORMATS = {
+    TYPE_INFO_BOOL: "B",
+    TYPE_INFO_SINT8: "b",
+    TYPE_INFO_SINT16: "h",
+    TYPE_INFO_SINT32: "i",
+    TYPE_INFO_SINT64: "q",
+    TYPE_INFO_UINT8: "B",
+    TYPE_INFO_UINT16: "H",
+    TYPE_INFO_UINT32: "I",
+    TYPE_INFO_UINT64: "Q",
+}
+
+
+def encode_argument(type_info, value, big_endian=False):
+    """Encodes a single verbose argument (TYPE_INFO + data)"""
+    endian = ">" if big_endian else "<"
+    encoded = pack(endian + "I", type_info)
+    if type_info in _INTEGER_FORMATS:
+        return encoded + pack(endian + _INTEGER_FORMATS[type_info], value)
+    if type_info in (TYPE_INFO_STRG_ASCII, TYPE_INFO_STRG_UTF8):
+        data = value.encode("utf-8") + b"\0"
+    else:
+        data = bytes(value)
+    return encoded + pack(endian + "H", len(data)) + data
+
+
+def build_message(
+    arguments=(),
+    seconds=1600000000,
+    microseconds=0,
+    storage_ecu_id="ECU1",
+    message_counter=0,
+    ecu_id="ECU1",
+    session_id=None,
+    timestamp=None,
+    apid="APP",
+    ctid="CTX",
+    message_info=None,
+    extended_header=True,
+    verbose=True,
+    big_endian=False,
+    payload=None,
+):
+    """Builds a storaged DLT message (storage header + DLT message)
+
+    :param list arguments: List of (type_info, value) tuples for verbose messages
+    :param bytes payload: Raw payload, overrides the encoded arguments
+    :returns: The encoded message
+    :rtype: bytes
+    """
+    if payload is None:
+        payload = b"".join(
+            encode_argument(type_info, value, big_endian)
+            for type_info, value in arguments
+        )
+
+    header_type = 0x20  # version 1
+    optional_header = b""
+    if extended_header:
+        header_type |= 0x01
+    if big_endian:
+        header_type |= 0x02
+    if ecu_id is not None:
+        header_type |= 0x04
+        optional_header += ecu_id.encode("ascii").ljust(4, b"\0")
+    if session_id is not None:
+        header_type |= 0x08
+        optional_header += pack(">I", session_id)
+    if timestamp is not None:
+        header_type |= 0x10
+        optional_header += pack(">I", timestamp)
+
+    ext_header = b""
+    if extended_header:
+        if message_info is None:
+            # DLT_TYPE_LOG | DLT_LOG_INFO
+            message_info = 0x40 | (0x01 if verbose else 0x00)
+        ext_header = pack(
+            "BB4s4s",
+            message_info,
+            len(arguments),
+            apid.encode("ascii"),
+            ctid.encode("ascii"),
+        )
+
+    length = 4 + len(optional_header) + len(ext_header) + len(payload)
+    standard_header = pack(">BBH", header_type, message_counter, length)
+
+    storage_header = b"DLT\x01" + pack(
+        "<iI4s", seconds, microseconds, storage_ecu_id.encode("ascii")
+    )
+    return storage_header + standard_header + optional_header + ext_header + payload
+
+
+# Argument kinds of the generator and the TYPE_INFOs they are drawn from
+ARGUMENT_TYPE_INFOS = {
+    "STRG": (TYPE_INFO_STRG_ASCII, TYPE_INFO_STRG_UTF8),
+    "RAWD": (TYPE_INFO_RAWD,),
+    "UINT": (TYPE_INFO_UINT8, TYPE_INFO_UINT16, TYPE_INFO_UINT32, TYPE_INFO_UINT64),
+    "SINT": (TYPE_INFO_SINT8, TYPE_INFO_SINT16, TYPE_INFO_SINT32, TYPE_INFO_SINT64),
+    "BOOL": (TYPE_INFO_BOOL,),
+}
+_INTEGER_RANGES = {
+    TYPE_INFO_SINT8: (-(2**7), 2**7 - 1),
+    TYPE_INFO_SINT16: (-(2**15), 2**15 - 1),
+    TYPE_INFO_SINT32: (-(2**31), 2**31 - 1),
+    TYPE_INFO_SINT64: (-(2**63), 2**63 - 1),
+    TYPE_INFO_UINT8: (0, 2**8 - 1),
+    TYPE_INFO_UINT16: (0, 2**16 - 1),
+    TYPE_INFO_UINT32: (0, 2**32 - 1),
+    TYPE_INFO_UINT64: (0, 2**64 - 1),
+    TYPE_INFO_BOOL: (0, 1),
+}
+_WORDS = (
+    "engine",
+    "speed",
+    "timeout",
+    "error",
+    "ok",
+    "sensor",
+    "value",
+    "request",
+    "response",
+    "DLT\x01",  # storage header pattern inside a payload
+    "Übertemperatur",
+)
+
+
+class SyntheticTrace:
+    """Reproducible generator of storaged DLT messages
+
+    A trace is built from a limited number of distinct "log statements" (an APID/CTID
+    and an argument signature), like traces of real ECUs.
+    """
+
+    def __init__(
+        self,
+        seed=0,
+        argument_types=("STRG", "RAWD", "UINT", "SINT", "BOOL"),
+        max_arguments=4,
+        verbose_ratio=0.9,
+        extended_header_ratio=0.95,
+        big_endian_ratio=0.1,
+        corrupt_ratio=0.0,
+        statements=200,
+        ecu_ids=("ECU1", "ECU2"),
+    ):
+        """
+        :param int seed: Seed of the random generator
+        :param argument_types: Argument kinds to draw from (STRG, RAWD, UINT, SINT, BOOL)
+        :param int max_arguments: Maximum number of arguments of a verbose message
+        :param float verbose_ratio: Share of verbose messages
+        :param float extended_header_ratio: Share of messages with an extended header
+        :param float big_endian_ratio: Share of messages with big endian payloads
+        :param float corrupt_ratio: Share of messages followed by a corrupt region
+        :param int statements: Number of distinct log statements
+        :param ecu_ids: ECU IDs to draw from
+        """
+        self._random = random.Random(seed)
+        self._corrupt_ratio = corrupt_ratio
+        self._ecu_ids = ecu_ids
+        self._statements = [
+            self._build_statement(
+                index,
+                argument_types,
+                max_arguments,
+                verbose_ratio,
+                extended_header_ratio,
+                big_endian_ratio,
+            )
+            for index in range(statements)
+        ]
+        self._message_counter = 0
+        self._time_microseconds = 1600000000 * 1000000
+
+    def _build_statement(
+        self,
+        index,
+        argument_types,
+        max_arguments,
+        verbose_ratio,
+        extended_header_ratio,
+        big_endian_ratio,
+    ):
+        extended_header = self._random.random() < extended_header_ratio
+        verbose = extended_header and self._random.random() < verbose_ratio
+        signature = ()
+        if verbose:
+            signature = tuple(
+                self._random.choice(
+                    ARGUMENT_TYPE_INFOS[self._random.choice(argument_types)]
+                )
+                for _ in range(self._random.randint(1, max_arguments))
+            )
+        return {
+            "apid": "AP{:02d}".format(index % 40),
+            "ctid": "CT{:02d}".format(index % 30),
+            "extended_header": extended_header,
+            "verbose": verbose,
+            "big_endian": self._random.random() < big_endian_ratio,
+            "signature": signature,
+            # LOG with a level from FATAL to VERBOSE
+            "message_info": (self._random.randint(1, 6) << 4) | int(verbose),
+        }
+
+    def _argument_value(self, type_info):
+        if type_info in _INTEGER_RANGES:
+            return self._random.randint(*_INTEGER_RANGES[type_info])
+        if type_info == TYPE_INFO_RAWD:
+            return self._random.randbytes(self._random.randint(0, 64))
+        return " ".join(
+            self._random.choice(_WORDS) for _ in range(self._random.randint(1, 12))
+        )
+
+    def next_message(self):
+        """Returns the next storaged message (and a corrupt region behind it, if drawn)
+
+        :rtype: bytes
+        """
+        statement = self._random.choice(self._statements)
+        self._time_microseconds += self._random.randint(0, 2000)
+        self._message_counter = (self._message_counter + 1) % 256
+        ecu_id = self._random.choice(self._ecu_ids)
+        if statement["verbose"]:
+            arguments = [
+                (type_info, self._argument_value(type_info))
+                for type_info in statement["signature"]
+            ]
+            payload = None
+        else:
+            arguments = ()
+            # Non-verbose: message id + data
+            payload = pack(
+                "<I", self._random.randint(0, 1000)
+            ) + self._random.randbytes(self._random.randint(0, 32))
+        message = build_message(
+            arguments,
+            seconds=self._time_microseconds // 1000000,
+            microseconds=self._time_microseconds % 1000000,
+            storage_ecu_id=ecu_id,
+            message_counter=self._message_counter,
+            ecu_id=ecu_id,
+            session_id=self._random.randint(0, 100),
+            timestamp=(self._time_microseconds // 100) % 2**31,
+            apid=statement["apid"],
+            ctid=statement["ctid"],
+            message_info=statement["message_info"],
+            extended_header=statement["extended_header"],
+            verbose=statement["verbose"],
+            big_endian=statement["big_endian"],
+            payload=payload,
+        )
+        if self._corrupt_ratio and self._random.random() < self._corrupt_ratio:
+            message += self._random.randbytes(self._random.randint(1, 64))
+        return message
+
+    def write(self, dlt_file_path, messages=None, byte_size=None):
+        """Writes a storaged DLT file with the given number of messages or byte size
+
+        :param str dlt_file_path: Path of the DLT file to write
+        :param int messages: Number of messages to write
+        :param int byte_size: Minimum size of the DLT file in bytes
+        :returns: Number of written messages
+        :rtype: int
+        """
+        if messages is None and byte_size is None:
+            raise ValueError("Either messages or byte_size is required")
+        written_messages = 0
+        written_bytes = 0
+        with open(dlt_file_path, "wb") as f:
+            chunk = list()
+            while (messages is None or written_messages < messages) and (
+                byte_size is None or written_bytes < byte_size
+            ):
+                message = self.next_message()
+                chunk.append(message)
+                written_messages += 1
+                written_bytes += len(message)
+                if len(chunk) >= 10000:
+                    f.write(b"".join(chunk))
+                    chunk = list()
+            f.write(b"".join(chunk))
+        return written_messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="Path of the DLT file to write")
+    parser.add_argument("--messages", type=int, help="Number of messages")
+    parser.add_argument("--size-mb", type=float, help="Minimum size in MB")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--argument-types",
+        default="STRG,RAWD,UINT,SINT,BOOL",
+        help="Comma separated argument kinds",
+    )
+    parser.add_argument("--verbose-ratio", type=float, default=0.9)
+    parser.add_argument("--extended-header-ratio", type=float, default=0.95)
+    parser.add_argument("--corrupt-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    trace = SyntheticTrace(
+        seed=args.seed,
+        argument_types=args.argument_types.split(","),
+        verbose_ratio=args.verbose_ratio,
+        extended_header_ratio=args.extended_header_ratio,
+        corrupt_ratio=args.corrupt_ratio,
+    )
+    messages = trace.write(
+        args.output,
+        messages=args.messages,
+        byte_size=int(args.size_mb * 1000000) if args.size_mb else None,
+    )
+    print("Wrote {} messages to {}".format(messages, args.output))
+
+
+if __name__ == "__main__":
+    main()
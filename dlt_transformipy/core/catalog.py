@@ -0,0 +1,349 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import hashlib
+import marshal
+import os
+import struct
+import xml.etree.ElementTree as ElementTree
+
+from dlt_transformipy import logger
+
+from dlt_transformipy.core.helpers import UINT32_LE, UINT32_BE
+from dlt_transformipy.core.model.payload import (
+    compile_signature_decoder,
+    TYPE_INFO_BOOL_BITMASK,
+    TYPE_INFO_SINT_BITMASK,
+    TYPE_INFO_UINT_BITMASK,
+    TYPE_INFO_STRG_BITMASK,
+    TYPE_INFO_RAW_BITMASK,
+    TYPE_INFO_TYLE_8BIT_BITMASK,
+    TYPE_INFO_TYLE_16BIT_BITMASK,
+    TYPE_INFO_TYLE_32BIT_BITMASK,
+    TYPE_INFO_TYLE_64BIT_BITMASK,
+)
+
+CATALOG_CACHE_FILE_EXTENSION = ".cache"
+CATALOG_CACHE_VERSION = 1
+# Size of the message ID in front of every non-verbose payload
+MESSAGE_ID_BYTE_SIZE = 4
+TYPE_INFO_STRG_UTF8 = TYPE_INFO_STRG_BITMASK | (0b001 << 15)
+
+# FIBEX signal references (<fx:SIGNAL-REF ID-REF="S_UINT32"/>) and their TYPE_INFO
+SIGNAL_TYPE_INFOS = {
+    "S_BOOL": TYPE_INFO_BOOL_BITMASK | TYPE_INFO_TYLE_8BIT_BITMASK,
+    "S_SINT8": TYPE_INFO_SINT_BITMASK | TYPE_INFO_TYLE_8BIT_BITMASK,
+    "S_SINT16": TYPE_INFO_SINT_BITMASK | TYPE_INFO_TYLE_16BIT_BITMASK,
+    "S_SINT32": TYPE_INFO_SINT_BITMASK | TYPE_INFO_TYLE_32BIT_BITMASK,
+    "S_SINT64": TYPE_INFO_SINT_BITMASK | TYPE_INFO_TYLE_64BIT_BITMASK,
+    "S_UINT8": TYPE_INFO_UINT_BITMASK | TYPE_INFO_TYLE_8BIT_BITMASK,
+    "S_UINT16": TYPE_INFO_UINT_BITMASK | TYPE_INFO_TYLE_16BIT_BITMASK,
+    "S_UINT32": TYPE_INFO_UINT_BITMASK | TYPE_INFO_TYLE_32BIT_BITMASK,
+    "S_UINT64": TYPE_INFO_UINT_BITMASK | TYPE_INFO_TYLE_64BIT_BITMASK,
+    "S_STRG_ASCII": TYPE_INFO_STRG_BITMASK,
+    "S_STRG_UTF8": TYPE_INFO_STRG_UTF8,
+    "S_RAWD": TYPE_INFO_RAW_BITMASK,
+    "S_RAW": TYPE_INFO_RAW_BITMASK,
+}
+
+
+def _local_name(element):
+    """Tag of the element without its XML namespace"""
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def _children(element, name):
+    return [child for child in element if _local_name(child) == name]
+
+
+def _child_text(element, name, default=None):
+    for child in element.iter():
+        if _local_name(child) == name and child.text is not None:
+            return child.text.strip()
+    return default
+
+
+def _sequence_number(element):
+    return int(_child_text(element, "SEQUENCE-NUMBER", "0"))
+
+
+def _reference(element, name):
+    for child in element.iter():
+        if _local_name(child) == name:
+            return child.get("ID-REF")
+    return None
+
+
+def _parse_message_id(frame_id):
+    """Frame IDs are "ID_<message id>" (dlt-viewer convention) or plain numbers"""
+    return int(frame_id.rsplit("_", 1)[-1], 0)
+
+
+class MessageCatalog:
+    """Message descriptions of non-verbose DLT messages (message ID -> arguments)
+
+    The catalog is read from a FIBEX description file once and cached next to it
+    (<description>.cache) as long as size and modification time of the description do
+    not change. Every message ID is compiled into one decoder for its payload.
+    """
+
+    _entries = None
+    _decoders = None
+
+    def __init__(self, entries):
+        """
+        :param dict entries: message ID -> (apid, ctid, signature, texts), the signature
+            is a tuple of TYPE_INFOs, texts is a tuple of (argument position, static text)
+        """
+        self._entries = entries
+        self._decoders = dict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, message_id):
+        return message_id in self._entries
+
+    def __getstate__(self):
+        # Compiled decoders are not picklable (e.g. for worker processes)
+        return self._entries
+
+    def __setstate__(self, entries):
+        self.__init__(entries)
+
+    def get_digest(self):
+        """Returns a digest of the message descriptions (e.g. to validate caches of decoded payloads)
+
+        :rtype: bytes
+        """
+        return hashlib.blake2b(marshal.dumps(self._entries), digest_size=16).digest()
+
+    def get_entry(self, message_id):
+        """Returns (apid, ctid, signature, texts) of the message ID or None if unknown"""
+        return self._entries.get(message_id)
+
+    def get_message_id(self, buffer, start, end, big_endian=False):
+        """Returns the message ID of a non-verbose payload
+
+        :param buffer: Buffer containing the payload
+        :param int start: Offset of the payload (message ID)
+        :param int end: End of the payload
+        :param bool big_endian: Byte order of the payload
+        :returns: The message ID or None if the payload is too short
+        :rtype: int
+        """
+        if end - start < MESSAGE_ID_BYTE_SIZE:
+            return None
+        return (UINT32_BE if big_endian else UINT32_LE).unpack_from(buffer, start)[0]
+
+    def decode(self, buffer, start, end, big_endian=False):
+        """Decodes a non-verbose payload
+
+        :param buffer: Buffer containing the payload
+        :param int start: Offset of the payload (message ID)
+        :param int end: End of the payload
+        :param bool big_endian: Byte order of the payload
+        :returns: List of arguments or None if the message ID is unknown or the payload
+            does not match its description
+        :rtype: list
+        """
+        message_id = self.get_message_id(buffer, start, end, big_endian)
+        if message_id is None:
+            return None
+        decoder = self._get_decoder(message_id, big_endian)
+        if decoder is None:
+            return None
+        try:
+            return decoder(buffer[start + MESSAGE_ID_BYTE_SIZE : end])
+        except struct.error:
+            return None
+
+    def decode_batch(self, buffer, payloads):
+        """Decodes the non-verbose payloads of many messages at once
+
+        The payloads are grouped by message ID, so every group is decoded by its
+        compiled decoder in one pass.
+
+        :param buffer: Buffer containing the payloads
+        :param list payloads: (start, end, big_endian) of every payload
+        :returns: List of arguments of every payload (None like for decode)
+        :rtype: list
+        """
+        results = [None] * len(payloads)
+        groups = dict()
+        for payload_index, (start, end, big_endian) in enumerate(payloads):
+            message_id = self.get_message_id(buffer, start, end, big_endian)
+            if message_id is not None:
+                groups.setdefault((message_id, big_endian), list()).append(
+                    payload_index
+                )
+
+        for (message_id, big_endian), payload_indices in groups.items():
+            decoder = self._get_decoder(message_id, big_endian)
+            if decoder is None:
+                continue
+            for payload_index in payload_indices:
+                start, end, _ = payloads[payload_index]
+                try:
+                    results[payload_index] = decoder(
+                        buffer[start + MESSAGE_ID_BYTE_SIZE : end]
+                    )
+                except struct.error:
+                    pass
+        return results
+
+    def _get_decoder(self, message_id, big_endian):
+        decoder = self._decoders.get((message_id, big_endian))
+        if decoder is None:
+            decoder = self._compile(message_id, big_endian)
+        return decoder
+
+    def _compile(self, message_id, big_endian):
+        entry = self._entries.get(message_id)
+        if entry is None:
+            return None
+        _, _, signature, texts = entry
+        signature_decoder = compile_signature_decoder(
+            signature, big_endian, with_type_info=False
+        )
+        if signature_decoder is None:
+            return None
+
+        def decode(data):
+            arguments = signature_decoder(data, 0)
+            for position, text in texts:
+                arguments.insert(position, text)
+            return arguments
+
+        self._decoders[(message_id, big_endian)] = decode
+        return decode
+
+    @classmethod
+    def load(cls, description_file_path, cache_file_path=None):
+        """Loads the cached catalog of the description file or parses (and caches) it
+
+        :param str description_file_path: Absolute Path + Filename of the FIBEX file
+        :param str cache_file_path: Optional path of the cache (default: <description>.cache)
+        :returns: The catalog of the description file
+        :rtype: MessageCatalog
+        """
+        if cache_file_path is None:
+            cache_file_path = description_file_path + CATALOG_CACHE_FILE_EXTENSION
+        stat = os.stat(description_file_path)
+        cache_key = (CATALOG_CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+
+        try:
+            with open(cache_file_path, "rb") as cache_file_descriptor:
+                cached_key, entries = marshal.load(cache_file_descriptor)
+            if tuple(cached_key) == cache_key:
+                return cls(entries)
+            logger.info("Catalog cache {} is stale".format(cache_file_path))
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        catalog = cls.parse_fibex(description_file_path)
+        try:
+            with open(cache_file_path + ".tmp", "wb") as cache_file_descriptor:
+                marshal.dump((cache_key, catalog._entries), cache_file_descriptor)
+            os.replace(cache_file_path + ".tmp", cache_file_path)
+        except OSError as e:
+            logger.warning(
+                "Catalog cache {} could not be written: {}".format(cache_file_path, e)
+            )
+        return catalog
+
+    @classmethod
+    def parse_fibex(cls, fibex_file_path):
+        """Parses the frames of a FIBEX file (as used by dlt-viewer) into a catalog
+
+        Every FRAME (ID="ID_<message id>") references its PDUs in order, a PDU either
+        contains a single signal (S_UINT32, S_STRG_ASCII, ...) or a static text
+        (its DESC). APPLICATION_ID and CONTEXT_ID are read from the frame's
+        MANUFACTURER-EXTENSION.
+
+        :param str fibex_file_path: Absolute Path + Filename of the FIBEX file
+        :rtype: MessageCatalog
+        """
+        root = ElementTree.parse(fibex_file_path).getroot()
+        pdus = dict()
+        frames = list()
+        for element in root.iter():
+            name = _local_name(element)
+            if name == "PDU" and element.get("ID") is not None:
+                pdus[element.get("ID")] = element
+            elif name == "FRAME" and element.get("ID") is not None:
+                frames.append(element)
+
+        entries = dict()
+        for frame in frames:
+            try:
+                message_id = _parse_message_id(frame.get("ID"))
+            except ValueError:
+                logger.warning("Invalid frame ID {}".format(frame.get("ID")))
+                continue
+            signature = list()
+            texts = list()
+            pdu_instances = [
+                element
+                for element in frame.iter()
+                if _local_name(element) == "PDU-INSTANCE"
+            ]
+            for pdu_instance in sorted(pdu_instances, key=_sequence_number):
+                pdu = pdus.get(_reference(pdu_instance, "PDU-REF"))
+                if pdu is None:
+                    signature = None
+                    break
+                signal_instances = [
+                    element
+                    for element in pdu.iter()
+                    if _local_name(element) == "SIGNAL-INSTANCE"
+                ]
+                if not signal_instances:
+                    # Static text of the log statement
+                    texts.append(
+                        (len(signature) + len(texts), _child_text(pdu, "DESC", ""))
+                    )
+                    continue
+                for signal_instance in sorted(signal_instances, key=_sequence_number):
+                    type_info = SIGNAL_TYPE_INFOS.get(
+                        _reference(signal_instance, "SIGNAL-REF")
+                    )
+                    if type_info is None:
+                        signature = None
+                        break
+                    signature.append(type_info)
+                if signature is None:
+                    break
+
+            if signature is None:
+                logger.warning(
+                    "Message ID {} of {} contains unsupported signals".format(
+                        message_id, fibex_file_path
+                    )
+                )
+                continue
+            entries[message_id] = (
+                _child_text(frame, "APPLICATION_ID", ""),
+                _child_text(frame, "CONTEXT_ID", ""),
+                tuple(signature),
+                tuple(texts),
+            )
+        return cls(entries)
@@ -0,0 +1,139 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Vectorized decoding of the fixed header fields of many messages into NumPy columns"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN_BYTE_SIZE,
+    STORAGE_HEADER_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.standard_header import (
+    STANDARD_HEADER_MANDATORY_BYTE_SIZE,
+    STANDARD_HEADER_ECU_ID_BYTE_SIZE,
+    STANDARD_HEADER_SESSION_ID_BYTE_SIZE,
+    STANDARD_HEADER_TIMESTAMP_BYTE_SIZE,
+)
+
+# Offsets relative to the start of the storage header
+STORAGE_TIMESTAMP_SECONDS_OFFSET = STORAGE_HEADER_PATTERN_BYTE_SIZE
+STORAGE_TIMESTAMP_MICROSECONDS_OFFSET = STORAGE_TIMESTAMP_SECONDS_OFFSET + 4
+STORAGE_ECU_ID_OFFSET = STORAGE_TIMESTAMP_MICROSECONDS_OFFSET + 4
+HEADER_TYPE_OFFSET = STORAGE_HEADER_BYTE_SIZE
+MESSAGE_COUNTER_OFFSET = HEADER_TYPE_OFFSET + 1
+LENGTH_OFFSET = MESSAGE_COUNTER_OFFSET + 1
+OPTIONAL_HEADER_OFFSET = STORAGE_HEADER_BYTE_SIZE + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "numpy is required for columnar header decoding (pip install numpy)"
+        )
+
+
+def _gather(data, positions, dtype):
+    """Reads one value of dtype at every position of data (uint8 array)"""
+    dtype = np.dtype(dtype)
+    positions = np.minimum(positions, len(data) - dtype.itemsize)
+    byte_positions = positions[:, np.newaxis] + np.arange(dtype.itemsize)
+    return np.ascontiguousarray(data[byte_positions]).view(dtype).reshape(-1)
+
+
+def decode_header_columns(buffer, offsets):
+    """Decodes the headers of a batch of messages in one vectorized pass
+
+    Fields which are not present in a message (e.g. the session_id without WSID) are 0.
+    The masks with_ecu_id, with_session_id, with_timestamp and use_extended_header
+    tell which values are valid.
+
+    :param buffer: bytes-like object (e.g. mmap) containing the storaged DLT messages
+    :param offsets: Offsets of the storage headers of the messages
+    :returns: Dictionary of column name to NumPy array
+    :rtype: dict
+    """
+    _require_numpy()
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    columns = dict()
+    # Storage header
+    columns["timestamp_seconds"] = _gather(
+        data, offsets + STORAGE_TIMESTAMP_SECONDS_OFFSET, "<i4"
+    )
+    columns["timestamp_microseconds"] = _gather(
+        data, offsets + STORAGE_TIMESTAMP_MICROSECONDS_OFFSET, "<u4"
+    )
+    columns["storage_ecu_id"] = _gather(data, offsets + STORAGE_ECU_ID_OFFSET, "S4")
+
+    # Standard header
+    header_type = data[offsets + HEADER_TYPE_OFFSET]
+    use_extended_header = (header_type & 0b00001) != 0
+    most_significant_byte_first = (header_type & 0b00010) != 0
+    with_ecu_id = (header_type & 0b00100) != 0
+    with_session_id = (header_type & 0b01000) != 0
+    with_timestamp = (header_type & 0b10000) != 0
+    columns["header_type"] = header_type
+    columns["use_extended_header"] = use_extended_header
+    columns["most_significant_byte_first"] = most_significant_byte_first
+    columns["with_ecu_id"] = with_ecu_id
+    columns["with_session_id"] = with_session_id
+    columns["with_timestamp"] = with_timestamp
+    columns["message_counter"] = data[offsets + MESSAGE_COUNTER_OFFSET]
+    columns["length"] = _gather(data, offsets + LENGTH_OFFSET, ">u2").astype(np.uint16)
+
+    position = offsets + OPTIONAL_HEADER_OFFSET
+    columns["ecu_id"] = np.where(
+        with_ecu_id, _gather(data, position, "S4"), np.bytes_(b"")
+    )
+    position = position + with_ecu_id * STANDARD_HEADER_ECU_ID_BYTE_SIZE
+    columns["session_id"] = np.where(
+        with_session_id, _gather(data, position, ">u4"), 0
+    ).astype(np.uint32)
+    position = position + with_session_id * STANDARD_HEADER_SESSION_ID_BYTE_SIZE
+    columns["timestamp"] = np.where(
+        with_timestamp, _gather(data, position, ">i4"), 0
+    ).astype(np.int32)
+    position = position + with_timestamp * STANDARD_HEADER_TIMESTAMP_BYTE_SIZE
+
+    # Extended header
+    message_info = np.where(
+        use_extended_header, data[np.minimum(position, len(data) - 1)], 0
+    ).astype(np.uint8)
+    verbose = (message_info & 0b1) != 0
+    columns["message_info"] = message_info
+    columns["verbose"] = verbose
+    columns["message_type"] = message_info & 0b00001110
+    columns["message_type_info"] = message_info & 0b11110000
+    # In non-verbose mode, args shall be "0" according to Autosar spec
+    columns["noar"] = np.where(
+        verbose, data[np.minimum(position + 1, len(data) - 1)], 0
+    ).astype(np.uint8)
+    columns["apid"] = np.where(
+        use_extended_header, _gather(data, position + 2, "S4"), np.bytes_(b"")
+    )
+    columns["ctid"] = np.where(
+        use_extended_header, _gather(data, position + 6, "S4"), np.bytes_(b"")
+    )
+    return columns
@@ -0,0 +1,171 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import bz2
+import gzip
+import lzma
+import queue
+import threading
+
+# Magic bytes at the start of compressed files
+COMPRESSION_MAGIC_NUMBERS = (
+    ("gzip", b"\x1f\x8b"),
+    ("xz", b"\xfd7zXZ\x00"),
+    ("bz2", b"BZh"),
+)
+COMPRESSION_MAGIC_MAX_BYTE_SIZE = 6
+# Streaming decompressors (read in blocks, the file is never decompressed to disk)
+COMPRESSION_OPENERS = {"gzip": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+# BYTES DECOMPRESSED AT ONCE
+DECOMPRESSION_BLOCK_SIZE = 1024 * 1024
+# MAXIMUM NUMBER OF DECOMPRESSED BLOCKS WAITING FOR THE PARSER
+DECOMPRESSION_QUEUE_SIZE = 8
+# Seconds between two checks whether the reader was closed while the queue is full
+DECOMPRESSION_CLOSE_POLL_INTERVAL = 0.1
+
+
+def detect_compression(file_path):
+    """Detects the compression of a file by its magic bytes (not by its extension)
+
+    :param str file_path: Absolute Path + Filename of the file
+    :returns: 'gzip', 'xz', 'bz2' or None if the file is not compressed
+    :rtype: str
+    """
+    with open(file_path, "rb") as file_descriptor:
+        file_start = file_descriptor.read(COMPRESSION_MAGIC_MAX_BYTE_SIZE)
+    for compression, magic_number in COMPRESSION_MAGIC_NUMBERS:
+        if file_start.startswith(magic_number):
+            return compression
+    return None
+
+
+class DecompressingReader:
+    """Read-only file object which decompresses a file on a background thread
+
+    zlib, lzma and bz2 release the GIL while decompressing, so the decompression of the
+    next blocks overlaps the parsing of the current one. Only a few decompressed blocks
+    are kept in memory (the thread waits while the queue is full).
+    """
+
+    def __init__(
+        self,
+        file_path,
+        compression,
+        block_size=DECOMPRESSION_BLOCK_SIZE,
+        queue_size=DECOMPRESSION_QUEUE_SIZE,
+    ):
+        """
+        :param str file_path: Absolute Path + Filename of the compressed file
+        :param str compression: 'gzip', 'xz' or 'bz2' (see detect_compression)
+        :param int block_size: Bytes decompressed at once
+        :param int queue_size: Maximum number of decompressed blocks kept in memory
+        """
+        self.__queue = queue.Queue(queue_size)
+        self.__closed = threading.Event()
+        self.__error = None
+        self.__eof = False
+        # Current decompressed block and the position of its first unread byte
+        self.__block = b""
+        self.__position = 0
+        self.__thread = threading.Thread(
+            target=self._decompress,
+            args=(COMPRESSION_OPENERS[compression], file_path, block_size),
+            daemon=True,
+        )
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read(self, size=-1):
+        """Returns up to size decompressed bytes (all remaining bytes if size is negative)
+
+        :param int size: Maximum number of bytes to return
+        :returns: Decompressed bytes, empty at the end of the file
+        :rtype: bytes
+        """
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(DECOMPRESSION_BLOCK_SIZE), b""))
+        if not self._fill():
+            return b""
+        data = self.__block[self.__position : self.__position + size]
+        self.__position += len(data)
+        return data
+
+    def peek(self, size=1):
+        """Returns up to size decompressed bytes without consuming them
+
+        :param int size: Maximum number of bytes to return
+        :rtype: bytes
+        """
+        if not self._fill():
+            return b""
+        return self.__block[self.__position : self.__position + size]
+
+    def close(self):
+        """Stops the background thread"""
+        self.__closed.set()
+        # Unblocks the thread if it waits for space in the queue
+        try:
+            while True:
+                self.__queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.__thread.join()
+
+    def _fill(self):
+        # Returns False at the end of the file
+        if self.__position < len(self.__block):
+            return True
+        if self.__eof:
+            return False
+        self.__block = self.__queue.get()
+        self.__position = 0
+        if not self.__block:
+            self.__eof = True
+            if self.__error is not None:
+                raise self.__error
+            return False
+        return True
+
+    def _decompress(self, opener, file_path, block_size):
+        try:
+            with opener(file_path, "rb") as compressed_file:
+                while not self.__closed.is_set():
+                    block = compressed_file.read(block_size)
+                    self._put(block)
+                    if not block:
+                        return
+        except Exception as error:
+            # Raised by read() in the parsing thread (e.g. EOFError of a truncated file)
+            self.__error = error
+            self._put(b"")
+
+    def _put(self, block):
+        while not self.__closed.is_set():
+            try:
+                self.__queue.put(block, timeout=DECOMPRESSION_CLOSE_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
@@ -0,0 +1,218 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import datetime
+from struct import Struct
+
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN_BYTE_SIZE,
+    STORAGE_HEADER_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.standard_header import (
+    STANDARD_HEADER_MANDATORY_BYTE_SIZE,
+    STANDARD_HEADER_ECU_ID_BYTE_SIZE,
+    STANDARD_HEADER_SESSION_ID_BYTE_SIZE,
+    STANDARD_HEADER_TIMESTAMP_BYTE_SIZE,
+)
+
+# MESSAGE TYPES (MSTP)
+MESSAGE_TYPE_LOG = 0x0
+MESSAGE_TYPE_APP_TRACE = 0x1
+MESSAGE_TYPE_NW_TRACE = 0x2
+MESSAGE_TYPE_CONTROL = 0x3
+# LOG LEVELS (MTIN of MESSAGE_TYPE_LOG)
+LOG_FATAL = 0x1
+LOG_ERROR = 0x2
+LOG_WARN = 0x3
+LOG_INFO = 0x4
+LOG_DEBUG = 0x5
+LOG_VERBOSE = 0x6
+
+# seconds (int32), microseconds (uint32) of the storage header
+STORAGE_TIMESTAMP_STRUCT = Struct("<iI")
+STORAGE_ECU_ID_OFFSET = STORAGE_HEADER_PATTERN_BYTE_SIZE + 8
+HEADER_TYPE_OFFSET = STORAGE_HEADER_BYTE_SIZE
+OPTIONAL_HEADER_OFFSET = STORAGE_HEADER_BYTE_SIZE + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+SESSION_ID_STRUCT = Struct(">I")
+ID_BYTE_SIZE = 4
+
+
+def _encode_ids(ids):
+    """Encodes ECU/APP/CTX IDs the way they are stored (4 bytes, \\0 padded)"""
+    if ids is None:
+        return None
+    if isinstance(ids, (str, bytes)):
+        ids = [ids]
+    return frozenset(
+        (id_.encode("ascii") if isinstance(id_, str) else bytes(id_)).ljust(
+            ID_BYTE_SIZE, b"\0"
+        )
+        for id_ in ids
+    )
+
+
+def _id_at(buffer, offset):
+    return bytes(buffer[offset : offset + ID_BYTE_SIZE])
+
+
+def to_microseconds(time):
+    """Converts a datetime or a POSIX timestamp (seconds) to microseconds
+
+    Storage header times are UTC, so naive datetimes are interpreted as UTC (not as
+    local time).
+    """
+    if time is None:
+        return None
+    if isinstance(time, datetime.datetime):
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=datetime.timezone.utc)
+        time = time.timestamp()
+    return round(time * 1000000)
+
+
+class DLTFilter:
+    """Filter which is evaluated on the raw header bytes of a storaged DLT message
+
+    All given criteria must match. Every criterion accepts a single value or a collection
+    of values. Messages are dropped before any DLTMessage or Payload is created.
+    """
+
+    _ecu_ids = None
+    _apids = None
+    _ctids = None
+    _message_types = None
+    _log_levels = None
+    _session_ids = None
+    _start_time = None
+    _end_time = None
+
+    def __init__(
+        self,
+        ecu_ids=None,
+        apids=None,
+        ctids=None,
+        message_types=None,
+        log_levels=None,
+        session_ids=None,
+        start_time=None,
+        end_time=None,
+    ):
+        """
+        :param ecu_ids: ECU IDs (of the standard header, of the storage header if not present)
+        :param apids: Application IDs of the extended header
+        :param ctids: Context IDs of the extended header
+        :param message_types: Message types (MSTP, e.g. MESSAGE_TYPE_LOG)
+        :param log_levels: Log levels (e.g. LOG_ERROR), only log messages match
+        :param session_ids: Session IDs of the standard header
+        :param start_time: Storage header time (datetime or POSIX timestamp) of the first message,
+            naive datetimes are UTC
+        :param end_time: Storage header time (datetime or POSIX timestamp) behind the last message,
+            naive datetimes are UTC
+        """
+        self._ecu_ids = _encode_ids(ecu_ids)
+        self._apids = _encode_ids(apids)
+        self._ctids = _encode_ids(ctids)
+        self._message_types = self._to_set(message_types)
+        self._log_levels = self._to_set(log_levels)
+        self._session_ids = self._to_set(session_ids)
+        self._start_time = to_microseconds(start_time)
+        self._end_time = to_microseconds(end_time)
+
+    @staticmethod
+    def _to_set(values):
+        if values is None:
+            return None
+        if isinstance(values, int):
+            return frozenset([values])
+        return frozenset(values)
+
+    def matches(self, buffer, offset):
+        """Checks if the storaged DLT message at offset matches the filter
+
+        :param buffer: bytes-like object containing the message
+        :param int offset: Offset of the storage header of the message
+        :returns: True if the message matches all criteria
+        :rtype: bool
+        """
+        if self._start_time is not None or self._end_time is not None:
+            seconds, microseconds = STORAGE_TIMESTAMP_STRUCT.unpack_from(
+                buffer, offset + STORAGE_HEADER_PATTERN_BYTE_SIZE
+            )
+            time = seconds * 1000000 + microseconds
+            if self._start_time is not None and time < self._start_time:
+                return False
+            if self._end_time is not None and time >= self._end_time:
+                return False
+
+        header_type = buffer[offset + HEADER_TYPE_OFFSET]
+        position = offset + OPTIONAL_HEADER_OFFSET
+        # StandardHeader.ecu_id
+        if header_type & 0b00100:
+            if (
+                self._ecu_ids is not None
+                and _id_at(buffer, position) not in self._ecu_ids
+            ):
+                return False
+            position += STANDARD_HEADER_ECU_ID_BYTE_SIZE
+        elif (
+            self._ecu_ids is not None
+            and _id_at(buffer, offset + STORAGE_ECU_ID_OFFSET) not in self._ecu_ids
+        ):
+            return False
+        # StandardHeader.session_id
+        if header_type & 0b01000:
+            if (
+                self._session_ids is not None
+                and SESSION_ID_STRUCT.unpack_from(buffer, position)[0]
+                not in self._session_ids
+            ):
+                return False
+            position += STANDARD_HEADER_SESSION_ID_BYTE_SIZE
+        elif self._session_ids is not None:
+            return False
+        # StandardHeader.timestamp
+        if header_type & 0b10000:
+            position += STANDARD_HEADER_TIMESTAMP_BYTE_SIZE
+
+        if (
+            self._apids is None
+            and self._ctids is None
+            and self._message_types is None
+            and self._log_levels is None
+        ):
+            return True
+        # Remaining criteria need the extended header
+        if not header_type & 0b00001:
+            return False
+        message_info = buffer[position]
+        message_type = (message_info >> 1) & 0b111
+        if self._message_types is not None and message_type not in self._message_types:
+            return False
+        if self._log_levels is not None and (
+            message_type != MESSAGE_TYPE_LOG
+            or (message_info >> 4) not in self._log_levels
+        ):
+            return False
+        if self._apids is not None and _id_at(buffer, position + 2) not in self._apids:
+            return False
+        if self._ctids is not None and _id_at(buffer, position + 6) not in self._ctids:
+            return False
+        return True
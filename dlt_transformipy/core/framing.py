@@ -0,0 +1,231 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from struct import Struct
+
+from dlt_transformipy import logger
+
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN,
+    STORAGE_HEADER_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.standard_header import (
+    STANDARD_HEADER_MANDATORY_BYTE_SIZE,
+    STANDARD_HEADER_ECU_ID_BYTE_SIZE,
+    STANDARD_HEADER_SESSION_ID_BYTE_SIZE,
+    STANDARD_HEADER_TIMESTAMP_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.extended_header import EXTENDED_HEADER_BYTE_SIZE
+
+# Bytes which are needed to determine the size of a storaged message
+# (storage header + mandatory part of the standard header)
+MESSAGE_PREAMBLE_BYTE_SIZE = STORAGE_HEADER_BYTE_SIZE + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+# header_type (uint8), message_counter (uint8), length (uint16)
+STANDARD_HEADER_LENGTH_STRUCT = Struct(">BxH")
+# Serial header which may precede the messages of a stream (e.g. from a serial line)
+SERIAL_HEADER_PATTERN = b"DLS\x01"
+# Version number (bits 5-7 of the header_type), only version 1 is specified
+STANDARD_HEADER_VERSION_BITMASK = 0b11100000
+STANDARD_HEADER_VERSION_1 = 0b00100000
+
+
+def _build_minimum_length_table():
+    """Minimum StandardHeader.length for every possible header_type"""
+    table = list()
+    for header_type in range(256):
+        minimum_length = STANDARD_HEADER_MANDATORY_BYTE_SIZE
+        if header_type & 0b00001:
+            minimum_length += EXTENDED_HEADER_BYTE_SIZE
+        if header_type & 0b00100:
+            minimum_length += STANDARD_HEADER_ECU_ID_BYTE_SIZE
+        if header_type & 0b01000:
+            minimum_length += STANDARD_HEADER_SESSION_ID_BYTE_SIZE
+        if header_type & 0b10000:
+            minimum_length += STANDARD_HEADER_TIMESTAMP_BYTE_SIZE
+        table.append(minimum_length)
+    return tuple(table)
+
+
+MINIMUM_LENGTH_BY_HEADER_TYPE = _build_minimum_length_table()
+
+
+def get_message_byte_size(buffer, offset):
+    """Returns the size of the storaged DLT message starting at offset
+
+    The buffer must contain at least MESSAGE_PREAMBLE_BYTE_SIZE bytes behind offset.
+
+    :param buffer: bytes-like object containing the message
+    :param int offset: Offset of the storage header pattern (DLT\\x01)
+    :returns: Size of storage header + message or 0 if there is no valid message at offset
+    :rtype: int
+    """
+    if buffer[offset : offset + len(STORAGE_HEADER_PATTERN)] != STORAGE_HEADER_PATTERN:
+        return 0
+    header_type, length = STANDARD_HEADER_LENGTH_STRUCT.unpack_from(
+        buffer, offset + STORAGE_HEADER_BYTE_SIZE
+    )
+    if length < MINIMUM_LENGTH_BY_HEADER_TYPE[header_type]:
+        return 0
+    return STORAGE_HEADER_BYTE_SIZE + length
+
+
+class DLTMessageFramer:
+    """Splits storaged DLT messages using the StandardHeader.length
+
+    The storage header pattern (DLT\\x01) is only searched for if the data at the
+    expected position is not a valid message (resynchronisation after corruption).
+    """
+
+    skipped_bytes = 0
+    position = 0
+
+    def __init__(self):
+        self.skipped_bytes = 0
+        self.position = 0
+
+    def frame(self, buffer, start=0, end=None, final=True, base_offset=0):
+        """Yields the (start, end) offsets of every complete message in buffer[start:end]
+
+        After the generator is exhausted, position points to the first byte which
+        was not consumed. If final is False, an incomplete message at the end of the
+        buffer is left unconsumed so it can be completed with the next block.
+
+        :param buffer: bytes, bytearray or mmap containing storaged DLT messages
+        :param int start: Offset of the first byte to frame
+        :param int end: Offset behind the last byte to frame (default: len(buffer))
+        :param bool final: True if no more data will follow the buffer
+        :param int base_offset: Offset of buffer[0] in the file (used for reporting)
+        """
+        if end is None:
+            end = len(buffer)
+        position = start
+        while True:
+            if end - position < MESSAGE_PREAMBLE_BYTE_SIZE:
+                if final and position < end:
+                    self._skip(position, end, base_offset, "truncated message")
+                    position = end
+                break
+
+            message_byte_size = get_message_byte_size(buffer, position)
+            if not message_byte_size:
+                next_position = buffer.find(STORAGE_HEADER_PATTERN, position + 1, end)
+                if next_position < 0:
+                    # Keep a possibly incomplete pattern for the next block
+                    next_position = (
+                        end
+                        if final
+                        else max(position, end - len(STORAGE_HEADER_PATTERN) + 1)
+                    )
+                    self._skip(position, next_position, base_offset, "corrupted data")
+                    position = next_position
+                    break
+                self._skip(position, next_position, base_offset, "corrupted data")
+                position = next_position
+                continue
+
+            message_end = position + message_byte_size
+            if message_end > end:
+                if final:
+                    self._skip(position, end, base_offset, "truncated message")
+                    position = end
+                break
+
+            self.position = message_end
+            yield position, message_end
+            position = message_end
+        self.position = position
+
+    def _skip(self, start, end, base_offset, reason):
+        if end <= start:
+            return
+        self.skipped_bytes += end - start
+        logger.debug(
+            "Skipped {} bytes at offset {} ({})".format(
+                end - start, base_offset + start, reason
+            )
+        )
+
+
+class DLTStreamFramer:
+    """Splits a DLT message stream without storage headers (e.g. dlt-daemon via TCP)
+
+    The messages are split using the StandardHeader.length, a serial header (DLS\\x01)
+    in front of a message is skipped. Invalid data is skipped until a standard header
+    of version 1 with a plausible length follows.
+    """
+
+    skipped_bytes = 0
+    position = 0
+
+    def __init__(self):
+        self.skipped_bytes = 0
+        self.position = 0
+
+    def frame(self, buffer, start=0):
+        """Yields the (start, end) offsets of every complete message in buffer[start:]
+
+        The offsets point to the standard header. After the generator is exhausted,
+        position points to the first byte which was not consumed (an incomplete
+        message is left for the next block).
+
+        :param buffer: bytes-like object containing the message stream
+        :param int start: Offset of the first byte to frame
+        """
+        end = len(buffer)
+        position = start
+        skipped_from = None
+        while end - position >= STANDARD_HEADER_MANDATORY_BYTE_SIZE:
+            if buffer[position : position + len(SERIAL_HEADER_PATTERN)] == (
+                SERIAL_HEADER_PATTERN
+            ):
+                position += len(SERIAL_HEADER_PATTERN)
+                continue
+
+            header_type, length = STANDARD_HEADER_LENGTH_STRUCT.unpack_from(
+                buffer, position
+            )
+            if (
+                header_type & STANDARD_HEADER_VERSION_BITMASK
+                != STANDARD_HEADER_VERSION_1
+                or length < MINIMUM_LENGTH_BY_HEADER_TYPE[header_type]
+            ):
+                if skipped_from is None:
+                    skipped_from = position
+                position += 1
+                continue
+            if skipped_from is not None:
+                self._skip(skipped_from, position)
+                skipped_from = None
+
+            message_end = position + length
+            if message_end > end:
+                break
+            self.position = message_end
+            yield position, message_end
+            position = message_end
+
+        if skipped_from is not None:
+            self._skip(skipped_from, position)
+        self.position = position
+
+    def _skip(self, start, end):
+        self.skipped_bytes += end - start
+        logger.debug("Skipped {} bytes of invalid stream data".format(end - start))
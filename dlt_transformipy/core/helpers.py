@@ -19,50 +19,81 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import codecs
-from struct import unpack
-from binascii import unhexlify
+from struct import Struct
+
+# Precompiled structs (little endian / big endian)
+INT8_LE = Struct("<b")
+INT8_BE = Struct(">b")
+UINT8_LE = Struct("<B")
+UINT8_BE = Struct(">B")
+INT16_LE = Struct("<h")
+INT16_BE = Struct(">h")
+UINT16_LE = Struct("<H")
+UINT16_BE = Struct(">H")
+INT32_LE = Struct("<i")
+INT32_BE = Struct(">i")
+UINT32_LE = Struct("<I")
+UINT32_BE = Struct(">I")
+INT64_LE = Struct("<q")
+INT64_BE = Struct(">q")
+UINT64_LE = Struct("<Q")
+UINT64_BE = Struct(">Q")
 
 
 def isKthBitSet(n, k):
     return n & (1 << k)
 
 
-def hex_str_to_ascii(hex_str, errors="ignore"):
-    return codecs.decode(hex_str, "hex").decode(errors=errors)
+def bytes_to_ascii(buffer, errors="ignore"):
+    # ASCII is a subset of UTF-8, decoding as UTF-8 keeps non-conforming loggers readable
+    return str(buffer, "utf-8", errors)
 
 
-def hex_str_to_utf8(hex_str, errors="ignore"):
-    return codecs.decode(hex_str, "hex").decode("utf-8", errors=errors)
+def bytes_to_utf8(buffer, errors="ignore"):
+    return str(buffer, "utf-8", errors)
 
 
-def hex_str_to_int8(hex_str, big_endian=False):
-    return unpack(">b" if big_endian else "<b", unhexlify(hex_str))[0]
+def bytes_to_int8(buffer, offset=0, big_endian=False):
+    return (INT8_BE if big_endian else INT8_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_uint8(hex_str, big_endian=False):
-    return unpack(">B" if big_endian else "<B", unhexlify(hex_str))[0]
+def bytes_to_uint8(buffer, offset=0, big_endian=False):
+    return (UINT8_BE if big_endian else UINT8_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_int16(hex_str, big_endian=False):
-    return unpack(">h" if big_endian else "<h", unhexlify(hex_str))[0]
+def bytes_to_int16(buffer, offset=0, big_endian=False):
+    return (INT16_BE if big_endian else INT16_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_uint16(hex_str, big_endian=False):
-    return unpack(">H" if big_endian else "<H", unhexlify(hex_str))[0]
+def bytes_to_uint16(buffer, offset=0, big_endian=False):
+    return (UINT16_BE if big_endian else UINT16_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_int32(hex_str, big_endian=False):
-    return unpack(">i" if big_endian else "<i", unhexlify(hex_str))[0]
+def bytes_to_int32(buffer, offset=0, big_endian=False):
+    return (INT32_BE if big_endian else INT32_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_uint32(hex_str, big_endian=False):
-    return unpack(">I" if big_endian else "<I", unhexlify(hex_str))[0]
+def bytes_to_uint32(buffer, offset=0, big_endian=False):
+    return (UINT32_BE if big_endian else UINT32_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_int64(hex_str, big_endian=False):
-    return unpack(">q" if big_endian else "<q", unhexlify(hex_str))[0]
+def bytes_to_int64(buffer, offset=0, big_endian=False):
+    return (INT64_BE if big_endian else INT64_LE).unpack_from(buffer, offset)[0]
 
 
-def hex_str_to_uint64(hex_str, big_endian=False):
-    return unpack(">Q" if big_endian else "<Q", unhexlify(hex_str))[0]
+def bytes_to_uint64(buffer, offset=0, big_endian=False):
+    return (UINT64_BE if big_endian else UINT64_LE).unpack_from(buffer, offset)[0]
+
+
+def write_chunks(chunks, write):
+    """Writes the chunks of a renderer (generator) and returns the value it returned
+
+    :param generator chunks: Renderer, e.g. returning the number of rendered rows
+    :param function write: Function which writes a chunk
+    """
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration as stop:
+            return stop.value
+        write(chunk)
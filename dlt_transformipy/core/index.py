@@ -0,0 +1,244 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mmap
+import os
+import sys
+from array import array
+from struct import Struct
+
+from dlt_transformipy import logger
+
+from dlt_transformipy.core.framing import DLTMessageFramer
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN,
+    STORAGE_HEADER_PATTERN_BYTE_SIZE,
+    STORAGE_HEADER_BYTE_SIZE,
+)
+
+INDEX_FILE_EXTENSION = ".idx"
+INDEX_MAGIC = b"DLTIDX\0\0"
+INDEX_VERSION = 1
+# magic, version, padding, dlt file size, dlt file mtime (ns), number of messages
+# (40 bytes, keeps the following columns aligned)
+INDEX_HEADER_STRUCT = Struct("<8sI4xQqQ")
+# seconds (int32), microseconds (uint32) of the storage header
+STORAGE_TIMESTAMP_STRUCT = Struct("<iI")
+
+# Columns of the index (name, array typecode)
+INDEX_COLUMNS = (
+    ("offsets", "Q"),
+    ("timestamp_seconds", "i"),
+    ("timestamp_microseconds", "I"),
+    ("lengths", "H"),
+)
+
+
+class DLTIndex:
+    """Offsets and key header fields of every message of a storaged DLT file
+
+    The index is persisted next to the DLT file (<dlt file>.idx) and reused as long
+    as size and modification time of the DLT file do not change.
+    """
+
+    offsets = None
+    timestamp_seconds = None
+    timestamp_microseconds = None
+    lengths = None
+    _file_size = 0
+    _file_mtime_ns = 0
+    _mmap = None
+
+    def __init__(self, file_size, file_mtime_ns, columns, index_mmap=None):
+        self._file_size = file_size
+        self._file_mtime_ns = file_mtime_ns
+        self._mmap = index_mmap
+        for name, _ in INDEX_COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_message_byte_size(self, index):
+        """Returns the size (storage header + message) of the message at index"""
+        return STORAGE_HEADER_BYTE_SIZE + self.lengths[index]
+
+    def is_valid_for(self, dlt_file_path):
+        """Checks if the index still matches size and modification time of the DLT file"""
+        stat = os.stat(dlt_file_path)
+        return (
+            stat.st_size == self._file_size and stat.st_mtime_ns == self._file_mtime_ns
+        )
+
+    def close(self):
+        if self._mmap is not None:
+            for name, _ in INDEX_COLUMNS:
+                getattr(self, name).release()
+            self._mmap.close()
+            self._mmap = None
+
+    ###
+    # Persistence
+    ###
+    @classmethod
+    def load_or_build(cls, dlt_file_path, index_file_path=None):
+        """Loads the persisted index of the DLT file or (re)builds it if missing or stale
+
+        :param str dlt_file_path: Absolute Path + Filename of the DLT file
+        :param str index_file_path: Optional path of the index file (default: <dlt file>.idx)
+        :returns: The index of the DLT file
+        :rtype: DLTIndex
+        """
+        if index_file_path is None:
+            index_file_path = dlt_file_path + INDEX_FILE_EXTENSION
+
+        dlt_index = cls.load(index_file_path)
+        if dlt_index is not None:
+            if dlt_index.is_valid_for(dlt_file_path):
+                return dlt_index
+            logger.info("Index {} is stale, rebuilding it".format(index_file_path))
+            dlt_index.close()
+
+        dlt_index = cls.build(dlt_file_path)
+        try:
+            dlt_index.save(index_file_path)
+        except OSError as e:
+            logger.warning(
+                "Index {} could not be written: {}".format(index_file_path, e)
+            )
+        return dlt_index
+
+    @classmethod
+    def load(cls, index_file_path):
+        """Loads a persisted index, returns None if it does not exist or is invalid"""
+        try:
+            with open(index_file_path, "rb") as index_file_descriptor:
+                index_mmap = mmap.mmap(
+                    index_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (OSError, ValueError):
+            return None
+
+        if len(index_mmap) < INDEX_HEADER_STRUCT.size:
+            index_mmap.close()
+            return None
+        (
+            magic,
+            version,
+            file_size,
+            file_mtime_ns,
+            count,
+        ) = INDEX_HEADER_STRUCT.unpack_from(index_mmap)
+        expected_size = INDEX_HEADER_STRUCT.size + count * sum(
+            array(typecode).itemsize for _, typecode in INDEX_COLUMNS
+        )
+        if (
+            magic != INDEX_MAGIC
+            or version != INDEX_VERSION
+            or len(index_mmap) != expected_size
+        ):
+            index_mmap.close()
+            logger.info("Ignoring invalid index {}".format(index_file_path))
+            return None
+
+        if sys.byteorder != "little":
+            # The index is stored little endian, copy and swap the columns
+            columns = cls._read_columns(index_mmap, count, copy=True)
+            index_mmap.close()
+            return cls(file_size, file_mtime_ns, columns)
+        # Columns are zero-copy views into the index file
+        return cls(
+            file_size,
+            file_mtime_ns,
+            cls._read_columns(index_mmap, count, copy=False),
+            index_mmap,
+        )
+
+    @staticmethod
+    def _read_columns(index_mmap, count, copy):
+        columns = dict()
+        offset = INDEX_HEADER_STRUCT.size
+        index_view = memoryview(index_mmap)
+        for name, typecode in INDEX_COLUMNS:
+            size = count * array(typecode).itemsize
+            column = index_view[offset : offset + size]
+            if copy:
+                column = array(typecode, column.tobytes())
+                column.byteswap()
+            else:
+                column = column.cast(typecode)
+            columns[name] = column
+            offset += size
+        index_view.release()
+        return columns
+
+    def save(self, index_file_path):
+        """Writes the index (atomically) to index_file_path"""
+        temporary_index_file_path = index_file_path + ".tmp"
+        with open(temporary_index_file_path, "wb") as index_file_descriptor:
+            index_file_descriptor.write(
+                INDEX_HEADER_STRUCT.pack(
+                    INDEX_MAGIC,
+                    INDEX_VERSION,
+                    self._file_size,
+                    self._file_mtime_ns,
+                    len(self),
+                )
+            )
+            for name, typecode in INDEX_COLUMNS:
+                column = array(typecode, getattr(self, name))
+                if sys.byteorder != "little":
+                    column.byteswap()
+                column.tofile(index_file_descriptor)
+        os.replace(temporary_index_file_path, index_file_path)
+
+    @classmethod
+    def build(cls, dlt_file_path):
+        """Builds the index with a single framing pass (no DLTMessages are created)"""
+        stat = os.stat(dlt_file_path)
+        columns = {name: array(typecode) for name, typecode in INDEX_COLUMNS}
+        offsets = columns["offsets"]
+        timestamp_seconds = columns["timestamp_seconds"]
+        timestamp_microseconds = columns["timestamp_microseconds"]
+        lengths = columns["lengths"]
+
+        with open(dlt_file_path, "rb") as dlt_file_descriptor:
+            if (
+                dlt_file_descriptor.read(STORAGE_HEADER_PATTERN_BYTE_SIZE)
+                != STORAGE_HEADER_PATTERN
+            ):
+                raise TypeError(
+                    "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
+                )
+            dlt_mmap = mmap.mmap(dlt_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for message_start, message_end in DLTMessageFramer().frame(dlt_mmap):
+                seconds, microseconds = STORAGE_TIMESTAMP_STRUCT.unpack_from(
+                    dlt_mmap, message_start + STORAGE_HEADER_PATTERN_BYTE_SIZE
+                )
+                offsets.append(message_start)
+                timestamp_seconds.append(seconds)
+                timestamp_microseconds.append(microseconds)
+                lengths.append(message_end - message_start - STORAGE_HEADER_BYTE_SIZE)
+        finally:
+            dlt_mmap.close()
+
+        return cls(stat.st_size, stat.st_mtime_ns, columns)
@@ -0,0 +1,129 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import heapq
+
+# DLTMESSAGES OF EACH INPUT WHICH ARE REORDERED BY TIME BEFORE THEY ARE MERGED
+# (tolerates slightly out of order storage timestamps within one DLT file)
+MERGE_REORDER_WINDOW = 64
+
+
+def _storage_time(dlt_message):
+    storage_header = dlt_message.storage_header
+    return storage_header.timestamp_seconds * 1000000 + (
+        storage_header.timestamp_microseconds
+    )
+
+
+def _reorder(dlt_messages, reorder_window):
+    # Keeps reorder_window DLTMessages in a heap and yields the earliest one, the
+    # sequence number keeps the original order of equal times
+    window = list()
+    for sequence_number, dlt_message in enumerate(dlt_messages):
+        entry = (_storage_time(dlt_message), sequence_number, dlt_message)
+        if len(window) < reorder_window:
+            heapq.heappush(window, entry)
+        else:
+            yield heapq.heappushpop(window, entry)[2]
+    while window:
+        yield heapq.heappop(window)[2]
+
+
+def merge_messages(dlt_files, reorder_window=MERGE_REORDER_WINDOW):
+    """Merges the DLTMessages of several DLTFiles into one stream ordered by storage time
+
+    Heap-based k-way merge: only the next DLTMessage (plus the reorder window) of every
+    DLTFile is kept in memory, the DLTFiles are read while the stream is consumed.
+    DLTMessages with equal storage times are yielded in the order of dlt_files.
+
+    :param dlt_files: Iterable of DLTFiles (each in storage time order)
+    :param int reorder_window: Number of DLTMessages of each DLTFile which are
+        reordered by time before they are merged (0: the DLTFiles are in order)
+    :returns: Generator of DLTMessages
+    :rtype: DLTMessage
+    """
+    inputs = list()
+    heads = list()
+    for input_idx, dlt_file in enumerate(dlt_files):
+        dlt_messages = iter(dlt_file.iter_messages())
+        if reorder_window:
+            dlt_messages = _reorder(dlt_messages, reorder_window)
+        inputs.append(dlt_messages)
+        for dlt_message in dlt_messages:
+            # The input index is unique within the heap, DLTMessages are never compared
+            heads.append((_storage_time(dlt_message), input_idx, dlt_message))
+            break
+    heapq.heapify(heads)
+
+    while heads:
+        _, input_idx, dlt_message = heads[0]
+        yield dlt_message
+        next_message = next(inputs[input_idx], None)
+        if next_message is None:
+            heapq.heappop(heads)
+        else:
+            heapq.heapreplace(
+                heads, (_storage_time(next_message), input_idx, next_message)
+            )
+
+
+class MergedDLTFile:
+    """Several DLTFiles which are read as one DLTFile ordered by storage time
+
+    Can be passed to the sequential transformations (as_csv, as_jsonl, as_sqlite), the
+    merged stream is never held in memory.
+    """
+
+    __dlt_files = None
+    __reorder_window = MERGE_REORDER_WINDOW
+
+    def __init__(self, dlt_files, reorder_window=MERGE_REORDER_WINDOW):
+        """
+        :param dlt_files: Iterable of DLTFiles (e.g. one per ECU or rotated DLT file)
+        :param int reorder_window: Number of DLTMessages of each DLTFile which are
+            reordered by time before they are merged (0: the DLTFiles are in order)
+        """
+        self.__dlt_files = list(dlt_files)
+        self.__reorder_window = reorder_window
+
+    def iter_messages(self, workers=None):
+        """Iterates over the DLTMessages of all DLTFiles ordered by storage time
+
+        :param int workers: Not supported, the DLTFiles are merged sequentially
+        :returns: Generator of DLTMessages
+        :rtype: DLTMessage
+        """
+        return merge_messages(self.__dlt_files, self.__reorder_window)
+
+    ###
+    # Getters
+    ###
+    def get_dlt_files(self):
+        """Returns the merged DLTFiles
+        :rtype: list
+        """
+        return self.__dlt_files
+
+    def get_skipped_bytes(self):
+        """Returns the number of bytes skipped in all DLTFiles during the last read
+        :rtype: int
+        """
+        return sum(dlt_file.get_skipped_bytes() for dlt_file in self.__dlt_files)
@@ -19,84 +19,656 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import mmap
+import os
+import time
+from array import array
+
 from dlt_transformipy import logger
 
+from dlt_transformipy.core.catalog import MessageCatalog
+from dlt_transformipy.core.columnar import decode_header_columns
+from dlt_transformipy.core.compression import DecompressingReader, detect_compression
+from dlt_transformipy.core.filter import to_microseconds
+from dlt_transformipy.core.framing import DLTMessageFramer
+from dlt_transformipy.core.index import DLTIndex
+from dlt_transformipy.core.parallel import ParallelDecoder, iter_batch_messages
+from dlt_transformipy.core.symbols import SymbolTable
+from dlt_transformipy.core.text_index import DLTTextIndex, get_text
+from dlt_transformipy.core.time_index import DLTTimeIndex, STORAGE_TIMESTAMP_STRUCT
 from dlt_transformipy.core.model.dlt_message import DLTMessage
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN,
+    STORAGE_HEADER_PATTERN_BYTE_SIZE,
+)
 
 # BLOCK SIZE USED FOR READING DLT
 READ_DLT_BLOCK_SIZE = 32000
+# SECONDS BETWEEN TWO CHECKS FOR NEW DATA IN FOLLOW MODE
+FOLLOW_POLL_INTERVAL = 0.5
 
 ### STORAGE FILE IDENTIFIERS ###
 STORAGE_FILE_HEADER_BYTE_SIZE = 4
-DLT_STORAGE_HEADER_IDENTIFIER_HEX = "444c5401"
 
 
 class DLTFile:
     __dlt_messages = None
     __dlt_file_path = None
+    __skipped_bytes = 0
+    __use_mmap = False
+    __mmap = None
+    __index = None
+    __filtered_offsets = None
+    __time_index = None
+    __text_index = None
+    __dlt_filter = None
+    __catalog = None
+    __compression = None
+    __compression_detected = False
+    __symbol_table = None
+    __trace_cache = None
+    __follow_offset = None
 
-    def __init__(self, dlt_file_path):
-        self.__dlt_messages = list()
+    def __init__(
+        self,
+        dlt_file_path,
+        use_mmap=False,
+        dlt_filter=None,
+        catalog=None,
+        trace_cache=None,
+    ):
+        """
+        :param str dlt_file_path: Absolute Path + Filename of the DLT file
+        :param bool use_mmap: Memory-map the DLT file instead of reading it block by block
+        :param DLTFilter dlt_filter: Optional filter, only matching DLTMessages are read
+        :param catalog: Optional MessageCatalog (or path of a FIBEX file) to decode
+            non-verbose payloads
+        :param TraceCache trace_cache: Optional TraceCache, the decoded DLT file is cached
+            there and reloaded from it as long as the DLT file does not change
+        """
+        # None until the DLTFile is read into memory
+        self.__dlt_messages = None
         self.__dlt_file_path = dlt_file_path
+        self.__skipped_bytes = 0
+        self.__use_mmap = use_mmap
+        self.__mmap = None
+        self.__index = None
+        self.__filtered_offsets = None
+        self.__time_index = None
+        self.__text_index = None
+        self.__dlt_filter = dlt_filter
+        if catalog is not None and not isinstance(catalog, MessageCatalog):
+            catalog = MessageCatalog.load(catalog)
+        self.__catalog = catalog
+        self.__compression = None
+        self.__compression_detected = False
+        # The ECU/APP/CTX IDs of all DLTMessages of the file are interned here
+        self.__symbol_table = SymbolTable()
+        self.__trace_cache = trace_cache
+        self.__follow_offset = None
 
-    def read(self):
-        """Reads the whole DLTFile into memory"""
-        dlt_file_descriptor = open(self.__dlt_file_path, "rb")
+    def __len__(self):
+        """Returns the number of DLTMessages (uses the message index if not read into memory)
 
-        if not self._check_if_storage_file(dlt_file_descriptor):
-            raise TypeError(
-                "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
-            )
+        Like read, only the DLTMessages which match the filter are counted.
+        """
+        if self.__dlt_messages is not None:
+            return len(self.__dlt_messages)
+        return len(self._get_offsets())
+
+    def __getitem__(self, index):
+        """Random access to a DLTMessage (or a list of DLTMessages for slices)
+
+        If the DLTFile was not read into memory, the message index is used to decode only
+        the requested DLTMessages from the memory-mapped DLT file. Like read, only the
+        DLTMessages which match the filter are indexed.
+        """
+        if self.__dlt_messages is not None:
+            return self.__dlt_messages[index]
 
-        for dlt_message_hex in self._hex_dlt_message_iterator(dlt_file_descriptor):
-            if dlt_message_hex and len(dlt_message_hex) > 0:
-                self.__dlt_messages.append(DLTMessage(dlt_message_hex))
+        offsets = self._get_offsets()
+        if isinstance(index, slice):
+            return [
+                self._message_at(offsets[message_index])
+                for message_index in range(*index.indices(len(offsets)))
+            ]
+        return self._message_at(offsets[index])
 
-        dlt_file_descriptor.close()
+    def read(self, workers=None):
+        """Reads the whole DLTFile into memory
+
+        :param int workers: Optional number of worker processes which decode the DLTFile in parallel
+        """
+        self.__dlt_messages = list(self._read_messages(workers))
 
         logger.info(
             "Number of DLT-Messages in DLT File {}: {}".format(
                 self.__dlt_file_path, len(self.__dlt_messages)
             )
         )
+        if self.__skipped_bytes:
+            logger.warning(
+                "Skipped {} corrupted bytes in DLT File {}".format(
+                    self.__skipped_bytes, self.__dlt_file_path
+                )
+            )
+
+    def iter_messages(self, workers=None):
+        """Iterates over all DLTMessages without loading the whole DLTFile into memory
+
+        Only the current DLTMessage is kept in memory, unless the DLTFile was already read.
+        :param int workers: Optional number of worker processes which decode the DLTFile in parallel
+        :returns: Generator of DLTMessages
+        :rtype: DLTMessage
+        """
+        if self.__dlt_messages is not None:
+            yield from self.__dlt_messages
+        else:
+            yield from self._read_messages(workers)
+
+    def iter_time_range(self, start_time=None, end_time=None):
+        """Iterates over the DLTMessages of a storage time range without reading the whole DLTFile
+
+        The sparse time index (see DLTTimeIndex) is bisected to find the byte range of the
+        time range, only this range is framed and decoded.
+        :param start_time: Storage header time (datetime or POSIX timestamp) of the first DLTMessage,
+            naive datetimes are UTC
+        :param end_time: Storage header time (datetime or POSIX timestamp) behind the last DLTMessage,
+            naive datetimes are UTC
+        :returns: Generator of DLTMessages
+        :rtype: DLTMessage
+        """
+        start_time = to_microseconds(start_time)
+        end_time = to_microseconds(end_time)
+        byte_range = self.get_time_index().find_range(start_time, end_time)
+        if byte_range is None:
+            return
+
+        dlt_mmap = self._get_mmap()
+        dlt_file_view = memoryview(dlt_mmap)
+        dlt_filter = self.__dlt_filter
+        catalog = self.__catalog
+        symbol_table = self.__symbol_table
+        start_offset, end_offset = byte_range
+        for message_start, _ in DLTMessageFramer().frame(
+            dlt_mmap, start_offset, end_offset
+        ):
+            seconds, microseconds = STORAGE_TIMESTAMP_STRUCT.unpack_from(
+                dlt_mmap, message_start + STORAGE_HEADER_PATTERN_BYTE_SIZE
+            )
+            message_time = seconds * 1000000 + microseconds
+            # The byte range may contain DLTMessages outside of the time range
+            if (start_time is not None and message_time < start_time) or (
+                end_time is not None and message_time >= end_time
+            ):
+                continue
+            if dlt_filter is None or dlt_filter.matches(dlt_mmap, message_start):
+                yield DLTMessage(
+                    dlt_file_view,
+                    message_start,
+                    catalog=catalog,
+                    symbol_table=symbol_table,
+                )
 
-    def get_messages(self) -> "list(DLTMessage)":
+    def search(self, text, keywords=False):
+        """Iterates over the DLTMessages whose STRG arguments contain the text
+
+        The persisted text index (see DLTTextIndex) selects the candidate DLTMessages,
+        only these are decoded and checked for the text.
+        :param str text: Text to search for (case-sensitive)
+        :param bool keywords: Search for whole words (case-insensitive, in any order)
+            instead of the text, no DLTMessage has to be checked
+        :returns: Generator of DLTMessages
+        :rtype: DLTMessage
+        """
+        text_index = self.get_text_index()
+        if keywords:
+            message_indices = text_index.search(text)
+        else:
+            message_indices = text_index.find_candidates(text)
+            if message_indices is None:
+                message_indices = range(text_index.message_count)
+
+        dlt_mmap = self._get_mmap()
+        offsets = self.get_index().offsets
+        dlt_filter = self.__dlt_filter
+        for message_index in message_indices:
+            offset = offsets[message_index]
+            if dlt_filter is not None and not dlt_filter.matches(dlt_mmap, offset):
+                continue
+            dlt_message = self._message_at(offset)
+            if keywords or text in get_text(dlt_message):
+                yield dlt_message
+
+    def follow(self, offset=0, poll_interval=FOLLOW_POLL_INTERVAL, timeout=None):
+        """Yields the DLTMessages of a DLT file which is still being written (like tail -f)
+
+        Only completed DLTMessages are yielded, an incomplete message at the end of the
+        file is completed with the next write. If the file is truncated, it is followed
+        from its start again. If it is rotated (the path refers to a new file), the new
+        file is followed from its start.
+
+        The offset behind the last framed DLTMessage is kept (see get_follow_offset), a
+        stopped follow continues there with follow(offset=dlt_file.get_follow_offset()).
+
+        :param int offset: Offset to start at (default: 0, None: the current end of file)
+        :param float poll_interval: Seconds between two checks for new data
+        :param float timeout: Optional number of seconds without new data after which
+            the generator stops (default: follow forever)
+        :returns: Generator of DLTMessages
+        :rtype: DLTMessage
+        """
+        # The end of file is taken now, not when the iteration starts (the file itself
+        # is only opened by the generator)
+        if offset is None:
+            offset = os.path.getsize(self.__dlt_file_path)
+        self.__follow_offset = offset
+        return self._follow(offset, poll_interval, timeout)
+
+    def get_follow_offset(self):
+        """Returns the offset behind the last DLTMessage framed by follow (or None)
+
+        Corrupted data is included, an incomplete DLTMessage at the end of the file is not.
+        :rtype: int
+        """
+        return self.__follow_offset
+
+    def _follow(self, offset, poll_interval, timeout):
+        dlt_filter = self.__dlt_filter
+        catalog = self.__catalog
+        symbol_table = self.__symbol_table
+        self.__skipped_bytes = 0
+        framer = DLTMessageFramer()
+        dlt_file_descriptor = open(self.__dlt_file_path, "rb")
+        try:
+            dlt_file_descriptor.seek(offset)
+            # Offset of current[0] in the file
+            current_offset = offset
+            current = b""
+            idle_since = time.monotonic()
+            while True:
+                block = dlt_file_descriptor.read(READ_DLT_BLOCK_SIZE)
+                if block:
+                    # Only the unconsumed rest (an incomplete message) is copied
+                    current = current[framer.position :] + block
+                    current_offset += framer.position
+                    for message_start, message_end in framer.frame(
+                        current, final=False, base_offset=current_offset
+                    ):
+                        self.__follow_offset = current_offset + message_end
+                        if dlt_filter is None or dlt_filter.matches(
+                            current, message_start
+                        ):
+                            yield DLTMessage(
+                                current[message_start:message_end],
+                                catalog=catalog,
+                                symbol_table=symbol_table,
+                            )
+                    # Includes corrupted data skipped behind the last message
+                    self.__follow_offset = current_offset + framer.position
+                    idle_since = time.monotonic()
+                    continue
+
+                restart = self._check_follow_restart(dlt_file_descriptor)
+                if restart is not None:
+                    # Count the incomplete rest of the previous data as skipped
+                    for _ in framer.frame(current, framer.position, final=True):
+                        pass
+                    self.__skipped_bytes += framer.skipped_bytes
+                    dlt_file_descriptor.close()
+                    dlt_file_descriptor = restart
+                    framer = DLTMessageFramer()
+                    current_offset = 0
+                    current = b""
+                    self.__follow_offset = 0
+                    continue
+
+                if timeout is not None and time.monotonic() - idle_since >= timeout:
+                    break
+                time.sleep(poll_interval)
+        finally:
+            self.__skipped_bytes += framer.skipped_bytes
+            dlt_file_descriptor.close()
+
+    def get_messages(self, workers=None) -> "list(DLTMessage)":
         """Returns a list of all DLTMessages
+        :param int workers: Optional number of worker processes which decode the DLTFile in parallel
         :returns: List of all DLTMessages
         :rtype: DLTMessage
         """
-        if self.__dlt_messages is None or not len(self.__dlt_messages):
-            self.read()
+        if self.__dlt_messages is None:
+            self.read(workers)
         return self.__dlt_messages
 
+    def get_index(self):
+        """Returns the message index, loads the persisted index or builds it if missing or stale
+        :returns: The message index of the DLTFile
+        :rtype: DLTIndex
+        """
+        if self.__index is None:
+            self._check_random_access()
+            self.__index = DLTIndex.load_or_build(self.__dlt_file_path)
+        return self.__index
+
+    def get_time_index(self):
+        """Returns the sparse time index, loads the persisted index or builds it if missing or stale
+        :returns: The time index of the DLTFile
+        :rtype: DLTTimeIndex
+        """
+        if self.__time_index is None:
+            self._check_random_access()
+            self.__time_index = DLTTimeIndex.load_or_build(self.__dlt_file_path)
+        return self.__time_index
+
+    def get_text_index(self):
+        """Returns the text index of the STRG arguments, loads the persisted index or builds it if missing or stale
+        :returns: The text index of the DLTFile
+        :rtype: DLTTextIndex
+        """
+        if self.__text_index is None:
+            self._check_random_access()
+            self.__text_index = DLTTextIndex.load_or_build(self)
+        return self.__text_index
+
+    def get_header_columns(self, start=None, stop=None):
+        """Decodes the headers of the messages [start:stop] into NumPy columns (requires numpy)
+
+        No DLTMessages are created, the fixed header fields of all messages are decoded in one
+        vectorized pass (see core.columnar.decode_header_columns).
+        :param int start: Index of the first message (default: 0)
+        :param int stop: Index behind the last message (default: number of messages)
+        :returns: Dictionary of column name to NumPy array
+        :rtype: dict
+        """
+        offsets = self.get_index().offsets[start:stop]
+        return decode_header_columns(self._get_mmap(), offsets)
+
+    def get_skipped_bytes(self):
+        """Returns the number of bytes skipped during the last read due to corruption
+        :returns: Number of skipped bytes
+        :rtype: int
+        """
+        return self.__skipped_bytes
+
+    def get_compression(self):
+        """Returns the compression of the DLT file detected by its magic bytes
+        :returns: 'gzip', 'xz', 'bz2' or None if the DLT file is not compressed
+        :rtype: str
+        """
+        if not self.__compression_detected:
+            self.__compression = detect_compression(self.__dlt_file_path)
+            self.__compression_detected = True
+        return self.__compression
+
+    def get_symbol_table(self):
+        """Returns the SymbolTable of the ECU/APP/CTX IDs read so far
+        :rtype: SymbolTable
+        """
+        return self.__symbol_table
+
+    def get_mmap(self):
+        """Returns the memory-mapped DLT file (kept open until clean_up)
+        :rtype: mmap
+        """
+        return self._get_mmap()
+
+    def get_file_path(self):
+        """Returns the path of the DLT file
+        :rtype: str
+        """
+        return self.__dlt_file_path
+
+    def get_filter(self):
+        """Returns the DLTFilter applied while reading (or None)
+        :rtype: DLTFilter
+        """
+        return self.__dlt_filter
+
+    def get_trace_cache(self):
+        """Returns the TraceCache of the decoded DLT file (or None)
+        :rtype: TraceCache
+        """
+        return self.__trace_cache
+
+    def get_catalog(self):
+        """Returns the MessageCatalog used to decode non-verbose payloads (or None)
+        :rtype: MessageCatalog
+        """
+        return self.__catalog
+
     def clean_up(self):
         self.__dlt_messages = None
+        if self.__mmap is not None:
+            try:
+                self.__mmap.close()
+            except BufferError:
+                # DLTMessages referencing the mapping are still alive, the mapping is
+                # released as soon as they are garbage collected
+                logger.debug(
+                    "Memory-map of DLT File {} is still in use".format(
+                        self.__dlt_file_path
+                    )
+                )
+            self.__mmap = None
+        if self.__index is not None:
+            self.__index.close()
+            self.__index = None
+        self.__filtered_offsets = None
+        self.__time_index = None
+        if self.__text_index is not None:
+            self.__text_index.close()
+            self.__text_index = None
+
+    def _get_offsets(self):
+        # Offsets of the DLTMessages which match the filter (evaluated on the raw headers)
+        offsets = self.get_index().offsets
+        dlt_filter = self.__dlt_filter
+        if dlt_filter is None:
+            return offsets
+        if self.__filtered_offsets is None:
+            dlt_mmap = self._get_mmap()
+            self.__filtered_offsets = array(
+                "Q",
+                (offset for offset in offsets if dlt_filter.matches(dlt_mmap, offset)),
+            )
+        return self.__filtered_offsets
+
+    def _message_at(self, offset):
+        return DLTMessage(
+            memoryview(self._get_mmap()),
+            offset,
+            catalog=self.__catalog,
+            symbol_table=self.__symbol_table,
+        )
+
+    def _read_messages(self, workers=None):
+        compression = self.get_compression()
+        if compression is not None:
+            # Compressed DLT files are decompressed while they are read (never to disk),
+            # they can neither be memory-mapped nor split between worker processes
+            yield from self._read_messages_compressed(compression)
+            return
+
+        if self.__trace_cache is not None:
+            yield from self._read_messages_cached(workers)
+            return
+
+        if workers is not None and workers > 1:
+            yield from self._read_messages_parallel(workers)
+            return
+
+        if self.__use_mmap:
+            yield from self._read_messages_mmap()
+            return
+
+        with open(self.__dlt_file_path, "rb") as dlt_file_descriptor:
+            if not self._check_if_storage_file(dlt_file_descriptor):
+                raise TypeError(
+                    "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
+                )
+
+            catalog = self.__catalog
+            symbol_table = self.__symbol_table
+            for dlt_message_bytes in self._dlt_message_iterator(dlt_file_descriptor):
+                yield DLTMessage(
+                    dlt_message_bytes, catalog=catalog, symbol_table=symbol_table
+                )
+
+    def _read_messages_compressed(self, compression):
+        with DecompressingReader(
+            self.__dlt_file_path, compression
+        ) as dlt_file_descriptor:
+            if not self._check_if_storage_file(dlt_file_descriptor):
+                raise TypeError(
+                    "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
+                )
+
+            catalog = self.__catalog
+            symbol_table = self.__symbol_table
+            for dlt_message_bytes in self._dlt_message_iterator(dlt_file_descriptor):
+                yield DLTMessage(
+                    dlt_message_bytes, catalog=catalog, symbol_table=symbol_table
+                )
+
+    def _read_messages_mmap(self):
+        dlt_mmap = self._get_mmap()
+        framer = DLTMessageFramer()
+        self.__skipped_bytes = 0
+        # The DLTMessages decode directly from the page cache, no data is copied
+        dlt_file_view = memoryview(dlt_mmap)
+        dlt_filter = self.__dlt_filter
+        catalog = self.__catalog
+        symbol_table = self.__symbol_table
+        for message_start, _ in framer.frame(dlt_mmap):
+            if dlt_filter is None or dlt_filter.matches(dlt_mmap, message_start):
+                yield DLTMessage(
+                    dlt_file_view,
+                    message_start,
+                    catalog=catalog,
+                    symbol_table=symbol_table,
+                )
+        self.__skipped_bytes = framer.skipped_bytes
+
+    def _read_messages_parallel(self, workers):
+        # The workers decode the payloads, the DLTMessages reference the memory-map
+        parallel_decoder = ParallelDecoder(
+            self.__dlt_file_path,
+            workers,
+            dlt_filter=self.__dlt_filter,
+            catalog=self.__catalog,
+        )
+        self.__skipped_bytes = 0
+        yield from parallel_decoder.iter_messages(self._get_mmap(), self.__symbol_table)
+        self.__skipped_bytes = parallel_decoder.skipped_bytes
+
+    def _read_messages_cached(self, workers):
+        # Only offsets and payload arguments are cached, the headers are decoded lazily
+        # from the memory-map. The batches are streamed from and into the cache entry.
+        trace_cache = self.__trace_cache
+        dlt_mmap = self._get_mmap()
+        batches = trace_cache.load(self.__dlt_file_path, self.__catalog)
+        if batches is None:
+            # The unfiltered DLT file is cached, so the entry serves every filter
+            parallel_decoder = ParallelDecoder(
+                self.__dlt_file_path, max(workers or 1, 1), catalog=self.__catalog
+            )
+            batches = trace_cache.save(
+                self.__dlt_file_path,
+                parallel_decoder.iter_batches(dlt_mmap),
+                self.__catalog,
+            )
+        else:
+            logger.info(
+                "Reloading DLT File {} from the trace cache".format(
+                    self.__dlt_file_path
+                )
+            )
+
+        self.__skipped_bytes = 0
+        dlt_file_view = memoryview(dlt_mmap)
+        dlt_filter = self.__dlt_filter
+        symbol_table = self.__symbol_table
+        catalog = self.__catalog
+        for batch in batches:
+            yield from iter_batch_messages(
+                dlt_file_view, batch, dlt_filter, symbol_table, catalog
+            )
+            self.__skipped_bytes += batch[2]
+
+    def _get_mmap(self):
+        # The mapping is kept open, so repeated passes are served from the page cache
+        if self.__mmap is None:
+            self._check_random_access()
+            with open(self.__dlt_file_path, "rb") as dlt_file_descriptor:
+                if not self._check_if_storage_file(dlt_file_descriptor):
+                    raise TypeError(
+                        "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
+                    )
+                self.__mmap = mmap.mmap(
+                    dlt_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        return self.__mmap
+
+    def _check_random_access(self):
+        if self.get_compression() is not None:
+            raise TypeError(
+                "Compressed DLT file {} can only be read sequentially (decompress it for random access)".format(
+                    self.__dlt_file_path
+                )
+            )
+
+    def _check_follow_restart(self, dlt_file_descriptor):
+        """Returns a file descriptor to continue with if the followed file was truncated or rotated"""
+        try:
+            path_stat = os.stat(self.__dlt_file_path)
+        except FileNotFoundError:
+            # Rotation in progress, the new file is not yet created
+            return None
+        file_stat = os.fstat(dlt_file_descriptor.fileno())
+        if (path_stat.st_ino, path_stat.st_dev) != (file_stat.st_ino, file_stat.st_dev):
+            logger.info(
+                "DLT File {} was rotated, following the new file".format(
+                    self.__dlt_file_path
+                )
+            )
+            return open(self.__dlt_file_path, "rb")
+        if path_stat.st_size < dlt_file_descriptor.tell():
+            logger.info(
+                "DLT File {} was truncated, following it from its start".format(
+                    self.__dlt_file_path
+                )
+            )
+            return open(self.__dlt_file_path, "rb")
+        return None
 
     def _check_if_storage_file(self, dlt_file_descriptor):
-        # Read the first few bytes of the file and check if it starts with STORAGE_HEADER_DLT_PATTERN (DLT\x01)
-        file_start_pattern_hex = dlt_file_descriptor.read(
-            STORAGE_FILE_HEADER_BYTE_SIZE
-        ).hex()
-        # Reset the read-pointer
-        dlt_file_descriptor.seek(0)
-        return file_start_pattern_hex == DLT_STORAGE_HEADER_IDENTIFIER_HEX
-
-    def _hex_dlt_message_iterator(
-        self,
-        dlt_file_descriptor,
-        message_begin_marker=DLT_STORAGE_HEADER_IDENTIFIER_HEX,
-        block_size=READ_DLT_BLOCK_SIZE,
+        # Check if the file starts with STORAGE_HEADER_PATTERN (DLT\x01), peek does not
+        # move the read-pointer (decompressing readers cannot seek back)
+        file_start_pattern = dlt_file_descriptor.peek(STORAGE_FILE_HEADER_BYTE_SIZE)
+        return (
+            file_start_pattern[:STORAGE_FILE_HEADER_BYTE_SIZE] == STORAGE_HEADER_PATTERN
+        )
+
+    def _dlt_message_iterator(
+        self, dlt_file_descriptor, block_size=READ_DLT_BLOCK_SIZE
     ):
-        current = ""
+        framer = DLTMessageFramer()
+        dlt_filter = self.__dlt_filter
+        self.__skipped_bytes = 0
+        # Offset of current[0] in the file
+        current_offset = 0
+        current = b""
         while True:
-            hex_block = dlt_file_descriptor.read(block_size).hex()
-            if not hex_block:  # end-of-file
-                yield current
+            block = dlt_file_descriptor.read(block_size)
+            final = not block  # end-of-file
+            # Only the unconsumed rest (at most one incomplete message) is copied
+            current = current[framer.position :] + block
+            current_offset += framer.position
+            for message_start, message_end in framer.frame(
+                current, final=final, base_offset=current_offset
+            ):
+                if dlt_filter is None or dlt_filter.matches(current, message_start):
+                    yield current[message_start:message_end]
+            self.__skipped_bytes = framer.skipped_bytes
+            if final:
                 return
-            current += hex_block
-            while True:
-                markerpos = current.find(message_begin_marker)
-                if markerpos < 0:
-                    break
-                yield current[:markerpos]
-                current = current[markerpos + len(message_begin_marker) :]
\ No newline at end of file
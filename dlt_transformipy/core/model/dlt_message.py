@@ -19,36 +19,155 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from dlt_transformipy.core.model.storage_header import StorageHeader
+from dlt_transformipy.core.model.storage_header import (
+    StorageHeader,
+    STORAGE_HEADER_BYTE_SIZE,
+)
 from dlt_transformipy.core.model.standard_header import StandardHeader
-from dlt_transformipy.core.model.extended_header import ExtendedHeader
+from dlt_transformipy.core.model.extended_header import (
+    ExtendedHeader,
+    EXTENDED_HEADER_BYTE_SIZE,
+)
 from dlt_transformipy.core.model.payload import Payload
 
 
 class DLTMessage:
-    storage_header = None
-    standard_header = None
-    extended_header = None
-    payload = None
-
-    def __init__(self, dlt_message_hex):
-        # Always points to the starting byte of the next info to read from dlt_message_hex
-        start_byte_pointer = 0
-        # Read the storage-header
-        self.storage_header = StorageHeader(dlt_message_hex, start_byte_pointer)
-        # Update the start byte pointer (move it to the end of STORAGE_HEADER)
-        start_byte_pointer += self.storage_header.get_byte_size() * 2
-
-        # Read the standard-header
-        self.standard_header = StandardHeader(dlt_message_hex, start_byte_pointer)
-        # Update the start byte pointer (move it to the end of STANDARD_HEADER)
-        start_byte_pointer += self.standard_header.get_byte_size() * 2
+    """A storaged DLT message
 
+    Only the buffer and the offset of the message are kept, every header (and the payload)
+    is decoded the first time it is accessed.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "_start_byte_pointer",
+        "_payload_arguments",
+        "_catalog",
+        "_symbol_table",
+        "_storage_header",
+        "_standard_header",
+        "_extended_header",
+        "_payload",
+    )
+
+    def __init__(
+        self,
+        dlt_message_bytes,
+        start_byte_pointer=0,
+        payload_arguments=None,
+        catalog=None,
+        symbol_table=None,
+    ):
+        self._buffer = dlt_message_bytes
+        # Points to the start of the STORAGE_HEADER
+        self._start_byte_pointer = start_byte_pointer
+        # Arguments which were already decoded elsewhere (e.g. by a worker process)
+        self._payload_arguments = payload_arguments
+        # MessageCatalog to decode non-verbose payloads
+        self._catalog = catalog
+        # SymbolTable which interns the ECU/APP/CTX IDs (shared by the DLTMessages of a file)
+        self._symbol_table = symbol_table
+        self._storage_header = None
+        self._standard_header = None
+        self._extended_header = None
+        self._payload = None
+
+    @property
+    def storage_header(self):
+        if self._storage_header is None:
+            self._storage_header = StorageHeader(
+                self._buffer, self._start_byte_pointer, self._symbol_table
+            )
+        return self._storage_header
+
+    @property
+    def standard_header(self):
+        if self._standard_header is None:
+            self._standard_header = StandardHeader(
+                self._buffer,
+                self._start_byte_pointer + STORAGE_HEADER_BYTE_SIZE,
+                self._symbol_table,
+            )
+        return self._standard_header
+
+    @property
+    def extended_header(self):
         # Check if extended-header is used
-        if self.standard_header.header_type.use_extended_header:
-            self.extended_header = ExtendedHeader(dlt_message_hex, start_byte_pointer)
-            # Update the start byte pointer (move it to the end of EXTENDED_HEADER)
-            start_byte_pointer += self.extended_header.get_byte_size() * 2
+        if (
+            self._extended_header is None
+            and self.standard_header.header_type.use_extended_header
+        ):
+            self._extended_header = ExtendedHeader(
+                self._buffer,
+                self._start_byte_pointer
+                + STORAGE_HEADER_BYTE_SIZE
+                + self._standard_header.get_byte_size(),
+                self._symbol_table,
+            )
+        return self._extended_header
 
-        # Create the payload
-        self.payload = Payload(dlt_message_hex, start_byte_pointer, self)
+    @property
+    def payload(self):
+        if self._payload is None:
+            start_byte_pointer, end_byte_pointer = self.get_payload_range()
+            self._payload = Payload(
+                self._buffer,
+                start_byte_pointer,
+                end_byte_pointer,
+                self,
+                arguments=self._payload_arguments,
+                catalog=self._catalog,
+            )
+            self._payload_arguments = None
+        return self._payload
+
+    def get_payload_range(self):
+        """Returns the position of the payload in the buffer
+
+        :returns: (start, end) of the payload
+        :rtype: tuple
+        """
+        standard_header = self.standard_header
+        start_byte_pointer = self._start_byte_pointer + STORAGE_HEADER_BYTE_SIZE
+        # The length of the standard-header covers standard-header, extended-header and payload
+        end_byte_pointer = min(
+            start_byte_pointer + standard_header.length, len(self._buffer)
+        )
+        # Move the start byte pointer to the end of STANDARD_HEADER (and EXTENDED_HEADER)
+        start_byte_pointer += standard_header.get_byte_size()
+        if standard_header.header_type.use_extended_header:
+            start_byte_pointer += EXTENDED_HEADER_BYTE_SIZE
+        return start_byte_pointer, end_byte_pointer
+
+    def get_ids(self):
+        """Returns APID and CTID of the message
+
+        They are read from the extended header. Non-verbose messages without an
+        extended header get the APID and CTID of their message ID from the catalog.
+
+        :returns: (apid, ctid) or None if the message has no extended header and its
+            message ID is not in the catalog
+        :rtype: tuple
+        """
+        if self.standard_header.header_type.use_extended_header:
+            extended_header = self.extended_header
+            return extended_header.apid, extended_header.ctid
+        if self._catalog is None:
+            return None
+        start_byte_pointer, end_byte_pointer = self.get_payload_range()
+        entry = self._catalog.get_entry(
+            self._catalog.get_message_id(
+                self._buffer,
+                start_byte_pointer,
+                end_byte_pointer,
+                self._standard_header.header_type.most_significant_byte_first,
+            )
+        )
+        if entry is None:
+            return None
+        apid, ctid = entry[0], entry[1]
+        if self._symbol_table is not None:
+            # Shared instances of the IDs of the DLT file
+            apid = self._symbol_table.get_id(apid.encode("utf8"))
+            ctid = self._symbol_table.get_id(ctid.encode("utf8"))
+        return apid, ctid
@@ -19,7 +19,9 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from dlt_transformipy.core.helpers import isKthBitSet, hex_str_to_utf8, hex_str_to_uint8
+from struct import Struct
+
+from dlt_transformipy.core.helpers import isKthBitSet, bytes_to_utf8
 
 # EXTENDED HEADER BYTE SIZES
 EXTENDED_HEADER_MESSAGE_INFO_BYTE_SIZE = 1
@@ -32,38 +34,40 @@ EXTENDED_HEADER_BYTE_SIZE = (
     + EXTENDED_HEADER_APPLICATION_ID_BYTE_SIZE
     + EXTENDED_HEADER_CONTEXT_ID_BYTE_SIZE
 )
+# message_info (uint8), noar (uint8), apid (char[4]), ctid (char[4])
+EXTENDED_HEADER_STRUCT = Struct("BB4s4s")
 
 
 class ExtendedHeader:
-    message_info = None
-    noar = None
-    apid = None
-    ctid = None
-
-    def __init__(self, dlt_message_hex, start_byte_pointer):
-        extended_header_hex = dlt_message_hex[
-            start_byte_pointer : start_byte_pointer + EXTENDED_HEADER_BYTE_SIZE * 2
-        ]
-        self.message_info = ExtendedHeaderMessageInfo(extended_header_hex)
-        self.noar = self.__extract_number_of_arguments(extended_header_hex)
-        self.apid = self.__extract_application_id(extended_header_hex)
-        self.ctid = self.__extract_context_id(extended_header_hex)
+    __slots__ = (
+        "message_info",
+        "noar",
+        "apid",
+        "ctid",
+    )
 
-    def __extract_number_of_arguments(self, extended_header_hex):
+    def __init__(self, dlt_message_bytes, start_byte_pointer, symbol_table=None):
+        (
+            message_info_int,
+            noar,
+            apid_bytes,
+            ctid_bytes,
+        ) = EXTENDED_HEADER_STRUCT.unpack_from(dlt_message_bytes, start_byte_pointer)
+        # Shared instances, there are only 256 message infos
+        self.message_info = EXTENDED_HEADER_MESSAGE_INFOS[message_info_int]
         # In non-verbose mode, args shall be "0" according to Autosar spec
-        return (
-            hex_str_to_uint8(extended_header_hex[2:4], big_endian=True)
-            if self.message_info.verbose
-            else 0
-        )
-
-    @staticmethod
-    def __extract_application_id(extended_header_hex):
-        return hex_str_to_utf8(extended_header_hex[4:12], errors="ignore").rstrip("\0")
+        self.noar = noar if self.message_info.verbose else 0
+        if symbol_table is None:
+            self.apid = self.__extract_id(apid_bytes)
+            self.ctid = self.__extract_id(ctid_bytes)
+        else:
+            # Shared instances of the IDs of the DLT file
+            self.apid = symbol_table.get_id(apid_bytes)
+            self.ctid = symbol_table.get_id(ctid_bytes)
 
     @staticmethod
-    def __extract_context_id(extended_header_hex):
-        return hex_str_to_utf8(extended_header_hex[12:20], errors="ignore").rstrip("\0")
+    def __extract_id(id_bytes):
+        return bytes_to_utf8(id_bytes, errors="ignore").rstrip("\0")
 
     ###
     # Getters
@@ -74,15 +78,13 @@ class ExtendedHeader:
 
 
 class ExtendedHeaderMessageInfo:
-    verbose = False
-    message_type = None
-    message_type_info = None
-
-    def __init__(self, extended_header_hex):
-        extended_header_message_info_int = hex_str_to_uint8(
-            extended_header_hex[:2], big_endian=True
-        )
+    __slots__ = (
+        "verbose",
+        "message_type",
+        "message_type_info",
+    )
 
+    def __init__(self, extended_header_message_info_int):
         self.verbose = self.__extract_verbose(extended_header_message_info_int)
         self.message_type = self.__extract_message_type(
             extended_header_message_info_int
@@ -102,3 +104,9 @@ class ExtendedHeaderMessageInfo:
     @staticmethod
     def __extract_message_type_info(extended_header_message_info_int):
         return extended_header_message_info_int & 0b11110000
+
+
+# One ExtendedHeaderMessageInfo per possible message_info byte
+EXTENDED_HEADER_MESSAGE_INFOS = tuple(
+    ExtendedHeaderMessageInfo(message_info_int) for message_info_int in range(256)
+)
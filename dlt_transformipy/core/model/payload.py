@@ -19,28 +19,25 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import logging
+import struct
+from functools import lru_cache
+
 from dlt_transformipy import logger
 
 from dlt_transformipy.core.helpers import (
-    hex_str_to_ascii,
-    hex_str_to_utf8,
-    hex_str_to_int32,
-    hex_str_to_uint32,
-    hex_str_to_int8,
-    hex_str_to_uint8,
-    hex_str_to_uint16,
-    hex_str_to_int16,
-    hex_str_to_int64,
-    hex_str_to_uint64,
+    bytes_to_ascii,
+    bytes_to_utf8,
+    bytes_to_uint32,
 )
 
 # BYTE SIZES
 PAYLOAD_TYPE_INFO_BYTE_SIZE = 4
 PAYLOAD_RAWD_LENGTH_BYTE_SIZE = 2
 PAYLOAD_STRG_LENGTH_BYTE_SIZE = 2
-TYPE_INFO_BYTE_SIZE_HEX = PAYLOAD_TYPE_INFO_BYTE_SIZE * 2
-RAWD_LENGTH_HEX = PAYLOAD_RAWD_LENGTH_BYTE_SIZE * 2
-STRG_LENGTH_HEX = PAYLOAD_STRG_LENGTH_BYTE_SIZE * 2
+# CACHE SIZES
+ARGUMENT_DECODER_CACHE_SIZE = 1024
+SIGNATURE_DECODER_CACHE_SIZE = 4096
 # BITMASKS
 TYPE_INFO_TYLE_BITMASK = 0b1111
 TYPE_INFO_TYLE_8BIT_BITMASK = 0b1
@@ -64,18 +61,46 @@ TYPE_INFO_SCOD_ASCII_BITMASK = 0b000
 TYPE_INFO_SCOD_UTF8_BITMASK = 0b001
 
 
+class RawData(str):
+    """Raw data (RAWD argument or undecoded payload), represented by its hex string"""
+
+    __slots__ = ()
+
+    def to_bytes(self):
+        """Returns the raw data
+        :rtype: bytes
+        """
+        return bytes.fromhex(self)
+
+
 class Payload:
     # List like access to arguments
 
-    _payload_encoded = None
-    _arguments = None
-    _decodable = False  # only verbose-mode is supported at the moment
-    _big_endian = False
-    _noar = 0
-    _index = 0
+    __slots__ = (
+        "_buffer",
+        "_start",
+        "_end",
+        "_arguments",
+        "_decodable",  # only verbose-mode is supported at the moment
+        "_big_endian",
+        "_noar",
+        "_ids",
+        "_catalog",
+        "_index",
+    )
 
-    def __init__(self, dlt_message_hex, start_byte_pointer, message):
-        self._payload_encoded = dlt_message_hex[start_byte_pointer:]
+    def __init__(
+        self,
+        dlt_message_bytes,
+        start_byte_pointer,
+        end_byte_pointer,
+        message,
+        arguments=None,
+        catalog=None,
+    ):
+        self._buffer = dlt_message_bytes
+        self._start = start_byte_pointer
+        self._end = end_byte_pointer
         self._noar = (
             message.extended_header.noar
             if message.standard_header.header_type.use_extended_header
@@ -84,25 +109,37 @@ class Payload:
         self._big_endian = (
             message.standard_header.header_type.most_significant_byte_first
         )
+        self._decodable = False
+        self._ids = None
+        # Message descriptions to decode non-verbose payloads
+        self._catalog = catalog
         if message.standard_header.header_type.use_extended_header:
+            self._ids = (message.extended_header.apid, message.extended_header.ctid)
             self._decodable = message.extended_header.message_info.verbose
-            if not self._decodable:
+            if (
+                not self._decodable
+                and catalog is None
+                and logger.isEnabledFor(logging.DEBUG)
+            ):
                 logger.debug(
                     "Payload of message '{}' is not decodeable yet.".format(
-                        dlt_message_hex
+                        self.get_payload_hex()
                     )
                 )
         self._index = 0
+        # Arguments which were already decoded elsewhere (e.g. by a worker process)
+        self._arguments = arguments
 
     def __getitem__(self, index):
         """Accessing the payload item as a list"""
-        if index < 0 or index > self._noar:
-            return IndexError()
-
         # Check if already parsed
         if self._arguments is None:
             self._parse_payload()
 
+        # Non-verbose payloads decoded by a catalog have more arguments than noar
+        if index < 0 or index > max(self._noar, len(self._arguments) - 1):
+            return IndexError()
+
         return self._arguments[index]
 
     def __len__(self):
@@ -113,9 +150,9 @@ class Payload:
         return len(self._arguments)
 
     def __iter__(self):
-        """ Returns the Iterator object """
+        """Returns an Iterator over the arguments"""
         self._parse_payload()
-        return self
+        return iter(self._arguments)
 
     def __next__(self):
         """'Returns the argument """
@@ -128,182 +165,360 @@ class Payload:
         # End of Iteration
         raise StopIteration
 
+    def get_payload_hex(self):
+        """Returns the encoded payload as hex string"""
+        return self._buffer[self._start : self._end].hex()
+
     def _parse_payload(self):
         """Parse the payload into list of arguments"""
         if self._arguments is None:
-            self._arguments = list()
-            if self._decodable:
-                offset = 0
-
-                for _ in range(self._noar):
-                    # Extract TYPE_INFO from Payload
-                    type_info_int = hex_str_to_uint32(
-                        self._payload_encoded[
-                            offset : offset + TYPE_INFO_BYTE_SIZE_HEX
-                        ],
-                        big_endian=self._big_endian,
+            if not self._decodable:
+                if self._catalog is not None:
+                    self._arguments = self._catalog.decode(
+                        self._buffer, self._start, self._end, self._big_endian
+                    )
+                    if self._arguments is not None:
+                        return
+                # If it's not decodable (non-verbose mode), then the encoded payload should be returned
+                self._arguments = [RawData(self.get_payload_hex())]
+                return
+            if self._noar == 0:
+                self._arguments = list()
+                return
+
+            # The decoders must not read behind the payload (e.g. into the next message
+            # of a memory-mapped DLT file), they raise struct.error instead
+            buffer = memoryview(self._buffer)[: self._end]
+            try:
+                self._parse_verbose_payload(buffer)
+            except struct.error:
+                logger.warning(
+                    "Arguments exceed the payload | payload: {}".format(
+                        self.get_payload_hex()
                     )
+                )
+                # Like non-verbose payloads, the encoded payload is returned
+                self._arguments = [RawData(self.get_payload_hex())]
 
-                    # Add size of TYPE_INFO to offset
-                    offset += TYPE_INFO_BYTE_SIZE_HEX
+    def _parse_verbose_payload(self, buffer):
+        """Decodes the arguments of a verbose payload into self._arguments
 
-                    value = None
+        :param memoryview buffer: Buffer which ends with the payload
+        """
+        # Fast path: decode the whole signature last seen for this log statement
+        signature_key = (
+            self._ids,
+            self._noar,
+            bytes_to_uint32(buffer, self._start, self._big_endian),
+            self._big_endian,
+        )
+        signature_decoder = _SIGNATURE_DECODERS.get(signature_key)
+        if signature_decoder is not None:
+            try:
+                arguments = signature_decoder(buffer, self._start)
+            except struct.error:
+                arguments = None
+            if arguments is not None:
+                self._arguments = arguments
+                return
 
-                    if (
-                        type_info_int & TYPE_INFO_VARI_BITMASK
-                    ):  # VARI --> Not yet supported!
-                        self._arguments.append(
-                            "[Unsupported type: VARI | payload: {}]".format(
-                                self._payload_encoded
-                            )
-                        )
-                        logger.warning(
-                            "[Unsupported type: VARI | payload: {}]".format(
-                                self._payload_encoded
-                            )
-                        )
-                        break  # IF VARI, DO NOT TRY TO PARSE THIS ARGUMENT FURTHER
-
-                    if type_info_int & TYPE_INFO_BOOL_BITMASK:  # BOOL
-                        # DLT Spec: BOOL shall always be 8 bit, no further checks here
-                        value = (
-                            hex_str_to_uint8(
-                                self._payload_encoded[offset : offset + 2],
-                                big_endian=self._big_endian,
-                            )
-                            > 0
-                        )
-                        offset += 2
-                    elif type_info_int & TYPE_INFO_RAW_BITMASK:  # RAWD
-                        # Extract the length of the actual payload (length without TYPE_INFO)
-                        raw_length_bytes = (
-                            hex_str_to_uint16(
-                                self._payload_encoded[
-                                    offset : offset + RAWD_LENGTH_HEX
-                                ],
-                                big_endian=self._big_endian,
-                            )
-                            * 2
+        self._arguments = list()
+        signature = self._parse_arguments(buffer)
+        if signature is not None:
+            if len(_SIGNATURE_DECODERS) >= SIGNATURE_DECODER_CACHE_SIZE:
+                _SIGNATURE_DECODERS.clear()
+            _SIGNATURE_DECODERS[signature_key] = compile_signature_decoder(
+                signature, self._big_endian
+            )
+
+    def _parse_arguments(self, buffer):
+        """Decodes the arguments one by one into self._arguments
+
+        :param memoryview buffer: Buffer which ends with the payload
+        :returns: The signature (TYPE_INFOs) of the payload or None if it could not be
+            decoded completely
+        :rtype: tuple
+        """
+        big_endian = self._big_endian
+        offset = self._start
+        signature = list()
+
+        for _ in range(self._noar):
+            # Extract TYPE_INFO from Payload
+            type_info_int = bytes_to_uint32(buffer, offset, big_endian=big_endian)
+            # Add size of TYPE_INFO to offset
+            offset += PAYLOAD_TYPE_INFO_BYTE_SIZE
+
+            decoder = compile_argument_decoder(type_info_int, big_endian)
+            if decoder is None:
+                unsupported_type = get_unsupported_type(type_info_int)
+                if unsupported_type == "VARI":
+                    # IF VARI, DO NOT TRY TO PARSE THIS ARGUMENT FURTHER
+                    self._arguments.append(
+                        "[Unsupported type: VARI | payload: {}]".format(
+                            self.get_payload_hex()
                         )
-                        offset += RAWD_LENGTH_HEX
-                        # Get the RAWD value from the payload
-                        value = self._payload_encoded[
-                            offset : offset + raw_length_bytes
-                        ]
-                        offset += raw_length_bytes
-                    elif type_info_int & TYPE_INFO_STRG_BITMASK:  # STRG
-
-                        def get_scod(type_info):
-                            """Helper function"""
-                            return type_info & TYPE_INFO_SCOD_BITMASK
-
-                        # Extract the length of the actual payload (length without TYPE_INFO)
-                        strg_length_bytes = (
-                            hex_str_to_uint16(
-                                self._payload_encoded[
-                                    offset : offset + STRG_LENGTH_HEX
-                                ],
-                                big_endian=self._big_endian,
-                            )
-                            * 2
+                    )
+                    logger.warning(
+                        "[Unsupported type: VARI | payload: {}]".format(
+                            self.get_payload_hex()
                         )
-                        offset += STRG_LENGTH_HEX
-                        # Get the STRG value from the payload
-                        value = (
-                            hex_str_to_ascii(
-                                self._payload_encoded[
-                                    offset : offset + strg_length_bytes
-                                ]
-                            )
-                            if get_scod(type_info_int) == TYPE_INFO_SCOD_ASCII_BITMASK
-                            else hex_str_to_utf8(
-                                self._payload_encoded[
-                                    offset : offset + strg_length_bytes
-                                ]
-                            )
-                        )  # "-2" to strip the \x00 at the end
-                        offset += strg_length_bytes
-                    elif type_info_int & TYPE_INFO_UINT_BITMASK:  # UINT
-                        tyle = type_info_int & TYPE_INFO_TYLE_BITMASK
-                        if tyle == TYPE_INFO_TYLE_8BIT_BITMASK:
-                            value = hex_str_to_uint8(
-                                self._payload_encoded[offset : offset + 2],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 2
-                        elif tyle == TYPE_INFO_TYLE_16BIT_BITMASK:
-                            value = hex_str_to_uint16(
-                                self._payload_encoded[offset : offset + 4],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 4
-                        elif tyle == TYPE_INFO_TYLE_32BIT_BITMASK:
-                            value = hex_str_to_uint32(
-                                self._payload_encoded[offset : offset + 8],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 8
-                        elif tyle == TYPE_INFO_TYLE_64BIT_BITMASK:
-                            value = hex_str_to_uint64(
-                                self._payload_encoded[offset : offset + 16],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 16
-                        elif tyle == TYPE_INFO_TYLE_128BIT_BITMASK:
-                            raise ValueError("reading 128-bit values not supported")
-                    elif type_info_int & TYPE_INFO_SINT_BITMASK:  # SINT
-                        tyle = type_info_int & TYPE_INFO_TYLE_BITMASK
-                        if tyle == TYPE_INFO_TYLE_8BIT_BITMASK:
-                            value = hex_str_to_int8(
-                                self._payload_encoded[offset : offset + 2],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 2
-                        elif tyle == TYPE_INFO_TYLE_16BIT_BITMASK:
-                            value = hex_str_to_int16(
-                                self._payload_encoded[offset : offset + 4],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 4
-                        elif tyle == TYPE_INFO_TYLE_32BIT_BITMASK:
-                            value = hex_str_to_int32(
-                                self._payload_encoded[offset : offset + 8],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 8
-                        elif tyle == TYPE_INFO_TYLE_64BIT_BITMASK:
-                            value = hex_str_to_int64(
-                                self._payload_encoded[offset : offset + 16],
-                                big_endian=self._big_endian,
-                            )
-                            offset += 16
-                        elif tyle == TYPE_INFO_TYLE_128BIT_BITMASK:
-                            raise ValueError("reading 128-bit values not supported")
-                    else:
-                        unsupported_type = None
-
-                        if type_info_int & TYPE_INFO_FLOAT_BITMASK:  # FLOA
-                            unsupported_type = "FLOAT"
-                        elif type_info_int & TYPE_INFO_ARRAY_BITMASK:  # ARAY
-                            unsupported_type = "ARAY"
-                        elif type_info_int & TYPE_INFO_FIXP_BITMASK:  # FIXP
-                            unsupported_type = "FIXP"
-                        elif type_info_int & TYPE_INFO_VARI_BITMASK:  # VARI
-                            unsupported_type = "VARI"
-                        elif type_info_int & TYPE_INFO_TRAI_BITMASK:  # TRAI
-                            unsupported_type = "TRAI"
-                        elif type_info_int & TYPE_INFO_STRU_BITMASK:  # STRU
-                            unsupported_type = "STRU"
-
-                        logger.warning(
-                            "Unsupported type {} | payload: {}".format(
-                                unsupported_type, self._payload_encoded
-                            )
+                    )
+                else:
+                    logger.warning(
+                        "Unsupported type {} | payload: {}".format(
+                            unsupported_type, self.get_payload_hex()
                         )
-                        break
+                    )
+                return None
 
-                    # Add the parsed value to list of arguments
-                    self._arguments.append(value)
-            else:
-                # If it's not decodable (non-verbose mode), then the encoded payload should be returned
-                self._arguments.append(self._payload_encoded)
\ No newline at end of file
+            value, offset = decoder(buffer, offset)
+            # Add the parsed value to list of arguments
+            self._arguments.append(value)
+            signature.append(type_info_int)
+
+        return tuple(signature)
+
+
+# Signature decoders last seen per (APID/CTID, noar, first TYPE_INFO, endianness)
+_SIGNATURE_DECODERS = dict()
+
+
+def get_unsupported_type(type_info):
+    """Returns the name of the type which cannot be decoded (yet)
+
+    :param int type_info: TYPE_INFO of the argument
+    :rtype: str
+    """
+    if type_info & TYPE_INFO_VARI_BITMASK:
+        return "VARI"
+    if type_info & TYPE_INFO_FLOAT_BITMASK:
+        return "FLOAT"
+    if type_info & TYPE_INFO_ARRAY_BITMASK:
+        return "ARAY"
+    if type_info & TYPE_INFO_FIXP_BITMASK:
+        return "FIXP"
+    if type_info & TYPE_INFO_TRAI_BITMASK:
+        return "TRAI"
+    if type_info & TYPE_INFO_STRU_BITMASK:
+        return "STRU"
+    return None
+
+
+def _get_argument_layout(type_info):
+    """Classifies a TYPE_INFO
+
+    :returns: ("fixed", struct format), ("variable", converter), ("none", None) for
+        integers without a valid length, ("int128", None) or None if unsupported
+    :rtype: tuple
+    """
+    if type_info & TYPE_INFO_VARI_BITMASK:
+        return None
+    if type_info & TYPE_INFO_BOOL_BITMASK:
+        # DLT Spec: BOOL shall always be 8 bit, no further checks here
+        return ("fixed", "?")
+    if type_info & TYPE_INFO_RAW_BITMASK:
+        return ("variable", _raw_to_hex)
+    if type_info & TYPE_INFO_STRG_BITMASK:
+        if type_info & TYPE_INFO_SCOD_BITMASK == TYPE_INFO_SCOD_ASCII_BITMASK:
+            return ("variable", bytes_to_ascii)
+        return ("variable", bytes_to_utf8)
+    if type_info & (TYPE_INFO_UINT_BITMASK | TYPE_INFO_SINT_BITMASK):
+        tyle = type_info & TYPE_INFO_TYLE_BITMASK
+        if tyle == TYPE_INFO_TYLE_128BIT_BITMASK:
+            return ("int128", None)
+        formats = _UINT_FORMATS if type_info & TYPE_INFO_UINT_BITMASK else _SINT_FORMATS
+        if tyle in formats:
+            return ("fixed", formats[tyle])
+        return ("none", None)
+    return None
+
+
+_UINT_FORMATS = {
+    TYPE_INFO_TYLE_8BIT_BITMASK: "B",
+    TYPE_INFO_TYLE_16BIT_BITMASK: "H",
+    TYPE_INFO_TYLE_32BIT_BITMASK: "I",
+    TYPE_INFO_TYLE_64BIT_BITMASK: "Q",
+}
+_SINT_FORMATS = {
+    TYPE_INFO_TYLE_8BIT_BITMASK: "b",
+    TYPE_INFO_TYLE_16BIT_BITMASK: "h",
+    TYPE_INFO_TYLE_32BIT_BITMASK: "i",
+    TYPE_INFO_TYLE_64BIT_BITMASK: "q",
+}
+
+
+def _check_length(buffer, offset, length):
+    # Slicing would silently truncate a length which exceeds the buffer
+    if offset + length > len(buffer):
+        raise struct.error(
+            "argument of {} bytes exceeds the buffer of {} bytes".format(
+                length, len(buffer) - offset
+            )
+        )
+
+
+def _raw_to_hex(data):
+    return RawData(data.hex())
+
+
+def _raise_int128(buffer, offset):
+    raise ValueError("reading 128-bit values not supported")
+
+
+def _decode_nothing(buffer, offset):
+    return None, offset
+
+
+@lru_cache(maxsize=ARGUMENT_DECODER_CACHE_SIZE)
+def compile_argument_decoder(type_info, big_endian):
+    """Compiles the decoder of a single argument (without its TYPE_INFO)
+
+    :param int type_info: TYPE_INFO of the argument
+    :param bool big_endian: Byte order of the payload
+    :returns: Function (buffer, offset) -> (value, next offset) or None if the type is
+        not supported
+    :rtype: function
+    """
+    layout = _get_argument_layout(type_info)
+    if layout is None:
+        return None
+    kind, detail = layout
+    endian = ">" if big_endian else "<"
+    if kind == "int128":
+        return _raise_int128
+    if kind == "none":
+        return _decode_nothing
+    if kind == "fixed":
+        value_struct = struct.Struct(endian + detail)
+        unpack_from = value_struct.unpack_from
+        size = value_struct.size
+
+        def decode_fixed(buffer, offset):
+            return unpack_from(buffer, offset)[0], offset + size
+
+        return decode_fixed
+
+    unpack_length = struct.Struct(endian + "H").unpack_from
+    convert = detail
+
+    def decode_variable(buffer, offset):
+        # Extract the length of the actual payload (length without TYPE_INFO)
+        length = unpack_length(buffer, offset)[0]
+        offset += PAYLOAD_STRG_LENGTH_BYTE_SIZE
+        _check_length(buffer, offset, length)
+        return convert(buffer[offset : offset + length]), offset + length
+
+    return decode_variable
+
+
+@lru_cache(maxsize=SIGNATURE_DECODER_CACHE_SIZE)
+def compile_signature_decoder(signature, big_endian, with_type_info=True):
+    """Compiles a whole argument signature into one decoder
+
+    Consecutive fixed size arguments are unpacked with one struct (TYPE_INFOs included),
+    the decoded TYPE_INFOs are verified against the signature.
+
+    :param tuple signature: TYPE_INFOs of all arguments
+    :param bool big_endian: Byte order of the payload
+    :param bool with_type_info: False for non-verbose payloads, which only contain the
+        argument data
+    :returns: Function (buffer, offset) -> list of arguments or None if the payload does
+        not match the signature, None if the signature cannot be fused
+    :rtype: function
+    """
+    endian = ">" if big_endian else "<"
+    type_info_format = "I" if with_type_info else ""
+    steps = list()
+    fixed_format = ""
+    fixed_type_infos = list()
+
+    def flush_fixed():
+        if fixed_type_infos:
+            steps.append(
+                _fixed_step(
+                    struct.Struct(endian + fixed_format),
+                    tuple(fixed_type_infos) if with_type_info else None,
+                )
+            )
+
+    for type_info in signature:
+        layout = _get_argument_layout(type_info)
+        if layout is None or layout[0] not in ("fixed", "variable"):
+            return None
+        kind, detail = layout
+        if kind == "fixed":
+            fixed_format += type_info_format + detail
+            fixed_type_infos.append(type_info)
+        else:
+            flush_fixed()
+            fixed_format = ""
+            fixed_type_infos = list()
+            steps.append(
+                _variable_step(
+                    struct.Struct(endian + type_info_format + "H"),
+                    type_info if with_type_info else None,
+                    detail,
+                )
+            )
+    flush_fixed()
+    steps = tuple(steps)
+
+    def decode_signature(buffer, offset):
+        arguments = list()
+        for step in steps:
+            offset = step(buffer, offset, arguments)
+            if offset < 0:
+                return None
+        return arguments
+
+    return decode_signature
+
+
+def _fixed_step(fixed_struct, type_infos):
+    unpack_from = fixed_struct.unpack_from
+    size = fixed_struct.size
+
+    if type_infos is None:
+
+        def step(buffer, offset, arguments):
+            arguments.extend(unpack_from(buffer, offset))
+            return offset + size
+
+        return step
+
+    def step_with_type_infos(buffer, offset, arguments):
+        values = unpack_from(buffer, offset)
+        if values[0::2] != type_infos:
+            return -1
+        arguments.extend(values[1::2])
+        return offset + size
+
+    return step_with_type_infos
+
+
+def _variable_step(header_struct, type_info, convert):
+    unpack_from = header_struct.unpack_from
+    header_size = header_struct.size
+
+    if type_info is None:
+
+        def step(buffer, offset, arguments):
+            length = unpack_from(buffer, offset)[0]
+            offset += header_size
+            _check_length(buffer, offset, length)
+            arguments.append(convert(buffer[offset : offset + length]))
+            return offset + length
+
+        return step
+
+    def step_with_type_info(buffer, offset, arguments):
+        decoded_type_info, length = unpack_from(buffer, offset)
+        if decoded_type_info != type_info:
+            return -1
+        offset += header_size
+        _check_length(buffer, offset, length)
+        arguments.append(convert(buffer[offset : offset + length]))
+        return offset + length
+
+    return step_with_type_info
@@ -19,21 +19,9 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from dlt_transformipy import logger
-
-from dlt_transformipy.core.helpers import (
-    isKthBitSet,
-    hex_str_to_ascii,
-    hex_str_to_utf8,
-    hex_str_to_int32,
-    hex_str_to_uint32,
-    hex_str_to_int8,
-    hex_str_to_uint8,
-    hex_str_to_uint16,
-    hex_str_to_int16,
-    hex_str_to_int64,
-    hex_str_to_uint64,
-)
+from struct import Struct
+
+from dlt_transformipy.core.helpers import isKthBitSet, bytes_to_utf8
 
 # BYTE SIZES
 STANDARD_HEADER_HEADER_TYPE_BYTE_SIZE = 1
@@ -50,133 +38,114 @@ STANDARD_HEADER_BYTE_SIZE = (
     + STANDARD_HEADER_SESSION_ID_BYTE_SIZE
     + STANDARD_HEADER_TIMESTAMP_BYTE_SIZE
 )
+STANDARD_HEADER_MANDATORY_BYTE_SIZE = (
+    STANDARD_HEADER_HEADER_TYPE_BYTE_SIZE
+    + STANDARD_HEADER_MESSAGE_COUNTER_BYTE_SIZE
+    + STANDARD_HEADER_LENGTH_BYTE_SIZE
+)
+# STRUCTS (the standard header is always big endian)
+# header_type (uint8), message_counter (uint8), length (uint16)
+STANDARD_HEADER_MANDATORY_STRUCT = Struct(">BBH")
+STANDARD_HEADER_ECU_ID_STRUCT = Struct("4s")
+STANDARD_HEADER_SESSION_ID_STRUCT = Struct(">I")
+STANDARD_HEADER_TIMESTAMP_STRUCT = Struct(">i")
 
 
 class StandardHeader():
-    header_type = None
-    message_counter = 0
-    length = 0
-    ecu_id = None
-    session_id = None
-    timestamp = None
-
-    def __init__(self, dlt_message_hex, start_byte_pointer):
-        standard_header_hex = dlt_message_hex[
-            start_byte_pointer : start_byte_pointer + STANDARD_HEADER_BYTE_SIZE * 2
-        ]
-
-        # StandardHeader.header_type
-        self.header_type = StandardHeaderType(standard_header_hex)
-        # StandardHeader.message_counter
-        self.message_counter = self.__extract_message_counter(standard_header_hex)
-        # StandardHeader.length
-        self.length = self.__extract_length(standard_header_hex)
-
-        optional_header_dynamic_byte_offset = 4  # Start offset of ecu_id
+    __slots__ = (
+        "header_type",
+        "message_counter",
+        "length",
+        "ecu_id",
+        "session_id",
+        "timestamp",
+    )
+
+    def __init__(self, dlt_message_bytes, start_byte_pointer, symbol_table=None):
+        (
+            header_type_int,
+            self.message_counter,
+            self.length,
+        ) = STANDARD_HEADER_MANDATORY_STRUCT.unpack_from(
+            dlt_message_bytes, start_byte_pointer
+        )
+
+        # StandardHeader.header_type (shared instances, there are only 256 header types)
+        self.header_type = STANDARD_HEADER_TYPES[header_type_int]
+        self.ecu_id = None
+        self.session_id = None
+        self.timestamp = None
+
+        # Start offset of ecu_id
+        optional_header_dynamic_byte_offset = (
+            start_byte_pointer + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+        )
         # StandardHeader.ecu_id
         if self.header_type.with_ecu_id:
-            self.ecu_id = self.__extract_ecu_id(
-                standard_header_hex, optional_header_dynamic_byte_offset
-            )
+            ecu_id_bytes = STANDARD_HEADER_ECU_ID_STRUCT.unpack_from(
+                dlt_message_bytes, optional_header_dynamic_byte_offset
+            )[0]
+            if symbol_table is None:
+                self.ecu_id = bytes_to_utf8(ecu_id_bytes).rstrip("\0")
+            else:
+                self.ecu_id = symbol_table.get_id(ecu_id_bytes)
             optional_header_dynamic_byte_offset += STANDARD_HEADER_ECU_ID_BYTE_SIZE
         # StandardHeader.session_id
         if self.header_type.with_session_id:
-            self.session_id = self.__extract_session_id(
-                standard_header_hex, optional_header_dynamic_byte_offset
-            )
+            self.session_id = STANDARD_HEADER_SESSION_ID_STRUCT.unpack_from(
+                dlt_message_bytes, optional_header_dynamic_byte_offset
+            )[0]
             optional_header_dynamic_byte_offset += STANDARD_HEADER_SESSION_ID_BYTE_SIZE
         # StandardHeader.timestamp
         if self.header_type.with_timestamp:
-            self.timestamp = self.__extract_timestamp(
-                standard_header_hex, optional_header_dynamic_byte_offset
-            )
-
-    def __extract_message_counter(self, standard_header_hex):
-        return hex_str_to_uint8(standard_header_hex[2:4])
-
-    def __extract_length(self, standard_header_hex):
-        return hex_str_to_uint16(standard_header_hex[4:8], big_endian=True)
-
-    def __extract_ecu_id(
-        self, standard_header_hex, optional_header_dynamic_byte_offset
-    ):
-        return hex_str_to_utf8(
-            standard_header_hex[
-                optional_header_dynamic_byte_offset
-                * 2 : (
-                    optional_header_dynamic_byte_offset
-                    + STANDARD_HEADER_ECU_ID_BYTE_SIZE
-                )
-                * 2
-            ],
-            errors="ignore",
-        )
+            self.timestamp = STANDARD_HEADER_TIMESTAMP_STRUCT.unpack_from(
+                dlt_message_bytes, optional_header_dynamic_byte_offset
+            )[0]
 
-    def __extract_session_id(
-        self, standard_header_hex, optional_header_dynamic_byte_offset
-    ):
-        return hex_str_to_uint32(
-            standard_header_hex[
-                optional_header_dynamic_byte_offset
-                * 2 : (
-                    optional_header_dynamic_byte_offset
-                    + STANDARD_HEADER_SESSION_ID_BYTE_SIZE
-                )
-                * 2
-            ],
-            big_endian=True,
-        )
+    ###
+    # Getters
+    ###
+    def get_byte_size(self):
+        return self.header_type.get_standard_header_byte_size()
 
-    def __extract_timestamp(
-        self, standard_header_hex, optional_header_dynamic_byte_offset
-    ):
-        return hex_str_to_int32(
-            standard_header_hex[
-                optional_header_dynamic_byte_offset
-                * 2 : (
-                    optional_header_dynamic_byte_offset
-                    + STANDARD_HEADER_TIMESTAMP_BYTE_SIZE
-                )
-                * 2
-            ],
-            big_endian=True,
-        )
+
+class StandardHeaderType():
+    __slots__ = (
+        "use_extended_header",
+        "most_significant_byte_first",
+        "with_ecu_id",
+        "with_session_id",
+        "with_timestamp",
+        "version_number",
+    )
+
+    def __init__(self, header_type_int):
+        self.use_extended_header = isKthBitSet(header_type_int, 0)
+        self.most_significant_byte_first = isKthBitSet(header_type_int, 1)
+        self.with_ecu_id = isKthBitSet(header_type_int, 2)
+        self.with_session_id = isKthBitSet(header_type_int, 3)
+        self.with_timestamp = isKthBitSet(header_type_int, 4)
+        self.version_number = header_type_int & 0b11100000
 
     ###
     # Getters
     ###
-    def get_byte_size(self):
+    def get_standard_header_byte_size(self):
         standard_header_dynamic_byte_size = STANDARD_HEADER_BYTE_SIZE
 
-        if not self.header_type.with_ecu_id:
+        if not self.with_ecu_id:
             standard_header_dynamic_byte_size -= STANDARD_HEADER_ECU_ID_BYTE_SIZE
 
-        if not self.header_type.with_session_id:
+        if not self.with_session_id:
             standard_header_dynamic_byte_size -= STANDARD_HEADER_SESSION_ID_BYTE_SIZE
 
-        if not self.header_type.with_timestamp:
+        if not self.with_timestamp:
             standard_header_dynamic_byte_size -= STANDARD_HEADER_TIMESTAMP_BYTE_SIZE
 
         return standard_header_dynamic_byte_size
 
 
-class StandardHeaderType():
-    use_extended_header = False
-    most_significant_byte_first = False
-    with_ecu_id = False
-    with_session_id = False
-    with_timestamp = False
-    version_number = None
-
-    def __init__(self, standard_header_hex):
-        standard_header_type_hex = standard_header_hex[
-            : STANDARD_HEADER_HEADER_TYPE_BYTE_SIZE * 2
-        ]
-        header_type_int = hex_str_to_uint8(standard_header_type_hex)
-
-        self.use_extended_header = isKthBitSet(header_type_int, 0)
-        self.most_significant_byte_first = isKthBitSet(header_type_int, 1)
-        self.with_ecu_id = isKthBitSet(header_type_int, 2)
-        self.with_session_id = isKthBitSet(header_type_int, 3)
-        self.with_timestamp = isKthBitSet(header_type_int, 4)
-        self.version_number = header_type_int & 0b11100000
\ No newline at end of file
+# One StandardHeaderType per possible header_type byte
+STANDARD_HEADER_TYPES = tuple(
+    StandardHeaderType(header_type_int) for header_type_int in range(256)
+)
@@ -19,48 +19,51 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import logging
+from struct import Struct
 
-from dlt_transformipy.core.helpers import (
-    hex_str_to_utf8,
-    hex_str_to_int32,
-    hex_str_to_uint32,
-)
+from dlt_transformipy.core.helpers import bytes_to_utf8
 
 # STORAGE HEADER BYTE SIZES
+STORAGE_HEADER_PATTERN_BYTE_SIZE = 4
 STORAGE_HEADER_TIMESTAMP_BYTE_SIZE = 8
 STORAGE_HEADER_ECU_ID_BYTE_SIZE = 4
 STORAGE_HEADER_BYTE_SIZE = (
-    STORAGE_HEADER_TIMESTAMP_BYTE_SIZE + STORAGE_HEADER_ECU_ID_BYTE_SIZE
+    STORAGE_HEADER_PATTERN_BYTE_SIZE
+    + STORAGE_HEADER_TIMESTAMP_BYTE_SIZE
+    + STORAGE_HEADER_ECU_ID_BYTE_SIZE
 )
+# STORAGE HEADER PATTERN (DLT\x01)
+STORAGE_HEADER_PATTERN = b"DLT\x01"
+# seconds (int32), microseconds (uint32), ecu_id (char[4]) - all little endian
+STORAGE_HEADER_STRUCT = Struct("<iI4s")
 
 
 class StorageHeader():
-    timestamp_seconds = 0
-    timestamp_microseconds = 0
-    ecu_id = None
+    __slots__ = (
+        "timestamp_seconds",
+        "timestamp_microseconds",
+        "ecu_id",
+    )
 
-    def __init__(self, dlt_message_hex, start_byte_pointer):
-        storage_header_hex = dlt_message_hex[
-            start_byte_pointer : start_byte_pointer + STORAGE_HEADER_BYTE_SIZE * 2
-        ]
-        self.timestamp_seconds = self.__extract_timestamp_seconds(storage_header_hex)
-        self.timestamp_microseconds = self.__extract_timestamp_microseconds(
-            storage_header_hex
+    def __init__(self, dlt_message_bytes, start_byte_pointer, symbol_table=None):
+        (
+            self.timestamp_seconds,
+            self.timestamp_microseconds,
+            ecu_id_bytes,
+        ) = STORAGE_HEADER_STRUCT.unpack_from(
+            dlt_message_bytes, start_byte_pointer + STORAGE_HEADER_PATTERN_BYTE_SIZE
         )
-        self.ecu_id = self.__extract_ecu_id(storage_header_hex)
-
-    def __extract_timestamp_seconds(self, storage_header_hex):
-        return hex_str_to_int32(storage_header_hex[0:8])
-
-    def __extract_timestamp_microseconds(self, storage_header_hex):
-        return hex_str_to_uint32(storage_header_hex[8:16])
+        if symbol_table is None:
+            self.ecu_id = self.__extract_ecu_id(ecu_id_bytes)
+        else:
+            self.ecu_id = symbol_table.get_id(ecu_id_bytes)
 
-    def __extract_ecu_id(self, storage_header_hex):
-        return hex_str_to_utf8(storage_header_hex[16:24]).rstrip("\0")
+    @staticmethod
+    def __extract_ecu_id(ecu_id_bytes):
+        return bytes_to_utf8(ecu_id_bytes).rstrip("\0")
 
     ###
     # Getters
     ###
     def get_byte_size(self):
-        return STORAGE_HEADER_BYTE_SIZE
\ No newline at end of file
+        return STORAGE_HEADER_BYTE_SIZE
@@ -0,0 +1,276 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import marshal
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from dlt_transformipy.core.framing import (
+    DLTMessageFramer,
+    get_message_byte_size,
+    MESSAGE_PREAMBLE_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.dlt_message import DLTMessage
+from dlt_transformipy.core.model.payload import RawData
+from dlt_transformipy.core.model.storage_header import STORAGE_HEADER_PATTERN
+
+# Smallest byte range which is decoded by a single worker
+MINIMUM_RANGE_BYTE_SIZE = 1024 * 1024
+# Byte ranges per worker (smaller ranges balance the load between the workers)
+RANGES_PER_WORKER = 4
+# Number of consecutive messages which must be valid to accept a range boundary
+BOUNDARY_VALIDATION_MESSAGES = 3
+
+
+def _is_message_boundary(dlt_mmap, offset):
+    """Checks if a chain of valid messages starts at offset"""
+    for _ in range(BOUNDARY_VALIDATION_MESSAGES):
+        if offset == len(dlt_mmap):
+            return True
+        if len(dlt_mmap) - offset < MESSAGE_PREAMBLE_BYTE_SIZE:
+            return False
+        message_byte_size = get_message_byte_size(dlt_mmap, offset)
+        if not message_byte_size or offset + message_byte_size > len(dlt_mmap):
+            return False
+        offset += message_byte_size
+    return True
+
+
+def _align_to_message_boundary(dlt_mmap, offset):
+    """Returns the first validated storage header at or behind offset"""
+    while True:
+        offset = dlt_mmap.find(STORAGE_HEADER_PATTERN, offset)
+        if offset < 0:
+            return len(dlt_mmap)
+        if _is_message_boundary(dlt_mmap, offset):
+            return offset
+        offset += 1
+
+
+def split_into_ranges(dlt_mmap, number_of_ranges):
+    """Splits a memory-mapped DLT file into byte ranges which start at message boundaries
+
+    :param mmap dlt_mmap: The memory-mapped DLT file
+    :param int number_of_ranges: Number of ranges to split into (upper bound)
+    :returns: List of (start, end) tuples covering the whole file
+    :rtype: list
+    """
+    range_byte_size = max(len(dlt_mmap) // number_of_ranges, MINIMUM_RANGE_BYTE_SIZE)
+    boundaries = [0]
+    for nominal_boundary in range(range_byte_size, len(dlt_mmap), range_byte_size):
+        boundary = _align_to_message_boundary(
+            dlt_mmap, max(nominal_boundary, boundaries[-1] + 1)
+        )
+        if boundary >= len(dlt_mmap):
+            break
+        boundaries.append(boundary)
+    boundaries.append(len(dlt_mmap))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _is_verbose(message):
+    standard_header = message.standard_header
+    return (
+        standard_header.header_type.use_extended_header
+        and message.extended_header.message_info.verbose
+    )
+
+
+def _store_arguments(arguments, raw_data_positions, message_index, message_arguments):
+    """Stores the arguments of a message, RawData is replaced by its str to marshal it"""
+    for argument_index, argument in enumerate(message_arguments):
+        if type(argument) is RawData:
+            message_arguments[argument_index] = str(argument)
+            raw_data_positions.append((message_index, argument_index))
+    arguments[message_index] = message_arguments
+
+
+def decode_range(dlt_file_path, start, end, dlt_filter=None, catalog=None):
+    """Frames and decodes all messages of a byte range (executed in a worker process)
+
+    The result is a compact batch instead of DLTMessage objects: the message offsets as
+    array('Q') bytes, the marshalled payload arguments of every message (and the
+    positions of RawData arguments) and the number of skipped bytes. With a catalog,
+    the non-verbose payloads of the range are collected and decoded in one
+    MessageCatalog.decode_batch call.
+    """
+    with open(dlt_file_path, "rb") as dlt_file_descriptor:
+        dlt_mmap = mmap.mmap(dlt_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ)
+    dlt_file_view = memoryview(dlt_mmap)
+
+    offsets = array("Q")
+    arguments = list()
+    # (message, argument) positions of RawData, which cannot be marshalled
+    raw_data_positions = list()
+    # Message indices and (start, end, big_endian) of the non-verbose payloads
+    non_verbose_indices = list()
+    non_verbose_payloads = list()
+    framer = DLTMessageFramer()
+    for message_start, _ in framer.frame(dlt_mmap, start, end):
+        if dlt_filter is not None and not dlt_filter.matches(dlt_mmap, message_start):
+            continue
+        offsets.append(message_start)
+        message = DLTMessage(dlt_file_view, message_start)
+        arguments.append(None)
+        if catalog is not None and not _is_verbose(message):
+            payload_start, payload_end = message.get_payload_range()
+            non_verbose_indices.append(len(arguments) - 1)
+            non_verbose_payloads.append(
+                (
+                    payload_start,
+                    payload_end,
+                    message.standard_header.header_type.most_significant_byte_first,
+                )
+            )
+            continue
+        _store_arguments(
+            arguments, raw_data_positions, len(arguments) - 1, list(message.payload)
+        )
+
+    if non_verbose_payloads:
+        for message_index, (payload_start, payload_end, _), message_arguments in zip(
+            non_verbose_indices,
+            non_verbose_payloads,
+            catalog.decode_batch(dlt_file_view, non_verbose_payloads),
+        ):
+            if message_arguments is None:
+                # Like Payload, unknown payloads are returned encoded
+                message_arguments = [RawData(dlt_mmap[payload_start:payload_end].hex())]
+            _store_arguments(
+                arguments, raw_data_positions, message_index, message_arguments
+            )
+
+    dlt_file_view.release()
+    dlt_mmap.close()
+    return (
+        offsets.tobytes(),
+        marshal.dumps((arguments, raw_data_positions)),
+        framer.skipped_bytes,
+    )
+
+
+def unmarshal_arguments(arguments_marshalled):
+    """Restores the payload arguments marshalled by decode_range (including RawData)
+
+    :param bytes arguments_marshalled: Marshalled arguments of decode_range
+    :returns: List of the payload arguments of every message
+    :rtype: list
+    """
+    arguments, raw_data_positions = marshal.loads(arguments_marshalled)
+    for message_index, argument_index in raw_data_positions:
+        arguments[message_index][argument_index] = RawData(
+            arguments[message_index][argument_index]
+        )
+    return arguments
+
+
+class ParallelDecoder:
+    """Decodes a storaged DLT file in parallel worker processes
+
+    The file is split into byte ranges aligned to message boundaries. Every range is
+    framed and decoded in a worker process, the results are returned in file order.
+    """
+
+    skipped_bytes = 0
+    _dlt_file_path = None
+    _workers = None
+    _dlt_filter = None
+    _catalog = None
+
+    def __init__(self, dlt_file_path, workers=None, dlt_filter=None, catalog=None):
+        self._dlt_file_path = dlt_file_path
+        self._workers = workers or os.cpu_count() or 1
+        self._dlt_filter = dlt_filter
+        self._catalog = catalog
+        self.skipped_bytes = 0
+
+    def iter_batches(self, dlt_mmap):
+        """Yields the decode_range results of the byte ranges of the file in their order
+
+        With a single worker the ranges (of about MINIMUM_RANGE_BYTE_SIZE) are decoded one
+        after another in this process, so only one batch is held in memory.
+
+        :param mmap dlt_mmap: The memory-mapped DLT file
+        """
+        if self._workers == 1:
+            for start, end in split_into_ranges(
+                dlt_mmap, max(len(dlt_mmap) // MINIMUM_RANGE_BYTE_SIZE, 1)
+            ):
+                yield decode_range(
+                    self._dlt_file_path, start, end, self._dlt_filter, self._catalog
+                )
+            return
+
+        ranges = split_into_ranges(dlt_mmap, self._workers * RANGES_PER_WORKER)
+        with ProcessPoolExecutor(
+            max_workers=min(self._workers, len(ranges))
+        ) as executor:
+            yield from executor.map(
+                decode_range,
+                [self._dlt_file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [self._dlt_filter] * len(ranges),
+                [self._catalog] * len(ranges),
+            )
+
+    def iter_messages(self, dlt_mmap, symbol_table=None):
+        """Yields all DLTMessages of the file in their original order
+
+        :param mmap dlt_mmap: The memory-mapped DLT file, the DLTMessages reference it
+        :param SymbolTable symbol_table: Optional SymbolTable which interns the IDs
+        """
+        self.skipped_bytes = 0
+        dlt_file_view = memoryview(dlt_mmap)
+        for batch in self.iter_batches(dlt_mmap):
+            yield from iter_batch_messages(
+                dlt_file_view, batch, symbol_table=symbol_table, catalog=self._catalog
+            )
+            self.skipped_bytes += batch[2]
+
+
+def iter_batch_messages(
+    dlt_file_view, batch, dlt_filter=None, symbol_table=None, catalog=None
+):
+    """Yields the DLTMessages of a decode_range result with their decoded arguments
+
+    :param memoryview dlt_file_view: View of the memory-mapped DLT file
+    :param tuple batch: Result of decode_range
+    :param DLTFilter dlt_filter: Optional filter, only matching DLTMessages are yielded
+    :param SymbolTable symbol_table: Optional SymbolTable which interns the IDs
+    :param MessageCatalog catalog: Optional MessageCatalog (APID/CTID of messages
+        without an extended header)
+    """
+    offsets_bytes, arguments_marshalled, _ = batch
+    offsets = array("Q")
+    offsets.frombytes(offsets_bytes)
+    arguments = unmarshal_arguments(arguments_marshalled)
+    for message_start, payload_arguments in zip(offsets, arguments):
+        if dlt_filter is None or dlt_filter.matches(dlt_file_view, message_start):
+            yield DLTMessage(
+                dlt_file_view,
+                message_start,
+                payload_arguments=payload_arguments,
+                catalog=catalog,
+                symbol_table=symbol_table,
+            )
@@ -0,0 +1,280 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mmap
+from struct import Struct
+
+from dlt_transformipy.core.compression import (
+    DECOMPRESSION_BLOCK_SIZE,
+    DecompressingReader,
+    detect_compression,
+)
+from dlt_transformipy.core.filter import MESSAGE_TYPE_LOG
+from dlt_transformipy.core.framing import (
+    DLTMessageFramer,
+    MINIMUM_LENGTH_BY_HEADER_TYPE,
+)
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN,
+    STORAGE_HEADER_PATTERN_BYTE_SIZE,
+    STORAGE_HEADER_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.standard_header import (
+    STANDARD_HEADER_MANDATORY_BYTE_SIZE,
+)
+from dlt_transformipy.core.symbols import SymbolTable
+
+# seconds (int32) of the storage header
+STORAGE_SECONDS_STRUCT = Struct("<i")
+# message_counter (uint8), length (uint16) of the standard header
+COUNTER_LENGTH_STRUCT = Struct(">BH")
+STORAGE_ECU_ID_OFFSET = STORAGE_HEADER_BYTE_SIZE - 4
+HEADER_TYPE_OFFSET = STORAGE_HEADER_BYTE_SIZE
+OPTIONAL_HEADER_OFFSET = STORAGE_HEADER_BYTE_SIZE + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+# Offset of the extended header behind the standard header, for every header_type
+EXTENDED_HEADER_OFFSETS = tuple(
+    STORAGE_HEADER_BYTE_SIZE
+    + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+    + 4 * bin(header_type & 0b11100).count("1")
+    for header_type in range(256)
+)
+MESSAGE_COUNTER_MODULO = 256
+
+
+class TraceStats:
+    """Summary of a DLT file (see compute_stats)
+
+    Counts are dictionaries of value -> number of messages. ECU IDs are taken from the
+    standard header (from the storage header if not present). A message counter
+    sequence is identified by (ECU ID, APID, CTID), APID and CTID are empty for
+    messages without extended header.
+    """
+
+    def __init__(self):
+        self.message_count = 0
+        # Bytes of all messages including their storage headers
+        self.byte_count = 0
+        self.skipped_bytes = 0
+        self.ecu_ids = dict()
+        self.apids = dict()
+        self.ctids = dict()
+        # Message type (MSTP) -> count, log level (MTIN of log messages) -> count
+        self.message_types = dict()
+        self.log_levels = dict()
+        # Sorted (storage time in seconds, number of messages) of every second with messages
+        self.messages_per_second = list()
+        # payload_sizes[0]: empty payloads, payload_sizes[i]: 2**(i-1) <= size < 2**i
+        self.payload_sizes = list()
+        # Message counter sequence -> number of gaps / number of lost messages
+        self.counter_gaps = dict()
+        self.lost_messages = dict()
+
+    def to_dict(self):
+        """Returns the summary as a JSON serializable dictionary
+
+        :rtype: dict
+        """
+        return {
+            "message_count": self.message_count,
+            "byte_count": self.byte_count,
+            "skipped_bytes": self.skipped_bytes,
+            "ecu_ids": self.ecu_ids,
+            "apids": self.apids,
+            "ctids": self.ctids,
+            "message_types": self.message_types,
+            "log_levels": self.log_levels,
+            "messages_per_second": self.messages_per_second,
+            "payload_sizes": self.payload_sizes,
+            "counter_gaps": {
+                "/".join(sequence): gaps for sequence, gaps in self.counter_gaps.items()
+            },
+            "lost_messages": {
+                "/".join(sequence): lost
+                for sequence, lost in self.lost_messages.items()
+            },
+        }
+
+
+def _frame_file(dlt_file_path):
+    """Yields (buffer, framer, messages) for the blocks of a plain or compressed DLT file
+
+    messages yields the (start, end) offsets of the messages in buffer, it has to be
+    exhausted by the caller before the next block is read.
+    """
+    compression = detect_compression(dlt_file_path)
+    if compression is None:
+        with open(dlt_file_path, "rb") as dlt_file_descriptor:
+            _check_storage_file(
+                dlt_file_descriptor.read(STORAGE_HEADER_PATTERN_BYTE_SIZE)
+            )
+            dlt_mmap = mmap.mmap(
+                dlt_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        framer = DLTMessageFramer()
+        try:
+            yield dlt_mmap, framer, framer.frame(dlt_mmap)
+        finally:
+            dlt_mmap.close()
+        return
+
+    with DecompressingReader(dlt_file_path, compression) as dlt_file_descriptor:
+        _check_storage_file(dlt_file_descriptor.peek(STORAGE_HEADER_PATTERN_BYTE_SIZE))
+        framer = DLTMessageFramer()
+        current = b""
+        while True:
+            block = dlt_file_descriptor.read(DECOMPRESSION_BLOCK_SIZE)
+            # Only the unconsumed rest (at most one incomplete message) is copied
+            current = current[framer.position :] + block
+            yield current, framer, framer.frame(current, final=not block)
+            if not block:
+                return
+
+
+def _check_storage_file(file_start_pattern):
+    if file_start_pattern[:STORAGE_HEADER_PATTERN_BYTE_SIZE] != STORAGE_HEADER_PATTERN:
+        raise TypeError(
+            "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
+        )
+
+
+def compute_stats(dlt_file_path, dlt_filter=None):
+    """Computes the summary of a DLT file in one pass over its raw bytes
+
+    No DLTMessage or Payload is created, the header fields are read directly from the
+    memory-mapped (or decompressed) DLT file.
+
+    :param str dlt_file_path: Absolute Path + Filename of the DLT file
+    :param DLTFilter dlt_filter: Optional filter, only matching messages are counted
+    :returns: The summary of the DLT file
+    :rtype: TraceStats
+    """
+    # Counted by (raw ECU ID, raw APID + CTID, message_info), decoded once at the end
+    group_counts = dict()
+    seconds_counts = dict()
+    # StandardHeader.length is an uint16, payload sizes have at most 16 bits
+    payload_sizes = [0] * 17
+    last_counters = dict()
+    counter_gaps = dict()
+    lost_messages = dict()
+    message_count = 0
+    byte_count = 0
+    skipped_bytes = 0
+
+    unpack_seconds = STORAGE_SECONDS_STRUCT.unpack_from
+    unpack_counter_length = COUNTER_LENGTH_STRUCT.unpack_from
+    minimum_lengths = MINIMUM_LENGTH_BY_HEADER_TYPE
+    extended_header_offsets = EXTENDED_HEADER_OFFSETS
+    no_ids = bytes(8)
+
+    for buffer, framer, messages in _frame_file(dlt_file_path):
+        for start, end in messages:
+            if dlt_filter is not None and not dlt_filter.matches(buffer, start):
+                continue
+            message_count += 1
+            byte_count += end - start
+
+            seconds = unpack_seconds(buffer, start + STORAGE_HEADER_PATTERN_BYTE_SIZE)[
+                0
+            ]
+            seconds_counts[seconds] = seconds_counts.get(seconds, 0) + 1
+
+            header_type = buffer[start + HEADER_TYPE_OFFSET]
+            message_counter, length = unpack_counter_length(
+                buffer, start + HEADER_TYPE_OFFSET + 1
+            )
+            payload_sizes[(length - minimum_lengths[header_type]).bit_length()] += 1
+
+            if header_type & 0b00100:
+                ecu_id = buffer[
+                    start + OPTIONAL_HEADER_OFFSET : start + OPTIONAL_HEADER_OFFSET + 4
+                ]
+            else:
+                ecu_id = buffer[
+                    start + STORAGE_ECU_ID_OFFSET : start + STORAGE_ECU_ID_OFFSET + 4
+                ]
+            if header_type & 0b00001:
+                position = start + extended_header_offsets[header_type]
+                message_info = buffer[position]
+                ids = buffer[position + 2 : position + 10]
+            else:
+                message_info = None
+                ids = no_ids
+            group = (ecu_id, ids, message_info)
+            group_counts[group] = group_counts.get(group, 0) + 1
+
+            # Message counter sequence
+            sequence = (ecu_id, ids)
+            last_counter = last_counters.get(sequence)
+            if last_counter is not None and message_counter != last_counter:
+                lost = (message_counter - last_counter - 1) % MESSAGE_COUNTER_MODULO
+                if lost:
+                    counter_gaps[sequence] = counter_gaps.get(sequence, 0) + 1
+                    lost_messages[sequence] = lost_messages.get(sequence, 0) + lost
+            last_counters[sequence] = message_counter
+        skipped_bytes = framer.skipped_bytes
+
+    symbol_table = SymbolTable()
+    ecu_ids = dict()
+    apids = dict()
+    ctids = dict()
+    message_types = dict()
+    log_levels = dict()
+    for (ecu_id, ids, message_info), count in group_counts.items():
+        ecu_id = symbol_table.get_id(ecu_id)
+        ecu_ids[ecu_id] = ecu_ids.get(ecu_id, 0) + count
+        if message_info is None:
+            continue
+        apid = symbol_table.get_id(ids[:4])
+        ctid = symbol_table.get_id(ids[4:])
+        apids[apid] = apids.get(apid, 0) + count
+        ctids[ctid] = ctids.get(ctid, 0) + count
+        message_type = (message_info >> 1) & 0b111
+        message_types[message_type] = message_types.get(message_type, 0) + count
+        if message_type == MESSAGE_TYPE_LOG:
+            log_level = message_info >> 4
+            log_levels[log_level] = log_levels.get(log_level, 0) + count
+
+    def decode_sequences(counts):
+        return {
+            (
+                symbol_table.get_id(ecu_id),
+                symbol_table.get_id(ids[:4]),
+                symbol_table.get_id(ids[4:]),
+            ): count
+            for (ecu_id, ids), count in counts.items()
+        }
+
+    stats = TraceStats()
+    stats.message_count = message_count
+    stats.byte_count = byte_count
+    stats.skipped_bytes = skipped_bytes
+    stats.ecu_ids = ecu_ids
+    stats.apids = apids
+    stats.ctids = ctids
+    stats.message_types = message_types
+    stats.log_levels = log_levels
+    stats.messages_per_second = sorted(seconds_counts.items())
+    while len(payload_sizes) > 1 and not payload_sizes[-1]:
+        payload_sizes.pop()
+    stats.payload_sizes = payload_sizes
+    stats.counter_gaps = decode_sequences(counter_gaps)
+    stats.lost_messages = decode_sequences(lost_messages)
+    return stats
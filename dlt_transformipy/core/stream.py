@@ -0,0 +1,275 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import asyncio
+import time
+
+from dlt_transformipy import logger
+
+from dlt_transformipy.core.catalog import MessageCatalog
+from dlt_transformipy.core.framing import DLTStreamFramer
+from dlt_transformipy.core.model.dlt_message import DLTMessage
+from dlt_transformipy.core.model.standard_header import (
+    STANDARD_HEADER_MANDATORY_BYTE_SIZE,
+)
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN,
+    STORAGE_HEADER_STRUCT,
+)
+from dlt_transformipy.core.symbols import SymbolTable
+from dlt_transformipy.core.transform.transform_csv import CSV_HEADER, render_rows
+
+# TCP PORT OF THE DLT-DAEMON
+DLT_DAEMON_PORT = 3490
+# BYTES READ FROM THE SOCKET AT ONCE
+STREAM_READ_SIZE = 64 * 1024
+# MAXIMUM NUMBER OF DLTMESSAGES DELIVERED AT ONCE
+STREAM_BATCH_SIZE = 1000
+# MAXIMUM NUMBER OF BATCHES WAITING FOR THE CONSUMER (the socket is not read meanwhile)
+STREAM_QUEUE_SIZE = 16
+# ECU ID USED IN THE STORAGE HEADER IF THE STANDARD HEADER CONTAINS NONE
+STREAM_DEFAULT_ECU_ID = "RECV"
+
+# Bit of the header_type which indicates the ECU ID in the standard header
+STANDARD_HEADER_WITH_ECU_ID = 0b00000100
+
+
+class DLTStreamClient:
+    """Receives the DLTMessages of a dlt-daemon (or any other TCP DLT stream)
+
+    The stream does not contain storage headers, every received message gets a storage
+    header with its receive time and ECU ID. The messages are delivered in batches
+    through a bounded queue: if the consumer is slower than the stream, the socket is
+    not read until a batch was consumed (TCP backpressure).
+
+    Usage:
+        async with DLTStreamClient("localhost") as client:
+            async for dlt_message in client.iter_messages():
+                ...
+    """
+
+    def __init__(
+        self,
+        host,
+        port=DLT_DAEMON_PORT,
+        ecu_id=None,
+        storage_file_path=None,
+        csv_file_path=None,
+        csv_separator=None,
+        dlt_filter=None,
+        catalog=None,
+        batch_size=STREAM_BATCH_SIZE,
+        queue_size=STREAM_QUEUE_SIZE,
+    ):
+        """
+        :param str host: Host of the dlt-daemon
+        :param int port: TCP port of the dlt-daemon (default: 3490)
+        :param str ecu_id: ECU ID of the storage header for messages without ECU ID
+            in their standard header (default: 'RECV')
+        :param str storage_file_path: Optional DLT file which the received messages are
+            written to (with storage headers, readable by DLTFile)
+        :param str csv_file_path: Optional CSV file which the received messages are
+            written to (same format as as_csv)
+        :param str csv_separator: Optional separator used in the CSV file (default: ';')
+        :param DLTFilter dlt_filter: Optional filter, only matching DLTMessages are
+            delivered and written
+        :param catalog: Optional MessageCatalog (or path of a FIBEX file) to decode
+            non-verbose messages
+        :param int batch_size: Maximum number of DLTMessages delivered at once
+        :param int queue_size: Maximum number of batches waiting for the consumer
+        """
+        if isinstance(catalog, str):
+            catalog = MessageCatalog.load(catalog)
+        self.__host = host
+        self.__port = port
+        self.__ecu_id = (ecu_id or STREAM_DEFAULT_ECU_ID).encode("ascii")
+        self.__storage_file_path = storage_file_path
+        self.__csv_file_path = csv_file_path
+        self.__csv_separator = ";" if csv_separator is None else csv_separator
+        self.__dlt_filter = dlt_filter
+        self.__catalog = catalog
+        self.__batch_size = batch_size
+        self.__queue_size = queue_size
+        self.__framer = DLTStreamFramer()
+        self.__symbol_table = SymbolTable()
+        self.__reader = None
+        self.__writer = None
+        self.__queue = None
+        self.__task = None
+        self.__error = None
+        self.__storage_file = None
+        self.__csv_file = None
+        self.__message_idx = 0
+
+    async def connect(self):
+        """Connects to the dlt-daemon and starts receiving"""
+        self.__reader, self.__writer = await asyncio.open_connection(
+            self.__host, self.__port
+        )
+        if self.__storage_file_path is not None:
+            self.__storage_file = open(self.__storage_file_path, "wb")
+        if self.__csv_file_path is not None:
+            self.__csv_file = open(self.__csv_file_path, "w", encoding="utf8")
+            self.__csv_file.write(self.__csv_separator.join(CSV_HEADER))
+            self.__csv_file.write("\n")
+        self.__queue = asyncio.Queue(self.__queue_size)
+        self.__task = asyncio.ensure_future(self._receive())
+        logger.info("Connected to {}:{}".format(self.__host, self.__port))
+
+    async def close(self):
+        """Stops receiving, closes the connection and the output files"""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        if self.__writer is not None:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.__writer = None
+        self._close_files()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def iter_batches(self):
+        """Yields lists of received DLTMessages until the connection is closed
+
+        :returns: Asynchronous generator of lists with up to batch_size DLTMessages
+        :rtype: list
+        """
+        while True:
+            batch = await self.__queue.get()
+            if batch is None:
+                if self.__error is not None:
+                    raise self.__error
+                return
+            yield batch
+
+    async def iter_messages(self):
+        """Yields the received DLTMessages until the connection is closed
+
+        :returns: Asynchronous generator of DLTMessages
+        :rtype: DLTMessage
+        """
+        async for batch in self.iter_batches():
+            for dlt_message in batch:
+                yield dlt_message
+
+    async def capture(self):
+        """Receives until the connection is closed, e.g. to only write the output files
+
+        :returns: Number of received (matching) DLTMessages
+        :rtype: int
+        """
+        async for _ in self.iter_batches():
+            pass
+        return self.__message_idx
+
+    async def _receive(self):
+        try:
+            current = b""
+            while True:
+                block = await self.__reader.read(STREAM_READ_SIZE)
+                if not block:
+                    break
+                # Only the unconsumed rest (an incomplete message) is copied
+                current = current[self.__framer.position :] + block
+                messages, messages_bytes = self._frame(current, time.time())
+                if self.__storage_file is not None:
+                    self.__storage_file.write(messages_bytes)
+                for batch_start in range(0, len(messages), self.__batch_size):
+                    batch = messages[batch_start : batch_start + self.__batch_size]
+                    self._write(batch)
+                    # Waits while the queue is full, the socket is not read meanwhile
+                    await self.__queue.put(batch)
+            if len(current) > self.__framer.position:
+                logger.warning(
+                    "Connection closed within a message, {} bytes were dropped".format(
+                        len(current) - self.__framer.position
+                    )
+                )
+        except Exception as error:
+            self.__error = error
+        finally:
+            self._close_files()
+        await self.__queue.put(None)
+
+    def _frame(self, current, receive_time):
+        dlt_filter = self.__dlt_filter
+        catalog = self.__catalog
+        symbol_table = self.__symbol_table
+        seconds = int(receive_time)
+        microseconds = int((receive_time - seconds) * 1000000)
+        default_storage_header = STORAGE_HEADER_PATTERN + STORAGE_HEADER_STRUCT.pack(
+            seconds, microseconds, self.__ecu_id
+        )
+        messages = list()
+        messages_bytes = list()
+        for message_start, message_end in self.__framer.frame(current):
+            if current[message_start] & STANDARD_HEADER_WITH_ECU_ID:
+                ecu_id_start = message_start + STANDARD_HEADER_MANDATORY_BYTE_SIZE
+                storage_header = STORAGE_HEADER_PATTERN + STORAGE_HEADER_STRUCT.pack(
+                    seconds, microseconds, current[ecu_id_start : ecu_id_start + 4]
+                )
+            else:
+                storage_header = default_storage_header
+            message_bytes = storage_header + current[message_start:message_end]
+            if dlt_filter is None or dlt_filter.matches(message_bytes, 0):
+                messages.append(
+                    DLTMessage(
+                        message_bytes, catalog=catalog, symbol_table=symbol_table
+                    )
+                )
+                messages_bytes.append(message_bytes)
+        return messages, b"".join(messages_bytes)
+
+    def _write(self, batch):
+        if self.__csv_file is not None:
+            for rows in render_rows(batch, self.__csv_separator, self.__message_idx):
+                self.__csv_file.write(rows)
+        self.__message_idx += len(batch)
+
+    def _close_files(self):
+        if self.__storage_file is not None:
+            self.__storage_file.close()
+            self.__storage_file = None
+        if self.__csv_file is not None:
+            self.__csv_file.close()
+            self.__csv_file = None
+
+    ###
+    # Getters
+    ###
+    def get_symbol_table(self):
+        return self.__symbol_table
+
+    def get_skipped_bytes(self):
+        return self.__framer.skipped_bytes
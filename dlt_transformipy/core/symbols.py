@@ -0,0 +1,90 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import sys
+
+from dlt_transformipy.core.helpers import bytes_to_utf8
+
+
+class SymbolTable:
+    """Interned ECU/APP/CTX IDs of a DLT file and their integer codes
+
+    A DLT file contains only a few hundred distinct IDs, so every raw 4 byte ID is
+    decoded once: all headers share the same str object and every ID gets a small
+    integer code (its position in ids), e.g. for dictionary-encoded exports.
+    """
+
+    __slots__ = (
+        "ids",
+        "_ids_by_bytes",
+        "_codes",
+    )
+
+    def __init__(self):
+        # Decoded IDs by code
+        self.ids = list()
+        # Raw (\0 padded) ID -> decoded ID, different raw IDs may decode to the same ID
+        self._ids_by_bytes = dict()
+        # Decoded ID -> code
+        self._codes = dict()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self._codes
+
+    def get_id(self, id_bytes):
+        """Returns the shared str of a raw ID (trailing \\0 removed)
+
+        :param bytes id_bytes: Raw ID as stored in the header (4 bytes)
+        :rtype: str
+        """
+        id_ = self._ids_by_bytes.get(id_bytes)
+        if id_ is None:
+            id_ = self._add(id_bytes)
+        return id_
+
+    def get_code(self, id_bytes):
+        """Returns the code of a raw ID
+
+        :param bytes id_bytes: Raw ID as stored in the header (4 bytes)
+        :rtype: int
+        """
+        return self._codes[self.get_id(id_bytes)]
+
+    def get_code_of_id(self, id_):
+        """Returns the code of a decoded ID (e.g. ExtendedHeader.apid)
+
+        :param str id_: Decoded ID
+        :returns: Code of the ID or None if the ID did not occur (yet)
+        :rtype: int
+        """
+        return self._codes.get(id_)
+
+    def _add(self, id_bytes):
+        id_bytes = bytes(id_bytes)
+        id_ = sys.intern(bytes_to_utf8(id_bytes, errors="ignore").rstrip("\0"))
+        if id_ not in self._codes:
+            self._codes[id_] = len(self.ids)
+            self.ids.append(id_)
+        self._ids_by_bytes[id_bytes] = id_
+        return id_
@@ -0,0 +1,398 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mmap
+import os
+import re
+from array import array
+from struct import Struct
+
+from dlt_transformipy import logger
+
+from dlt_transformipy.core.model.dlt_message import DLTMessage
+
+TEXT_INDEX_FILE_EXTENSION = ".sidx"
+TEXT_INDEX_MAGIC = b"DLTSIDX\0"
+TEXT_INDEX_VERSION = 2
+# magic, version, padding, dlt file size, dlt file mtime (ns), number of messages,
+# number of tokens, byte size of the lexicon, digest of the MessageCatalog
+TEXT_INDEX_HEADER_STRUCT = Struct("<8sI4xQqQQQ16s")
+# Catalog digest of a text index built without MessageCatalog
+NO_CATALOG_DIGEST = bytes(16)
+# Words of the STRG arguments, compared case-insensitively
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Splits a text into its lower case words
+
+    :param str text: Text (e.g. a STRG argument)
+    :rtype: list
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def get_text(dlt_message):
+    """Returns the STRG arguments of a DLTMessage, separated by spaces
+
+    :param DLTMessage dlt_message: DLTMessage
+    :rtype: str
+    """
+    # RawData is a str subclass, only real strings are indexed
+    return " ".join(
+        argument for argument in dlt_message.payload if type(argument) is str
+    )
+
+
+def _encode_varint(value, output):
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def _decode_varint(buffer, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _get_catalog_digest(catalog):
+    return NO_CATALOG_DIGEST if catalog is None else catalog.get_digest()
+
+
+class DLTTextIndex:
+    """Inverted index of the words of the STRG arguments of a storaged DLT file
+
+    Every word (see tokenize) maps to the ascending indices of the messages which contain
+    it (message indices of the DLTIndex, i.e. dlt_file[i] of an unfiltered DLTFile). The
+    postings are stored delta- and varint-encoded next to the DLT file (<dlt file>.sidx)
+    and are decoded only for the words of a query. The index is reused as long as size and modification
+    time of the DLT file and the MessageCatalog (which decodes non-verbose STRG
+    arguments) do not change.
+    """
+
+    message_count = 0
+    _file_size = 0
+    _file_mtime_ns = 0
+    _catalog_digest = NO_CATALOG_DIGEST
+    # Word -> (offset in the postings, byte size, number of messages)
+    _lexicon = None
+    _postings = None
+    _mmap = None
+
+    def __init__(
+        self,
+        file_size,
+        file_mtime_ns,
+        message_count,
+        lexicon,
+        postings,
+        index_mmap=None,
+        catalog_digest=NO_CATALOG_DIGEST,
+    ):
+        self._file_size = file_size
+        self._file_mtime_ns = file_mtime_ns
+        self._catalog_digest = catalog_digest
+        self.message_count = message_count
+        self._lexicon = lexicon
+        self._postings = postings
+        self._mmap = index_mmap
+
+    def __len__(self):
+        """Returns the number of distinct words"""
+        return len(self._lexicon)
+
+    def __contains__(self, word):
+        return word in self._lexicon
+
+    def get_postings(self, word):
+        """Returns the indices of the messages which contain the word
+
+        :param str word: Lower case word
+        :returns: Ascending message indices
+        :rtype: array
+        """
+        message_indices = array("Q")
+        entry = self._lexicon.get(word)
+        if entry is None:
+            return message_indices
+        position, byte_size, _ = entry
+        end = position + byte_size
+        postings = self._postings
+        message_index = 0
+        while position < end:
+            delta, position = _decode_varint(postings, position)
+            message_index += delta
+            message_indices.append(message_index)
+        return message_indices
+
+    def search(self, query):
+        """Returns the indices of the messages which contain all words of the query
+
+        :param str query: Keywords (whole words, case-insensitive)
+        :returns: Ascending message indices, empty if the query contains no word
+        :rtype: list
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        return self._intersect([{word} for word in words])
+
+    def find_candidates(self, text):
+        """Returns the indices of the messages which may contain the text
+
+        The words of the text have to occur in the message: the first one may be the end
+        of a word, the last one the start of a word and a single one any part of a word.
+        The messages have to be checked for the text itself (see DLTFile.search).
+
+        :param str text: Text to search for
+        :returns: Ascending message indices, None if the text contains no word (all
+            messages are candidates)
+        :rtype: list
+        """
+        words = tokenize(text)
+        if not words:
+            return None
+        if len(words) == 1:
+            return self._intersect(
+                [self._matching_words(lambda word: words[0] in word)]
+            )
+        word_sets = [self._matching_words(lambda word: word.endswith(words[0]))]
+        word_sets.extend({word} for word in words[1:-1])
+        word_sets.append(self._matching_words(lambda word: word.startswith(words[-1])))
+        return self._intersect(word_sets)
+
+    def is_valid_for(self, dlt_file_path, catalog=None):
+        """Checks if the index still matches size and modification time of the DLT file and the MessageCatalog"""
+        stat = os.stat(dlt_file_path)
+        return (
+            stat.st_size == self._file_size
+            and stat.st_mtime_ns == self._file_mtime_ns
+            and _get_catalog_digest(catalog) == self._catalog_digest
+        )
+
+    def close(self):
+        if self._mmap is not None:
+            self._postings.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def _matching_words(self, predicate):
+        # Scans the words of the index, not the DLT file
+        return {word for word in self._lexicon if predicate(word)}
+
+    def _intersect(self, word_sets):
+        if not word_sets:
+            return []
+        message_indices = None
+        # Rare words first, so the set of candidates is small early
+        for words in sorted(
+            word_sets,
+            key=lambda words: sum(
+                self._lexicon.get(word, (0, 0, 0))[2] for word in words
+            ),
+        ):
+            matches = set()
+            for word in words:
+                matches.update(self.get_postings(word))
+            message_indices = (
+                matches if message_indices is None else message_indices & matches
+            )
+            if not message_indices:
+                return []
+        return sorted(message_indices)
+
+    ###
+    # Persistence
+    ###
+    @classmethod
+    def load_or_build(cls, dlt_file, index_file_path=None):
+        """Loads the persisted text index of the DLTFile or (re)builds it if missing or stale
+
+        :param DLTFile dlt_file: DLTFile (not compressed)
+        :param str index_file_path: Optional path of the index file (default: <dlt file>.sidx)
+        :returns: The text index of the DLTFile
+        :rtype: DLTTextIndex
+        """
+        dlt_file_path = dlt_file.get_file_path()
+        if index_file_path is None:
+            index_file_path = dlt_file_path + TEXT_INDEX_FILE_EXTENSION
+
+        text_index = cls.load(index_file_path)
+        if text_index is not None:
+            if text_index.is_valid_for(dlt_file_path, dlt_file.get_catalog()):
+                return text_index
+            logger.info("Text index {} is stale, rebuilding it".format(index_file_path))
+            text_index.close()
+
+        text_index = cls.build(dlt_file)
+        try:
+            text_index.save(index_file_path)
+        except OSError as e:
+            logger.warning(
+                "Text index {} could not be written: {}".format(index_file_path, e)
+            )
+        return text_index
+
+    @classmethod
+    def load(cls, index_file_path):
+        """Loads a persisted text index, returns None if it does not exist or is invalid"""
+        try:
+            with open(index_file_path, "rb") as index_file_descriptor:
+                index_mmap = mmap.mmap(
+                    index_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (OSError, ValueError):
+            return None
+
+        header_size = TEXT_INDEX_HEADER_STRUCT.size
+        if len(index_mmap) >= header_size:
+            (
+                magic,
+                version,
+                file_size,
+                file_mtime_ns,
+                message_count,
+                word_count,
+                lexicon_byte_size,
+                catalog_digest,
+            ) = TEXT_INDEX_HEADER_STRUCT.unpack_from(index_mmap)
+        if (
+            len(index_mmap) < header_size
+            or magic != TEXT_INDEX_MAGIC
+            or version != TEXT_INDEX_VERSION
+            or len(index_mmap) < header_size + lexicon_byte_size
+        ):
+            index_mmap.close()
+            logger.info("Ignoring invalid text index {}".format(index_file_path))
+            return None
+
+        # The lexicon is read completely, the postings stay memory-mapped
+        lexicon_bytes = index_mmap[header_size : header_size + lexicon_byte_size]
+        lexicon = dict()
+        position = 0
+        postings_position = 0
+        for _ in range(word_count):
+            word_byte_size, position = _decode_varint(lexicon_bytes, position)
+            word = lexicon_bytes[position : position + word_byte_size].decode("utf-8")
+            position += word_byte_size
+            message_count_of_word, position = _decode_varint(lexicon_bytes, position)
+            postings_byte_size, position = _decode_varint(lexicon_bytes, position)
+            lexicon[word] = (
+                postings_position,
+                postings_byte_size,
+                message_count_of_word,
+            )
+            postings_position += postings_byte_size
+        postings = memoryview(index_mmap)[header_size + lexicon_byte_size :]
+        return cls(
+            file_size,
+            file_mtime_ns,
+            message_count,
+            lexicon,
+            postings,
+            index_mmap,
+            catalog_digest,
+        )
+
+    def save(self, index_file_path):
+        """Writes the text index (atomically) to index_file_path"""
+        lexicon_bytes = bytearray()
+        postings = list()
+        # The postings are stored in the order of the lexicon
+        for word in sorted(self._lexicon):
+            position, byte_size, message_count = self._lexicon[word]
+            word_bytes = word.encode("utf-8")
+            _encode_varint(len(word_bytes), lexicon_bytes)
+            lexicon_bytes += word_bytes
+            _encode_varint(message_count, lexicon_bytes)
+            _encode_varint(byte_size, lexicon_bytes)
+            postings.append(self._postings[position : position + byte_size])
+
+        temporary_index_file_path = index_file_path + ".tmp"
+        with open(temporary_index_file_path, "wb") as index_file_descriptor:
+            index_file_descriptor.write(
+                TEXT_INDEX_HEADER_STRUCT.pack(
+                    TEXT_INDEX_MAGIC,
+                    TEXT_INDEX_VERSION,
+                    self._file_size,
+                    self._file_mtime_ns,
+                    self.message_count,
+                    len(self._lexicon),
+                    len(lexicon_bytes),
+                    self._catalog_digest,
+                )
+            )
+            index_file_descriptor.write(lexicon_bytes)
+            for word_postings in postings:
+                index_file_descriptor.write(word_postings)
+        os.replace(temporary_index_file_path, index_file_path)
+
+    @classmethod
+    def build(cls, dlt_file):
+        """Builds the text index by decoding the payloads of all messages of the DLTFile
+
+        :param DLTFile dlt_file: DLTFile (not compressed), its filter is not applied
+        :rtype: DLTTextIndex
+        """
+        dlt_file_path = dlt_file.get_file_path()
+        stat = os.stat(dlt_file_path)
+        offsets = dlt_file.get_index().offsets
+        dlt_file_view = memoryview(dlt_file.get_mmap())
+        catalog = dlt_file.get_catalog()
+
+        # Word -> [delta-encoded postings, last message index, number of messages]
+        words = dict()
+        try:
+            for message_index, offset in enumerate(offsets):
+                text = get_text(DLTMessage(dlt_file_view, offset, catalog=catalog))
+                if not text:
+                    continue
+                for word in set(tokenize(text)):
+                    entry = words.get(word)
+                    if entry is None:
+                        entry = words[word] = [bytearray(), 0, 0]
+                    _encode_varint(message_index - entry[1], entry[0])
+                    entry[1] = message_index
+                    entry[2] += 1
+        finally:
+            dlt_file_view.release()
+
+        lexicon = dict()
+        postings = bytearray()
+        for word, (word_postings, _, message_count) in words.items():
+            lexicon[word] = (len(postings), len(word_postings), message_count)
+            postings += word_postings
+        return cls(
+            stat.st_size,
+            stat.st_mtime_ns,
+            len(offsets),
+            lexicon,
+            postings,
+            catalog_digest=_get_catalog_digest(catalog),
+        )
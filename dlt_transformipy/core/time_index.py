@@ -0,0 +1,303 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from struct import Struct
+
+from dlt_transformipy import logger
+
+from dlt_transformipy.core.framing import DLTMessageFramer
+from dlt_transformipy.core.model.storage_header import (
+    STORAGE_HEADER_PATTERN,
+    STORAGE_HEADER_PATTERN_BYTE_SIZE,
+)
+
+TIME_INDEX_FILE_EXTENSION = ".tidx"
+TIME_INDEX_MAGIC = b"DLTTIDX\0"
+TIME_INDEX_VERSION = 1
+# magic, version, padding, dlt file size, dlt file mtime (ns), number of entries,
+# message interval, time interval (microseconds)
+TIME_INDEX_HEADER_STRUCT = Struct("<8sI4xQqQQQ")
+# seconds (int32), microseconds (uint32) of the storage header
+STORAGE_TIMESTAMP_STRUCT = Struct("<iI")
+# ONE ENTRY EVERY TIME_INDEX_MESSAGE_INTERVAL MESSAGES ...
+TIME_INDEX_MESSAGE_INTERVAL = 1024
+# ... OR EVERY TIME_INDEX_TIME_INTERVAL MICROSECONDS (storage time)
+TIME_INDEX_TIME_INTERVAL = 1000000
+
+# Columns of the time index (name, array typecode), times in microseconds
+TIME_INDEX_COLUMNS = (
+    ("offsets", "Q"),
+    # Earliest and latest storage time of the messages from one entry to the next
+    ("block_min_times", "q"),
+    ("block_max_times", "q"),
+)
+INT64_MIN = -(2**63)
+
+
+class DLTTimeIndex:
+    """Sparse index of storage time to byte offset of a storaged DLT file
+
+    Every entry is the offset of a message, one entry is created every
+    message_interval messages or whenever the storage time moved on by time_interval.
+    The earliest and latest time of the messages up to the next entry are kept, so
+    time ranges are found with a bisect even if the storage times are not ordered.
+    The index is persisted next to the DLT file (<dlt file>.tidx) and reused as long
+    as size and modification time of the DLT file do not change.
+    """
+
+    offsets = None
+    block_min_times = None
+    block_max_times = None
+    message_interval = TIME_INDEX_MESSAGE_INTERVAL
+    time_interval = TIME_INDEX_TIME_INTERVAL
+    _file_size = 0
+    _file_mtime_ns = 0
+    # Latest time of all messages before entry i
+    _prefix_max_times = None
+    # Earliest time of all messages from entry i on
+    _suffix_min_times = None
+    # Latest time of all messages
+    _max_time = INT64_MIN
+
+    def __init__(
+        self, file_size, file_mtime_ns, columns, message_interval, time_interval
+    ):
+        self._file_size = file_size
+        self._file_mtime_ns = file_mtime_ns
+        self.message_interval = message_interval
+        self.time_interval = time_interval
+        for name, _ in TIME_INDEX_COLUMNS:
+            setattr(self, name, columns[name])
+        self._prefix_max_times = [INT64_MIN] + list(
+            accumulate(self.block_max_times, max)
+        )[:-1]
+        self._suffix_min_times = list(accumulate(reversed(self.block_min_times), min))[
+            ::-1
+        ]
+        self._max_time = max(self.block_max_times, default=INT64_MIN)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def find_range(self, start_time=None, end_time=None):
+        """Returns the byte range which contains all messages of a time range
+
+        The range may contain messages outside of the time range, which have to be
+        skipped by the caller.
+
+        :param int start_time: Storage time (microseconds) of the first message
+        :param int end_time: Storage time (microseconds) behind the last message
+        :returns: Start offset and end offset (None: end of file), None if no message
+            is within the time range
+        :rtype: tuple
+        """
+        start_entry = 0
+        end_entry = len(self.offsets)
+        if start_time is not None:
+            # Last entry before which all messages are earlier than start_time
+            start_entry = max(bisect_left(self._prefix_max_times, start_time) - 1, 0)
+        if end_time is not None:
+            # First entry from which on all messages are at or after end_time
+            end_entry = bisect_left(self._suffix_min_times, end_time)
+        if start_entry >= end_entry or (
+            start_time is not None and start_time > self._max_time
+        ):
+            return None
+        end_offset = self.offsets[end_entry] if end_entry < len(self.offsets) else None
+        return self.offsets[start_entry], end_offset
+
+    def is_valid_for(self, dlt_file_path):
+        """Checks if the index still matches size and modification time of the DLT file"""
+        stat = os.stat(dlt_file_path)
+        return (
+            stat.st_size == self._file_size and stat.st_mtime_ns == self._file_mtime_ns
+        )
+
+    ###
+    # Persistence
+    ###
+    @classmethod
+    def load_or_build(
+        cls,
+        dlt_file_path,
+        index_file_path=None,
+        message_interval=TIME_INDEX_MESSAGE_INTERVAL,
+        time_interval=TIME_INDEX_TIME_INTERVAL,
+    ):
+        """Loads the persisted time index of the DLT file or (re)builds it if missing or stale
+
+        :param str dlt_file_path: Absolute Path + Filename of the DLT file
+        :param str index_file_path: Optional path of the index file (default: <dlt file>.tidx)
+        :param int message_interval: Maximum number of messages between two entries
+        :param int time_interval: Maximum storage time (microseconds) between two entries
+        :returns: The time index of the DLT file
+        :rtype: DLTTimeIndex
+        """
+        if index_file_path is None:
+            index_file_path = dlt_file_path + TIME_INDEX_FILE_EXTENSION
+
+        time_index = cls.load(index_file_path)
+        if time_index is not None:
+            if (
+                time_index.is_valid_for(dlt_file_path)
+                and time_index.message_interval == message_interval
+                and time_index.time_interval == time_interval
+            ):
+                return time_index
+            logger.info("Time index {} is stale, rebuilding it".format(index_file_path))
+
+        time_index = cls.build(dlt_file_path, message_interval, time_interval)
+        try:
+            time_index.save(index_file_path)
+        except OSError as e:
+            logger.warning(
+                "Time index {} could not be written: {}".format(index_file_path, e)
+            )
+        return time_index
+
+    @classmethod
+    def load(cls, index_file_path):
+        """Loads a persisted time index, returns None if it does not exist or is invalid"""
+        try:
+            with open(index_file_path, "rb") as index_file_descriptor:
+                index_bytes = index_file_descriptor.read()
+        except OSError:
+            return None
+
+        if len(index_bytes) < TIME_INDEX_HEADER_STRUCT.size:
+            return None
+        (
+            magic,
+            version,
+            file_size,
+            file_mtime_ns,
+            count,
+            message_interval,
+            time_interval,
+        ) = TIME_INDEX_HEADER_STRUCT.unpack_from(index_bytes)
+        expected_size = TIME_INDEX_HEADER_STRUCT.size + count * sum(
+            array(typecode).itemsize for _, typecode in TIME_INDEX_COLUMNS
+        )
+        if (
+            magic != TIME_INDEX_MAGIC
+            or version != TIME_INDEX_VERSION
+            or len(index_bytes) != expected_size
+        ):
+            logger.info("Ignoring invalid time index {}".format(index_file_path))
+            return None
+
+        columns = dict()
+        offset = TIME_INDEX_HEADER_STRUCT.size
+        for name, typecode in TIME_INDEX_COLUMNS:
+            column = array(typecode)
+            size = count * column.itemsize
+            column.frombytes(index_bytes[offset : offset + size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            columns[name] = column
+            offset += size
+        return cls(file_size, file_mtime_ns, columns, message_interval, time_interval)
+
+    def save(self, index_file_path):
+        """Writes the time index (atomically) to index_file_path"""
+        temporary_index_file_path = index_file_path + ".tmp"
+        with open(temporary_index_file_path, "wb") as index_file_descriptor:
+            index_file_descriptor.write(
+                TIME_INDEX_HEADER_STRUCT.pack(
+                    TIME_INDEX_MAGIC,
+                    TIME_INDEX_VERSION,
+                    self._file_size,
+                    self._file_mtime_ns,
+                    len(self),
+                    self.message_interval,
+                    self.time_interval,
+                )
+            )
+            for name, typecode in TIME_INDEX_COLUMNS:
+                column = array(typecode, getattr(self, name))
+                if sys.byteorder != "little":
+                    column.byteswap()
+                column.tofile(index_file_descriptor)
+        os.replace(temporary_index_file_path, index_file_path)
+
+    @classmethod
+    def build(
+        cls,
+        dlt_file_path,
+        message_interval=TIME_INDEX_MESSAGE_INTERVAL,
+        time_interval=TIME_INDEX_TIME_INTERVAL,
+    ):
+        """Builds the time index with a single framing pass (no DLTMessages are created)"""
+        stat = os.stat(dlt_file_path)
+        columns = {name: array(typecode) for name, typecode in TIME_INDEX_COLUMNS}
+        offsets = columns["offsets"]
+        block_min_times = columns["block_min_times"]
+        block_max_times = columns["block_max_times"]
+
+        with open(dlt_file_path, "rb") as dlt_file_descriptor:
+            if (
+                dlt_file_descriptor.read(STORAGE_HEADER_PATTERN_BYTE_SIZE)
+                != STORAGE_HEADER_PATTERN
+            ):
+                raise TypeError(
+                    "Provided DLT/binary file is not a storaged DLT file (DLT Storage Pattern was not found)"
+                )
+            dlt_mmap = mmap.mmap(
+                dlt_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        try:
+            block_messages = message_interval
+            block_start_time = block_min_time = block_max_time = 0
+            for message_start, _ in DLTMessageFramer().frame(dlt_mmap):
+                seconds, microseconds = STORAGE_TIMESTAMP_STRUCT.unpack_from(
+                    dlt_mmap, message_start + STORAGE_HEADER_PATTERN_BYTE_SIZE
+                )
+                time = seconds * 1000000 + microseconds
+                if (
+                    block_messages >= message_interval
+                    or time - block_start_time >= time_interval
+                ):
+                    if offsets:
+                        block_min_times.append(block_min_time)
+                        block_max_times.append(block_max_time)
+                    offsets.append(message_start)
+                    block_messages = 0
+                    block_start_time = block_min_time = block_max_time = time
+                block_messages += 1
+                if time < block_min_time:
+                    block_min_time = time
+                elif time > block_max_time:
+                    block_max_time = time
+            if offsets:
+                block_min_times.append(block_min_time)
+                block_max_times.append(block_max_time)
+        finally:
+            dlt_mmap.close()
+
+        return cls(
+            stat.st_size, stat.st_mtime_ns, columns, message_interval, time_interval
+        )
@@ -0,0 +1,361 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import hashlib
+import os
+from struct import Struct
+
+from dlt_transformipy import logger
+
+TRACE_CACHE_FILE_EXTENSION = ".dltc"
+TRACE_CACHE_MAGIC = b"DLTCACHE"
+TRACE_CACHE_VERSION = 2
+# magic, version, padding, dlt file size, dlt file mtime (ns), number of batches,
+# digest of samples of the dlt file, digest of the whole dlt file
+TRACE_CACHE_HEADER_STRUCT = Struct("<8sI4xQqQ16s16s")
+# byte size of the offsets, byte size of the marshalled arguments, number of skipped
+# bytes of a batch
+TRACE_CACHE_BATCH_STRUCT = Struct("<QQQ")
+# Default upper bound of the total size of the cache directory
+TRACE_CACHE_MAX_BYTE_SIZE = 2 * 1024 * 1024 * 1024
+# Block size used for hashing the DLT file
+DIGEST_BLOCK_SIZE = 1024 * 1024
+# Size of the samples at start, middle and end of the DLT file
+DIGEST_SAMPLE_BYTE_SIZE = 64 * 1024
+DIGEST_BYTE_SIZE = 16
+
+
+def get_default_cache_directory():
+    """Returns the default cache directory ($XDG_CACHE_HOME/dlt-transformipy)
+
+    :rtype: str
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "dlt-transformipy")
+
+
+def get_sample_digest(dlt_file_path):
+    """Returns the digest of the start, middle and end of a DLT file (cheap to compute)
+
+    :rtype: bytes
+    """
+    sample_digest = hashlib.blake2b(digest_size=DIGEST_BYTE_SIZE)
+    with open(dlt_file_path, "rb") as dlt_file_descriptor:
+        file_size = os.fstat(dlt_file_descriptor.fileno()).st_size
+        for position in (
+            0,
+            (file_size - DIGEST_SAMPLE_BYTE_SIZE) // 2,
+            file_size - DIGEST_SAMPLE_BYTE_SIZE,
+        ):
+            dlt_file_descriptor.seek(max(position, 0))
+            sample_digest.update(dlt_file_descriptor.read(DIGEST_SAMPLE_BYTE_SIZE))
+    return sample_digest.digest()
+
+
+def get_content_digest(dlt_file_path):
+    """Returns the digest of the whole content of a DLT file
+
+    :rtype: bytes
+    """
+    content_digest = hashlib.blake2b(digest_size=DIGEST_BYTE_SIZE)
+    with open(dlt_file_path, "rb") as dlt_file_descriptor:
+        while True:
+            block = dlt_file_descriptor.read(DIGEST_BLOCK_SIZE)
+            if not block:
+                break
+            content_digest.update(block)
+    return content_digest.digest()
+
+
+class TraceCache:
+    """Size-bounded cache of decoded DLT files (message offsets and payload arguments)
+
+    An entry is keyed by the path of the DLT file and the MessageCatalog used for
+    decoding. It stores the batches of ParallelDecoder.iter_batches, a reload only
+    unmarshals them instead of decoding every payload again. Batches are written while
+    they are decoded and read back one at a time, so the cache never holds a whole
+    decoded DLT file in memory.
+
+    An entry is valid as long as size, modification time and a sampled digest of the
+    DLT file match. If size or modification time changed, the digest of the whole
+    content decides (e.g. for a copied or touched but unchanged DLT file). If the total
+    size exceeds max_byte_size, the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_directory=None, max_byte_size=TRACE_CACHE_MAX_BYTE_SIZE):
+        """
+        :param str cache_directory: Directory of the cache entries (default: get_default_cache_directory())
+        :param int max_byte_size: Upper bound of the total size of all cache entries
+        """
+        self.cache_directory = cache_directory or get_default_cache_directory()
+        self.max_byte_size = max_byte_size
+
+    def get_key(self, dlt_file_path, catalog=None):
+        """Returns the key of the cache entry of a DLT file decoded with catalog
+
+        :param str dlt_file_path: Path of the DLT file
+        :param MessageCatalog catalog: Optional MessageCatalog used for decoding
+        :rtype: str
+        """
+        key = hashlib.blake2b(
+            os.path.realpath(dlt_file_path).encode("utf-8", "surrogateescape"),
+            digest_size=DIGEST_BYTE_SIZE,
+        )
+        if catalog is not None:
+            # The payloads of non-verbose messages depend on the catalog
+            key.update(catalog.get_digest())
+        return key.hexdigest()
+
+    def get_entry_path(self, key):
+        """Returns the path of the cache entry of a key
+
+        :rtype: str
+        """
+        return os.path.join(self.cache_directory, key + TRACE_CACHE_FILE_EXTENSION)
+
+    def load(self, dlt_file_path, catalog=None):
+        """Opens the cache entry of a DLT file
+
+        :param str dlt_file_path: Path of the DLT file
+        :param MessageCatalog catalog: Optional MessageCatalog used for decoding
+        :returns: Generator of the cached batches (see ParallelDecoder.iter_batches) or
+            None if there is no valid cache entry
+        :rtype: generator
+        """
+        entry_path = self.get_entry_path(self.get_key(dlt_file_path, catalog))
+        try:
+            entry_file_descriptor = open(entry_path, "r+b")
+        except OSError:
+            return None
+
+        try:
+            header = self._read_header(entry_file_descriptor)
+            if header is None or not self._is_valid_for(
+                entry_file_descriptor, header, dlt_file_path
+            ):
+                entry_file_descriptor.close()
+                return None
+            # The modification time orders the entries for the LRU eviction
+            os.utime(entry_path)
+        except OSError as error:
+            entry_file_descriptor.close()
+            logger.info("Ignoring trace cache entry {} ({})".format(entry_path, error))
+            return None
+        return self._iter_batches(entry_file_descriptor, header[2])
+
+    def save(self, dlt_file_path, batches, catalog=None):
+        """Writes the batches of a DLT file into its cache entry while they are consumed
+
+        The entry is only published (atomically) if all batches were consumed, then the
+        least recently used entries are evicted.
+
+        :param str dlt_file_path: Path of the DLT file
+        :param batches: Iterable of batches (see ParallelDecoder.iter_batches)
+        :param MessageCatalog catalog: Optional MessageCatalog used for decoding
+        :returns: Generator of the batches
+        :rtype: generator
+        """
+        entry_path = self.get_entry_path(self.get_key(dlt_file_path, catalog))
+        temporary_entry_path = "{}.{}.tmp".format(entry_path, os.getpid())
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            entry_file_descriptor = open(temporary_entry_path, "wb")
+            # The number of batches is only known at the end
+            entry_file_descriptor.write(bytes(TRACE_CACHE_HEADER_STRUCT.size))
+        except OSError as error:
+            self._log_write_error(entry_path, error)
+            entry_file_descriptor = None
+        if entry_file_descriptor is not None:
+            # Taken before decoding, a DLT file changed meanwhile invalidates the entry
+            stat = os.stat(dlt_file_path)
+            sample_digest = get_sample_digest(dlt_file_path)
+            content_digest = get_content_digest(dlt_file_path)
+
+        published = False
+        batch_count = 0
+        try:
+            for batch in batches:
+                if entry_file_descriptor is not None:
+                    try:
+                        offsets, arguments, skipped_bytes = batch
+                        entry_file_descriptor.write(
+                            TRACE_CACHE_BATCH_STRUCT.pack(
+                                len(offsets), len(arguments), skipped_bytes
+                            )
+                        )
+                        entry_file_descriptor.write(offsets)
+                        entry_file_descriptor.write(arguments)
+                    except OSError as error:
+                        # The cache is an optimization, reading the DLT file must not fail
+                        self._log_write_error(entry_path, error)
+                        entry_file_descriptor.close()
+                        entry_file_descriptor = None
+                batch_count += 1
+                yield batch
+
+            if entry_file_descriptor is not None:
+                try:
+                    entry_file_descriptor.seek(0)
+                    entry_file_descriptor.write(
+                        TRACE_CACHE_HEADER_STRUCT.pack(
+                            TRACE_CACHE_MAGIC,
+                            TRACE_CACHE_VERSION,
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            batch_count,
+                            sample_digest,
+                            content_digest,
+                        )
+                    )
+                    entry_file_descriptor.close()
+                    os.replace(temporary_entry_path, entry_path)
+                    published = True
+                except OSError as error:
+                    self._log_write_error(entry_path, error)
+        finally:
+            # Not published if the batches were not consumed completely
+            if entry_file_descriptor is not None:
+                entry_file_descriptor.close()
+            if not published:
+                try:
+                    os.remove(temporary_entry_path)
+                except OSError:
+                    pass
+        if published:
+            # Also removes the new entry if it exceeds max_byte_size on its own
+            self._evict(self.max_byte_size)
+
+    def get_byte_size(self):
+        """Returns the total size of all cache entries
+
+        :rtype: int
+        """
+        return sum(byte_size for _, _, byte_size in self._list_entries())
+
+    def clear(self):
+        """Removes all cache entries"""
+        for entry_path, _, _ in self._list_entries():
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+    def _log_write_error(self, entry_path, error):
+        logger.warning(
+            "Could not write trace cache entry {} ({})".format(entry_path, error)
+        )
+
+    def _read_header(self, entry_file_descriptor):
+        header_bytes = entry_file_descriptor.read(TRACE_CACHE_HEADER_STRUCT.size)
+        if len(header_bytes) != TRACE_CACHE_HEADER_STRUCT.size:
+            return None
+        header = TRACE_CACHE_HEADER_STRUCT.unpack(header_bytes)
+        if header[0] != TRACE_CACHE_MAGIC or header[1] != TRACE_CACHE_VERSION:
+            return None
+        return header[2:]
+
+    def _is_valid_for(self, entry_file_descriptor, header, dlt_file_path):
+        file_size, file_mtime_ns, batch_count, sample_digest, content_digest = header
+        stat = os.stat(dlt_file_path)
+        if stat.st_size != file_size:
+            return False
+        if get_sample_digest(dlt_file_path) != sample_digest:
+            return False
+        if stat.st_mtime_ns == file_mtime_ns:
+            return True
+        # Touched or copied: only the whole content decides
+        if get_content_digest(dlt_file_path) != content_digest:
+            return False
+        entry_file_descriptor.seek(0)
+        entry_file_descriptor.write(
+            TRACE_CACHE_HEADER_STRUCT.pack(
+                TRACE_CACHE_MAGIC,
+                TRACE_CACHE_VERSION,
+                stat.st_size,
+                stat.st_mtime_ns,
+                batch_count,
+                sample_digest,
+                content_digest,
+            )
+        )
+        entry_file_descriptor.seek(TRACE_CACHE_HEADER_STRUCT.size)
+        return True
+
+    def _iter_batches(self, entry_file_descriptor, batch_count):
+        with entry_file_descriptor:
+            for _ in range(batch_count):
+                batch_header = entry_file_descriptor.read(TRACE_CACHE_BATCH_STRUCT.size)
+                if len(batch_header) != TRACE_CACHE_BATCH_STRUCT.size:
+                    raise ValueError(
+                        "Trace cache entry {} is truncated".format(
+                            entry_file_descriptor.name
+                        )
+                    )
+                (
+                    offsets_byte_size,
+                    arguments_byte_size,
+                    skipped_bytes,
+                ) = TRACE_CACHE_BATCH_STRUCT.unpack(batch_header)
+                offsets = entry_file_descriptor.read(offsets_byte_size)
+                arguments = entry_file_descriptor.read(arguments_byte_size)
+                if (
+                    len(offsets) != offsets_byte_size
+                    or len(arguments) != arguments_byte_size
+                ):
+                    raise ValueError(
+                        "Trace cache entry {} is truncated".format(
+                            entry_file_descriptor.name
+                        )
+                    )
+                yield offsets, arguments, skipped_bytes
+
+    def _list_entries(self):
+        """Returns (path, mtime, size) of all cache entries"""
+        entries = list()
+        try:
+            directory_entries = list(os.scandir(self.cache_directory))
+        except OSError:
+            return entries
+        for directory_entry in directory_entries:
+            if not directory_entry.name.endswith(TRACE_CACHE_FILE_EXTENSION):
+                continue
+            try:
+                stat = directory_entry.stat()
+            except OSError:
+                continue
+            entries.append((directory_entry.path, stat.st_mtime_ns, stat.st_size))
+        return entries
+
+    def _evict(self, max_byte_size):
+        """Removes the least recently used entries until at most max_byte_size remain"""
+        entries = self._list_entries()
+        total_byte_size = sum(byte_size for _, _, byte_size in entries)
+        for entry_path, _, byte_size in sorted(entries, key=lambda entry: entry[1]):
+            if total_byte_size <= max_byte_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            logger.debug("Evicted trace cache entry {}".format(entry_path))
+            total_byte_size -= byte_size
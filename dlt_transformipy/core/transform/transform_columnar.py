@@ -0,0 +1,281 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Export of header fields and numeric arguments into memory-mappable NumPy columns
+
+The output directory contains one .npy file per column, so a column of a huge trace
+can be opened instantly with numpy.load(..., mmap_mode="r"):
+
+- offsets and the header columns of core.columnar.decode_header_columns
+- storage_ecu_id, ecu_id, apid and ctid as uint32 codes of the SymbolTable of the
+  DLTFile, dictionaries.json holds its IDs
+  (messages without an extended header get apid and ctid from the catalog)
+- argument_offsets (n + 1 entries): the arguments of message i are
+  argument_type[argument_offsets[i]:argument_offsets[i + 1]] (see ARGUMENT_TYPE_*)
+  and argument_value (int64, 0 for strings and raw data)
+"""
+
+import json
+import os
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from dlt_transformipy.core.columnar import decode_header_columns
+from dlt_transformipy.core.model.dlt_message import DLTMessage
+from dlt_transformipy.core.model.payload import RawData
+
+# Messages which are decoded and written per step
+COLUMNAR_CHUNK_SIZE = 1 << 18
+DICTIONARIES_FILE_NAME = "dictionaries.json"
+DICTIONARY_ENCODED_COLUMNS = ("storage_ecu_id", "ecu_id", "apid", "ctid")
+# Types of argument_type
+ARGUMENT_TYPE_OTHER = 0
+ARGUMENT_TYPE_BOOL = 1
+ARGUMENT_TYPE_INT = 2
+# UINT64 values above the int64 range, argument_value holds their two's complement
+# (recover them with argument_value.view(numpy.uint64))
+ARGUMENT_TYPE_UINT64 = 3
+ARGUMENT_TYPE_STRG = 4
+ARGUMENT_TYPE_RAWD = 5
+INT64_MAX = 2**63 - 1
+
+# .npy version 1.0 header (magic, version, header length) with a fixed size, so the
+# final shape can be written when all rows are known
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_BYTE_SIZE = 128
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "numpy is required for the columnar export (pip install numpy)"
+        )
+
+
+class NpyColumnWriter:
+    """Appends chunks to a one-dimensional .npy file of unknown final length"""
+
+    _file = None
+    _dtype = None
+    _length = 0
+
+    def __init__(self, npy_file_path, dtype):
+        self._dtype = np.dtype(dtype)
+        self._length = 0
+        self._file = open(npy_file_path, "wb")
+        self._write_header()
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self._dtype)
+        self._file.write(values.tobytes())
+        self._length += len(values)
+
+    def close(self):
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+    def _write_header(self):
+        header = "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}".format(
+            np.lib.format.dtype_to_descr(self._dtype), self._length
+        )
+        header_byte_size = NPY_HEADER_BYTE_SIZE - len(NPY_MAGIC) - 2
+        self._file.write(
+            NPY_MAGIC
+            + header_byte_size.to_bytes(2, "little")
+            + header.ljust(header_byte_size - 1).encode("latin1")
+            + b"\n"
+        )
+
+
+def _encode_ids(symbol_table, column):
+    """Dictionary encoding of a fixed size ID column with the codes of the SymbolTable"""
+    uniques, inverse = np.unique(column, return_inverse=True)
+    get_id = symbol_table.get_id
+    codes = np.fromiter(
+        (
+            symbol_table.get_code_of_id(get_id(id_bytes))
+            for id_bytes in uniques.tolist()
+        ),
+        dtype=np.uint32,
+        count=len(uniques),
+    )
+    return codes[inverse.reshape(-1)]
+
+
+def _fill_catalog_ids(columns, dlt_file_view, offsets, catalog):
+    """Fills APID/CTID of the messages without an extended header from the catalog"""
+    for row in np.flatnonzero(~columns["use_extended_header"]).tolist():
+        ids = DLTMessage(dlt_file_view, int(offsets[row]), catalog=catalog).get_ids()
+        if ids is not None:
+            columns["apid"][row] = ids[0].encode("utf8")
+            columns["ctid"][row] = ids[1].encode("utf8")
+
+
+def _argument_columns(messages, argument_offsets, argument_types, argument_values):
+    """Appends the payload arguments of the messages to the CSR argument columns"""
+    for message in messages:
+        for argument in message.payload:
+            argument_type = type(argument)
+            if argument_type is bool:
+                argument_types.append(ARGUMENT_TYPE_BOOL)
+                argument_values.append(argument)
+            elif argument_type is int:
+                if argument > INT64_MAX:
+                    argument_types.append(ARGUMENT_TYPE_UINT64)
+                    argument_values.append(argument - 2**64)
+                else:
+                    argument_types.append(ARGUMENT_TYPE_INT)
+                    argument_values.append(argument)
+            else:
+                argument_types.append(
+                    ARGUMENT_TYPE_RAWD
+                    if argument_type is RawData
+                    else (
+                        ARGUMENT_TYPE_STRG
+                        if argument_type is str
+                        else ARGUMENT_TYPE_OTHER
+                    )
+                )
+                argument_values.append(0)
+        argument_offsets.append(len(argument_types))
+
+
+def transform(dlt_file, output_directory, chunk_size=None):
+    """Writes the header fields and numeric arguments of all DLTMessages as .npy columns
+
+    :param DLTFile dlt_file: DLTFile which shall be transformed
+    :param str output_directory: Directory of the columns (created if missing)
+    :param int chunk_size: Optional number of messages decoded per step
+    :returns: Number of exported messages
+    :rtype: int
+    """
+    _require_numpy()
+    chunk_size = chunk_size or COLUMNAR_CHUNK_SIZE
+    os.makedirs(output_directory, exist_ok=True)
+
+    dlt_mmap = dlt_file.get_mmap()
+    dlt_file_view = memoryview(dlt_mmap)
+    dlt_filter = dlt_file.get_filter()
+    catalog = dlt_file.get_catalog()
+    symbol_table = dlt_file.get_symbol_table()
+    all_offsets = np.frombuffer(dlt_file.get_index().offsets, dtype=np.uint64)
+
+    writers = dict()
+    argument_offset = 0
+    number_of_messages = 0
+
+    def write(name, values):
+        if name not in writers:
+            writers[name] = NpyColumnWriter(
+                os.path.join(output_directory, name + ".npy"), values.dtype
+            )
+        writers[name].append(values)
+
+    try:
+        write("argument_offsets", np.zeros(1, dtype=np.int64))
+        # An empty DLT file still gets (empty) columns
+        for chunk_start in range(0, max(len(all_offsets), 1), chunk_size):
+            offsets = all_offsets[chunk_start : chunk_start + chunk_size]
+            if dlt_filter is not None:
+                offsets = offsets[
+                    np.fromiter(
+                        (
+                            dlt_filter.matches(dlt_mmap, offset)
+                            for offset in offsets.tolist()
+                        ),
+                        dtype=bool,
+                        count=len(offsets),
+                    )
+                ]
+
+            write("offsets", offsets)
+            columns = decode_header_columns(dlt_mmap, offsets)
+            if catalog is not None:
+                _fill_catalog_ids(columns, dlt_file_view, offsets, catalog)
+            for name, column in columns.items():
+                if name in DICTIONARY_ENCODED_COLUMNS:
+                    column = _encode_ids(symbol_table, column)
+                write(name, column)
+
+            argument_offsets = array("q")
+            argument_types = array("B")
+            argument_values = array("q")
+            _argument_columns(
+                (
+                    DLTMessage(
+                        dlt_file_view,
+                        offset,
+                        catalog=catalog,
+                        symbol_table=symbol_table,
+                    )
+                    for offset in offsets.tolist()
+                ),
+                argument_offsets,
+                argument_types,
+                argument_values,
+            )
+            write(
+                "argument_offsets",
+                np.frombuffer(argument_offsets, dtype=np.int64) + argument_offset,
+            )
+            write("argument_type", np.frombuffer(argument_types, dtype=np.uint8))
+            write("argument_value", np.frombuffer(argument_values, dtype=np.int64))
+            argument_offset += len(argument_types)
+            number_of_messages += len(offsets)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        dlt_file_view.release()
+
+    with open(
+        os.path.join(output_directory, DICTIONARIES_FILE_NAME), "w", encoding="utf8"
+    ) as f:
+        # The codes of all columns index the IDs of the DLTFile's SymbolTable
+        json.dump({name: symbol_table.ids for name in DICTIONARY_ENCODED_COLUMNS}, f)
+    return number_of_messages
+
+
+def load_columns(output_directory, mmap_mode="r"):
+    """Opens the columns written by transform
+
+    :param str output_directory: Directory of the columns
+    :param str mmap_mode: Memory-map mode of numpy.load (None reads the columns into memory)
+    :returns: Dictionary of column name to NumPy array and the dictionaries of the
+        dictionary-encoded columns (column name to list of strings)
+    :rtype: tuple
+    """
+    _require_numpy()
+    columns = dict()
+    for file_name in os.listdir(output_directory):
+        if file_name.endswith(".npy"):
+            columns[file_name[: -len(".npy")]] = np.load(
+                os.path.join(output_directory, file_name), mmap_mode=mmap_mode
+            )
+    with open(
+        os.path.join(output_directory, DICTIONARIES_FILE_NAME), encoding="utf8"
+    ) as f:
+        dictionaries = json.load(f)
+    return columns, dictionaries
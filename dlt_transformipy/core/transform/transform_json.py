@@ -0,0 +1,201 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import base64
+import datetime
+import gzip
+import json
+import queue
+import threading
+
+from dlt_transformipy.core.helpers import write_chunks
+from dlt_transformipy.core.model.payload import RawData
+
+# Messages which are rendered into one string and written at once
+JSON_BATCH_SIZE = 10000
+# Rendered batches which may wait for the compression thread
+COMPRESSION_QUEUE_SIZE = 8
+# zlib's default level, level 9 (gzip's default) is much slower for little gain
+GZIP_COMPRESS_LEVEL = 6
+RAW_ENCODINGS = ("hex", "base64")
+
+_encode = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, separators=(",", ":")
+).encode
+
+
+def transform(dlt_file, output_file_path, raw_encoding=None, compress=None):
+    """Writes all DLTMessages of the DLTFile as JSON Lines (one JSON object per line)
+
+    :param DLTFile dlt_file: DLTFile (or MergedDLTFile) which shall be transformed
+    :param str output_file_path: Absolute Path + Filename of the JSON Lines file to write
+    :param str raw_encoding: Encoding of raw data, 'hex' (default) or 'base64'
+    :param bool compress: Write gzip compressed output (default: if the path ends with .gz)
+    :returns: Number of written lines (DLTMessages)
+    :rtype: int
+    """
+    if raw_encoding is None:
+        raw_encoding = "hex"
+    if raw_encoding not in RAW_ENCODINGS:
+        raise ValueError(
+            "Unsupported raw encoding '{}' (supported: {})".format(
+                raw_encoding, ", ".join(RAW_ENCODINGS)
+            )
+        )
+    if compress is None:
+        compress = output_file_path.endswith(".gz")
+
+    chunks = render_lines(dlt_file.iter_messages(), raw_encoding)
+    if compress:
+        return _write_compressed(chunks, output_file_path)
+    with open(output_file_path, "w", encoding="utf8") as f:
+        return write_chunks(chunks, f.write)
+
+
+def render_lines(messages, raw_encoding="hex", message_idx=0):
+    """Renders DLTMessages as JSON Lines
+
+    The payload arguments keep their types, strings lose their terminating NUL character
+    and raw data is written as {"hex": "..."} or {"base64": "..."}.
+
+    :param messages: Iterable of DLTMessages
+    :param str raw_encoding: Encoding of raw data, 'hex' or 'base64'
+    :param int message_idx: Index of the first DLTMessage
+    :returns: Generator of strings with up to JSON_BATCH_SIZE lines each, it returns the
+        number of rendered lines
+    :rtype: str
+    """
+    first_message_idx = message_idx
+    if raw_encoding == "base64":
+
+        def encode_raw(raw_data):
+            return {"base64": base64.b64encode(raw_data.to_bytes()).decode("ascii")}
+
+    else:
+
+        def encode_raw(raw_data):
+            return {"hex": str(raw_data)}
+
+    # Messages of the same second share the formatted date
+    cached_seconds = None
+    cached_date = None
+    lines = list()
+    for message in messages:
+        storage_header = message.storage_header
+        standard_header = message.standard_header
+        header_type = standard_header.header_type
+
+        if storage_header.timestamp_seconds != cached_seconds:
+            cached_seconds = storage_header.timestamp_seconds
+            cached_date = datetime.datetime.utcfromtimestamp(cached_seconds).isoformat()
+
+        if header_type.use_extended_header:
+            extended_header = message.extended_header
+            apid = extended_header.apid
+            ctid = extended_header.ctid
+            mode = "verbose" if extended_header.message_info.verbose else "non-verbose"
+            noar = extended_header.noar
+        else:
+            # Non-verbose messages get their APID/CTID from the catalog (if known)
+            apid, ctid = message.get_ids() or (None, None)
+            mode = noar = None
+
+        payload = list()
+        for argument in message.payload:
+            argument_type = type(argument)
+            if argument_type is RawData:
+                argument = encode_raw(argument)
+            elif argument_type is str:
+                argument = argument.rstrip("\0")
+            payload.append(argument)
+
+        lines.append(
+            _encode(
+                {
+                    "index": message_idx,
+                    "date_time": "{}.{:06d}Z".format(
+                        cached_date, storage_header.timestamp_microseconds
+                    ),
+                    "timestamp": standard_header.timestamp,
+                    "count": standard_header.message_counter,
+                    "ecu_id": storage_header.ecu_id,
+                    "apid": apid,
+                    "ctid": ctid,
+                    "session_id": standard_header.session_id,
+                    "mode": mode,
+                    "noar": noar,
+                    "payload": payload,
+                }
+            )
+        )
+        lines.append("\n")
+        message_idx += 1
+
+        if len(lines) >= 2 * JSON_BATCH_SIZE:
+            yield "".join(lines)
+            lines = list()
+    if lines:
+        yield "".join(lines)
+    return message_idx - first_message_idx
+
+
+def _write_compressed(chunks, output_file_path):
+    """Compresses and writes the chunks in a separate thread while the next ones render
+
+    zlib releases the GIL while compressing, so rendering and compression overlap.
+    """
+    pending_chunks = queue.Queue(maxsize=COMPRESSION_QUEUE_SIZE)
+    errors = list()
+
+    def compress():
+        try:
+            with gzip.open(
+                output_file_path, "wb", compresslevel=GZIP_COMPRESS_LEVEL
+            ) as f:
+                while True:
+                    chunk = pending_chunks.get()
+                    if chunk is None:
+                        return
+                    f.write(chunk)
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+            # Keep consuming, so the rendering thread is not blocked
+            while pending_chunks.get() is not None:
+                pass
+
+    compression_thread = threading.Thread(
+        target=compress, name="dlt-transformipy-gzip", daemon=True
+    )
+    compression_thread.start()
+
+    def put(chunk):
+        if errors:
+            raise errors[0]
+        pending_chunks.put(chunk.encode("utf8"))
+
+    try:
+        number_of_lines = write_chunks(chunks, put)
+    finally:
+        pending_chunks.put(None)
+        compression_thread.join()
+    if errors:
+        raise errors[0]
+    return number_of_lines
@@ -0,0 +1,169 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import sqlite3
+
+from dlt_transformipy.core.model.payload import RawData
+
+# Rows which are inserted per executemany call
+SQLITE_BATCH_SIZE = 50000
+INT64_MAX = 2**63 - 1
+
+SCHEMA = (
+    "DROP TABLE IF EXISTS messages",
+    "DROP TABLE IF EXISTS arguments",
+    """CREATE TABLE messages (
+        id INTEGER PRIMARY KEY,
+        time REAL,
+        timestamp INTEGER,
+        count INTEGER,
+        ecu_id TEXT,
+        apid TEXT,
+        ctid TEXT,
+        session_id INTEGER,
+        message_type INTEGER,
+        message_type_info INTEGER,
+        verbose INTEGER,
+        noar INTEGER,
+        payload TEXT
+    )""",
+    """CREATE TABLE arguments (
+        message_id INTEGER,
+        position INTEGER,
+        type TEXT,
+        value
+    )""",
+)
+# Created after the load, maintaining them while inserting is much slower
+INDEXES = (
+    "CREATE INDEX messages_time ON messages (time)",
+    "CREATE INDEX messages_apid_ctid ON messages (apid, ctid)",
+    "CREATE INDEX messages_ecu_id ON messages (ecu_id)",
+    "CREATE INDEX arguments_message_id ON arguments (message_id)",
+)
+INSERT_MESSAGE = "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_ARGUMENT = "INSERT INTO arguments VALUES (?, ?, ?, ?)"
+
+
+def transform(dlt_file, db_path):
+    """Writes all DLTMessages of the DLTFile into the messages and arguments tables
+
+    Existing messages/arguments tables of the database are replaced. The message
+    type and message type info (e.g. the log level) are stored like the DLTFilter
+    constants (MESSAGE_TYPE_LOG, LOG_ERROR, ...), time is the storage time in seconds.
+
+    :param DLTFile dlt_file: DLTFile (or MergedDLTFile) which shall be transformed
+    :param str db_path: Absolute Path + Filename of the SQLite database
+    :returns: Number of exported messages
+    :rtype: int
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        # No rollback journal and no fsyncs while loading, the database is rebuilt
+        # from the DLT file anyway if the load fails
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("BEGIN")
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+        message_rows = list()
+        argument_rows = list()
+        for message_id, message in enumerate(dlt_file.iter_messages()):
+            message_rows.append(_message_row(message_id, message, argument_rows))
+            if len(message_rows) >= SQLITE_BATCH_SIZE:
+                connection.executemany(INSERT_MESSAGE, message_rows)
+                connection.executemany(INSERT_ARGUMENT, argument_rows)
+                message_rows = list()
+                argument_rows = list()
+        connection.executemany(INSERT_MESSAGE, message_rows)
+        connection.executemany(INSERT_ARGUMENT, argument_rows)
+
+        for statement in INDEXES:
+            connection.execute(statement)
+        connection.execute("COMMIT")
+        number_of_messages = connection.execute(
+            "SELECT COUNT(*) FROM messages"
+        ).fetchone()[0]
+
+        connection.execute("PRAGMA journal_mode = DELETE")
+        connection.execute("PRAGMA synchronous = FULL")
+    finally:
+        connection.close()
+    return number_of_messages
+
+
+def _message_row(message_id, message, argument_rows):
+    storage_header = message.storage_header
+    standard_header = message.standard_header
+    if standard_header.header_type.use_extended_header:
+        extended_header = message.extended_header
+        message_info = extended_header.message_info
+        apid = extended_header.apid
+        ctid = extended_header.ctid
+        message_type = message_info.message_type >> 1
+        message_type_info = message_info.message_type_info >> 4
+        verbose = 1 if message_info.verbose else 0
+        noar = extended_header.noar
+    else:
+        # Non-verbose messages get their APID/CTID from the catalog (if known)
+        apid, ctid = message.get_ids() or (None, None)
+        message_type = message_type_info = verbose = noar = None
+
+    payload = list()
+    for position, argument in enumerate(message.payload):
+        argument_type = type(argument)
+        if argument_type is bool:
+            argument_rows.append((message_id, position, "BOOL", int(argument)))
+        elif argument_type is int:
+            # SQLite integers are signed 64 bit
+            argument_rows.append(
+                (
+                    message_id,
+                    position,
+                    "INT",
+                    argument if argument <= INT64_MAX else str(argument),
+                )
+            )
+        elif argument_type is RawData:
+            argument_rows.append((message_id, position, "RAWD", argument.to_bytes()))
+        else:
+            argument_rows.append(
+                (message_id, position, "STRG", str(argument).rstrip("\0"))
+            )
+        payload.append(str(argument))
+
+    return (
+        message_id,
+        storage_header.timestamp_seconds
+        + storage_header.timestamp_microseconds / 1000000,
+        standard_header.timestamp,
+        standard_header.message_counter,
+        storage_header.ecu_id,
+        apid,
+        ctid,
+        standard_header.session_id,
+        message_type,
+        message_type_info,
+        verbose,
+        noar,
+        " ".join(payload).replace("\0", ""),
+    )
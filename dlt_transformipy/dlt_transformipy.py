@@ -19,26 +19,172 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+from dlt_transformipy.core.merge import MergedDLTFile, MERGE_REORDER_WINDOW
 from dlt_transformipy.core.model.dlt_file import DLTFile
-from dlt_transformipy.core.transform import transform_csv
+from dlt_transformipy.core.stats import compute_stats
+from dlt_transformipy.core.stream import DLTStreamClient, DLT_DAEMON_PORT
+from dlt_transformipy.core.trace_cache import TraceCache
+from dlt_transformipy.core.transform import (
+    transform_csv,
+    transform_json,
+    transform_columnar,
+    transform_sqlite,
+)
 
 
-def load(file_path):
+def load(file_path, use_mmap=False, dlt_filter=None, catalog=None, cache=None):
     """Load the file_path as a DLT File
 
     :param str file_path: Absolute Path + Filename of the DLT file to load
+    :param bool use_mmap: Memory-map the DLT file instead of reading it block by block
+    :param DLTFilter dlt_filter: Optional filter, only matching messages are read and transformed
+    :param catalog: Optional MessageCatalog (or path of a FIBEX file) to decode non-verbose messages
+    :param cache: Cache the decoded DLT file for instant reloads (True: default cache directory,
+        str: cache directory, TraceCache object)
     :returns: A DLTFile object
     :rtype: DLTFile object
     """
-    dlt_file = DLTFile(file_path)
+    if cache is True:
+        cache = TraceCache()
+    elif isinstance(cache, str):
+        cache = TraceCache(cache)
+    elif not cache:
+        cache = None
+    dlt_file = DLTFile(
+        file_path,
+        use_mmap=use_mmap,
+        dlt_filter=dlt_filter,
+        catalog=catalog,
+        trace_cache=cache,
+    )
     return dlt_file
 
 
-def as_csv(dlt_file, output_file_path, separator=None):
+def stats(file_path, dlt_filter=None):
+    """Computes a summary of the DLT File in one pass over its raw bytes (no DLTMessages are created)
+
+    The summary contains the message counts per ECU/APID/CTID/message type/log level, the
+    messages per second, a histogram of the payload sizes and the gaps of the message counters.
+
+    :param str file_path: Absolute Path + Filename of the DLT file (may be compressed)
+    :param DLTFilter dlt_filter: Optional filter, only matching messages are counted
+    :returns: A TraceStats object
+    :rtype: TraceStats object
+    """
+    return compute_stats(file_path, dlt_filter)
+
+
+def merge(dlt_files, reorder_window=MERGE_REORDER_WINDOW):
+    """Merges several DLT Files (e.g. one per ECU or rotated DLT files) into one stream ordered by storage time
+
+    The DLT Files are read while the merged stream is consumed (k-way merge), the merged
+    DLTMessages are never held in memory. The result can be transformed with as_csv, as_jsonl and as_sqlite.
+
+    :param dlt_files: Iterable of DLTFile objects
+    :param int reorder_window: Number of messages of each DLT file which are reordered by time before they are merged
+    :returns: A MergedDLTFile object
+    :rtype: MergedDLTFile object
+    """
+    return MergedDLTFile(dlt_files, reorder_window)
+
+
+def connect(
+    host,
+    port=DLT_DAEMON_PORT,
+    storage_file_path=None,
+    csv_file_path=None,
+    dlt_filter=None,
+    catalog=None,
+):
+    """Creates a client for the live DLT stream of a dlt-daemon (asyncio)
+
+    The connection is opened with 'async with' (or 'await client.connect()'), the
+    DLTMessages are received with 'async for' over client.iter_messages() or
+    client.iter_batches().
+
+    :param str host: Host of the dlt-daemon
+    :param int port: TCP port of the dlt-daemon (default: 3490)
+    :param str storage_file_path: Optional DLT file which the received messages are written to
+    :param str csv_file_path: Optional CSV file which the received messages are written to
+    :param DLTFilter dlt_filter: Optional filter, only matching messages are delivered and written
+    :param catalog: Optional MessageCatalog (or path of a FIBEX file) to decode non-verbose messages
+    :returns: A DLTStreamClient object
+    :rtype: DLTStreamClient object
+    """
+    return DLTStreamClient(
+        host,
+        port,
+        storage_file_path=storage_file_path,
+        csv_file_path=csv_file_path,
+        dlt_filter=dlt_filter,
+        catalog=catalog,
+    )
+
+
+def as_csv(dlt_file, output_file_path, separator=None, workers=None):
     """Transforms the given DLTFile to a CSV file and writes the result to the specified output path
 
+    The DLTMessages are streamed, the DLTFile is not read into memory (unless it was read before).
+
     :param DLTFile dlt_file: DLTFIle which shall be transformed
     :param str output_file_path: Absolute Path + Filename of the CSV file to write
     :param str separator: Optional separator used in CSV file (default: ';')
+    :param int workers: Optional number of worker processes which render the CSV rows in parallel
+    :returns: Number of exported messages
+    :rtype: int
+    """
+    return transform_csv.transform(
+        dlt_file, output_file_path, separator, workers=workers
+    )
+
+
+def as_jsonl(dlt_file, output_file_path, raw_encoding=None, compress=None):
+    """Transforms the given DLTFile to JSON Lines (one JSON object per message) and writes the result to the specified output path
+
+    The DLTMessages are streamed and the payload arguments keep their types.
+
+    :param DLTFile dlt_file: DLTFIle which shall be transformed
+    :param str output_file_path: Absolute Path + Filename of the JSON Lines file to write
+    :param str raw_encoding: Optional encoding of raw data, 'hex' (default) or 'base64'
+    :param bool compress: Optional gzip compression (default: if output_file_path ends with .gz)
+    :returns: Number of exported messages
+    :rtype: int
+    """
+    return transform_json.transform(dlt_file, output_file_path, raw_encoding, compress)
+
+
+def as_sqlite(dlt_file, db_path):
+    """Transforms the given DLTFile into the tables messages and arguments of a SQLite database
+
+    The DLTMessages are streamed, indexes on time, APID/CTID and ECU are created after the load.
+
+    :param DLTFile dlt_file: DLTFIle which shall be transformed
+    :param str db_path: Absolute Path + Filename of the SQLite database (existing tables are replaced)
+    :returns: Number of exported messages
+    :rtype: int
+    """
+    return transform_sqlite.transform(dlt_file, db_path)
+
+
+def as_npy(dlt_file, output_directory):
+    """Transforms the given DLTFile to memory-mappable NumPy columns (one .npy file per column) in the specified directory
+
+    Header fields and numeric arguments are written as columns, ECU/APID/CTID are dictionary-encoded
+    (see core.transform.transform_columnar). Requires numpy.
+
+    :param DLTFile dlt_file: DLTFIle which shall be transformed
+    :param str output_directory: Directory of the columns (created if missing)
+    :returns: Number of exported messages
+    :rtype: int
+    """
+    return transform_columnar.transform(dlt_file, output_directory)
+
+
+def load_columns(output_directory):
+    """Opens the columns written by as_npy (memory-mapped, nothing is parsed)
+
+    :param str output_directory: Directory of the columns
+    :returns: Dictionary of column name to NumPy array and the dictionaries of the dictionary-encoded columns
+    :rtype: tuple
     """
-    transform_csv.transform(dlt_file, output_file_path, separator)
\ No newline at end of file
+    return transform_columnar.load_columns(output_directory)
@@ -0,0 +1,237 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+from struct import pack
+
+import pytest
+
+from benchmarks.synthetic import build_message
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.catalog import MessageCatalog
+
+FIBEX = """<?xml version="1.0" encoding="UTF-8"?>
+<fx:FIBEX xmlns:fx="http://www.asam.net/xml/fbx" xmlns:ho="http://www.asam.net/xml">
+  <fx:ELEMENTS>
+    <fx:FRAMES>
+      <fx:FRAME ID="ID_10">
+        <ho:SHORT-NAME>ID_10</ho:SHORT-NAME>
+        <fx:PDU-INSTANCES>
+          <fx:PDU-INSTANCE ID="P_10_1">
+            <fx:PDU-REF ID-REF="PDU_10_1"/>
+            <fx:SEQUENCE-NUMBER>1</fx:SEQUENCE-NUMBER>
+          </fx:PDU-INSTANCE>
+          <fx:PDU-INSTANCE ID="P_10_0">
+            <fx:PDU-REF ID-REF="PDU_10_0"/>
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+          </fx:PDU-INSTANCE>
+          <fx:PDU-INSTANCE ID="P_10_2">
+            <fx:PDU-REF ID-REF="PDU_10_2"/>
+            <fx:SEQUENCE-NUMBER>2</fx:SEQUENCE-NUMBER>
+          </fx:PDU-INSTANCE>
+        </fx:PDU-INSTANCES>
+        <fx:MANUFACTURER-EXTENSION>
+          <APPLICATION_ID>APP1</APPLICATION_ID>
+          <CONTEXT_ID>CTX1</CONTEXT_ID>
+        </fx:MANUFACTURER-EXTENSION>
+      </fx:FRAME>
+      <fx:FRAME ID="ID_11">
+        <fx:PDU-INSTANCES>
+          <fx:PDU-INSTANCE ID="P_11_0">
+            <fx:PDU-REF ID-REF="PDU_11_0"/>
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+          </fx:PDU-INSTANCE>
+        </fx:PDU-INSTANCES>
+        <fx:MANUFACTURER-EXTENSION>
+          <APPLICATION_ID>APP2</APPLICATION_ID>
+          <CONTEXT_ID>CTX2</CONTEXT_ID>
+        </fx:MANUFACTURER-EXTENSION>
+      </fx:FRAME>
+      <fx:FRAME ID="ID_12">
+        <fx:PDU-INSTANCES>
+          <fx:PDU-INSTANCE ID="P_12_0">
+            <fx:PDU-REF ID-REF="PDU_12_0"/>
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+          </fx:PDU-INSTANCE>
+        </fx:PDU-INSTANCES>
+      </fx:FRAME>
+    </fx:FRAMES>
+    <fx:PDUS>
+      <fx:PDU ID="PDU_10_0">
+        <ho:DESC>Speed:</ho:DESC>
+      </fx:PDU>
+      <fx:PDU ID="PDU_10_1">
+        <fx:SIGNAL-INSTANCES>
+          <fx:SIGNAL-INSTANCE ID="S_10_1">
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+            <fx:SIGNAL-REF ID-REF="S_UINT16"/>
+          </fx:SIGNAL-INSTANCE>
+        </fx:SIGNAL-INSTANCES>
+      </fx:PDU>
+      <fx:PDU ID="PDU_10_2">
+        <fx:SIGNAL-INSTANCES>
+          <fx:SIGNAL-INSTANCE ID="S_10_2">
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+            <fx:SIGNAL-REF ID-REF="S_STRG_ASCII"/>
+          </fx:SIGNAL-INSTANCE>
+        </fx:SIGNAL-INSTANCES>
+      </fx:PDU>
+      <fx:PDU ID="PDU_11_0">
+        <fx:SIGNAL-INSTANCES>
+          <fx:SIGNAL-INSTANCE ID="S_11_0">
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+            <fx:SIGNAL-REF ID-REF="S_SINT32"/>
+          </fx:SIGNAL-INSTANCE>
+        </fx:SIGNAL-INSTANCES>
+      </fx:PDU>
+      <fx:PDU ID="PDU_12_0">
+        <fx:SIGNAL-INSTANCES>
+          <fx:SIGNAL-INSTANCE ID="S_12_0">
+            <fx:SEQUENCE-NUMBER>0</fx:SEQUENCE-NUMBER>
+            <fx:SIGNAL-REF ID-REF="S_FLOA128"/>
+          </fx:SIGNAL-INSTANCE>
+        </fx:SIGNAL-INSTANCES>
+      </fx:PDU>
+    </fx:PDUS>
+  </fx:ELEMENTS>
+</fx:FIBEX>
+"""
+
+
+def non_verbose_payload(message_id, data, big_endian=False):
+    return pack(">I" if big_endian else "<I", message_id) + data
+
+
+def build_messages():
+    yield build_message(
+        verbose=False,
+        payload=non_verbose_payload(10, pack("<H", 120) + pack("<H", 4) + b"km/h"),
+    )
+    # Non-verbose messages are often sent without extended header
+    yield build_message(
+        extended_header=False, payload=non_verbose_payload(11, pack("<i", -5))
+    )
+    yield build_message(
+        extended_header=False,
+        big_endian=True,
+        payload=non_verbose_payload(11, pack(">i", -6), big_endian=True),
+    )
+    # Unknown message ID, unsupported signal and truncated payload stay undecoded
+    yield build_message(verbose=False, payload=non_verbose_payload(99, b"\x01"))
+    yield build_message(verbose=False, payload=non_verbose_payload(12, b"\x01"))
+    yield build_message(verbose=False, payload=non_verbose_payload(11, b"\x01"))
+
+
+@pytest.fixture
+def fibex_file_path(tmp_path):
+    fibex_file_path = tmp_path / "catalog.xml"
+    fibex_file_path.write_text(FIBEX)
+    return str(fibex_file_path)
+
+
+def test_parse_fibex(fibex_file_path):
+    catalog = MessageCatalog.parse_fibex(fibex_file_path)
+    assert len(catalog) == 2 and 12 not in catalog
+    apid, ctid, signature, texts = catalog.get_entry(10)
+    assert (apid, ctid) == ("APP1", "CTX1")
+    assert signature == (0x42, 0x200)
+    assert texts == ((0, "Speed:"),)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_decode_non_verbose(fibex_file_path, tmp_path, workers):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(b"".join(build_messages()))
+
+    dlt_file = dlt_transformipy.load(str(dlt_file_path), catalog=fibex_file_path)
+    messages = list(dlt_file.iter_messages(workers))
+    assert [list(message.payload) for message in messages] == [
+        ["Speed:", 120, "km/h"],
+        [-5],
+        [-6],
+        [non_verbose_payload(99, b"\x01").hex()],
+        [non_verbose_payload(12, b"\x01").hex()],
+        [non_verbose_payload(11, b"\x01").hex()],
+    ]
+    # Messages without extended header get APID/CTID of their catalog entry
+    assert [message.get_ids() for message in messages] == [("APP", "CTX")] + [
+        ("APP2", "CTX2")
+    ] * 2 + [("APP", "CTX")] * 3
+
+
+def test_decode_batch(fibex_file_path):
+    catalog = MessageCatalog.parse_fibex(fibex_file_path)
+    buffer = (
+        non_verbose_payload(11, pack("<i", -5))
+        + non_verbose_payload(10, pack("<H", 120) + pack("<H", 4) + b"km/h")
+        + non_verbose_payload(99, b"\x01")
+        + non_verbose_payload(11, pack(">i", -6), big_endian=True)
+        + b"\x0b"
+    )
+    payloads = [(0, 8, False), (8, 20, False), (20, 25, False), (25, 33, True)]
+    payloads.append((33, 34, False))
+    assert catalog.decode_batch(buffer, payloads) == [
+        [-5],
+        ["Speed:", 120, "km/h"],
+        None,
+        [-6],
+        None,
+    ]
+    assert catalog.decode_batch(buffer, payloads) == [
+        catalog.decode(buffer, start, end, big_endian)
+        for start, end, big_endian in payloads
+    ]
+
+
+def test_catalog_cache(fibex_file_path):
+    cache_file_path = fibex_file_path + ".cache"
+    catalog = MessageCatalog.load(fibex_file_path)
+    assert os.path.exists(cache_file_path)
+
+    # The cache is used as long as the description file is unchanged
+    with open(cache_file_path, "rb") as f:
+        cache = f.read()
+    cached_catalog = MessageCatalog.load(fibex_file_path)
+    assert cached_catalog.get_entry(10) == catalog.get_entry(10)
+
+    # A changed description file invalidates the cache
+    with open(fibex_file_path, "a") as f:
+        f.write("\n")
+    MessageCatalog.load(fibex_file_path)
+    with open(cache_file_path, "rb") as f:
+        assert f.read() != cache
+
+
+def test_export_catalog_ids(fibex_file_path, tmp_path):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(b"".join(build_messages()))
+    json_file_path = str(tmp_path / "test.jsonl")
+
+    dlt_file = dlt_transformipy.load(str(dlt_file_path), catalog=fibex_file_path)
+    assert dlt_transformipy.as_jsonl(dlt_file, json_file_path) == 6
+    with open(json_file_path, encoding="utf8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(line["apid"], line["ctid"]) for line in lines[:3]] == [
+        ("APP", "CTX"),
+        ("APP2", "CTX2"),
+        ("APP2", "CTX2"),
+    ]
@@ -0,0 +1,162 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import pytest
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+
+np = pytest.importorskip("numpy")
+
+
+def test_header_columns(tmp_path):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(
+        b"".join(
+            build_message(
+                [(TYPE_INFO_UINT32, i)] * (i % 3),
+                seconds=1600000000 + i,
+                microseconds=i * 10,
+                message_counter=i,
+                ecu_id="E{}".format(i) if i % 2 else None,
+                session_id=i if i % 3 else None,
+                timestamp=i * 100 if i % 4 else None,
+                extended_header=i % 5 != 0,
+                verbose=i % 7 != 0,
+                apid="A{}".format(i),
+                ctid="C{}".format(i),
+            )
+            for i in range(40)
+        )
+    )
+    dlt_file = dlt_transformipy.load(str(dlt_file_path))
+    columns = dlt_file.get_header_columns()
+
+    assert len(columns["timestamp_seconds"]) == 40
+    for i, message in enumerate(dlt_file.iter_messages()):
+        assert columns["timestamp_seconds"][i] == message.storage_header.timestamp_seconds
+        assert (
+            columns["timestamp_microseconds"][i]
+            == message.storage_header.timestamp_microseconds
+        )
+        assert columns["storage_ecu_id"][i].decode() == message.storage_header.ecu_id
+        standard_header = message.standard_header
+        assert columns["message_counter"][i] == standard_header.message_counter
+        assert columns["length"][i] == standard_header.length
+        assert columns["ecu_id"][i].decode() == (standard_header.ecu_id or "").rstrip("\0")
+        assert columns["session_id"][i] == (standard_header.session_id or 0)
+        assert columns["timestamp"][i] == (standard_header.timestamp or 0)
+        extended_header = message.extended_header
+        assert columns["use_extended_header"][i] == (extended_header is not None)
+        if extended_header is not None:
+            assert columns["apid"][i].decode() == extended_header.apid
+            assert columns["ctid"][i].decode() == extended_header.ctid
+            assert columns["noar"][i] == extended_header.noar
+            assert bool(columns["verbose"][i]) == bool(
+                extended_header.message_info.verbose
+            )
+            assert (
+                columns["message_type_info"][i]
+                == extended_header.message_info.message_type_info
+            )
+
+    columns = dlt_file.get_header_columns(10, 20)
+    assert list(columns["timestamp_seconds"]) == [1600000000 + i for i in range(10, 20)]
+
+
+def test_npy_export(tmp_path):
+    from dlt_transformipy.core.filter import DLTFilter
+    from dlt_transformipy.core.transform.transform_columnar import (
+        ARGUMENT_TYPE_BOOL,
+        ARGUMENT_TYPE_INT,
+        ARGUMENT_TYPE_UINT64,
+        ARGUMENT_TYPE_STRG,
+        ARGUMENT_TYPE_RAWD,
+        transform,
+    )
+    from benchmarks.synthetic import (
+        TYPE_INFO_BOOL,
+        TYPE_INFO_SINT16,
+        TYPE_INFO_UINT64,
+        TYPE_INFO_STRG_ASCII,
+        TYPE_INFO_RAWD,
+    )
+
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(
+        b"".join(
+            build_message(
+                [
+                    (TYPE_INFO_SINT16, -i),
+                    (TYPE_INFO_UINT64, 2 ** 64 - 1 - i),
+                    (TYPE_INFO_BOOL, i % 2),
+                    (TYPE_INFO_STRG_ASCII, "text"),
+                    (TYPE_INFO_RAWD, b"\x00"),
+                ][: i % 6],
+                seconds=1600000000 + i,
+                apid="A{}".format(i % 3),
+                ctid="C{}".format(i % 4),
+            )
+            for i in range(30)
+        )
+    )
+    output_directory = str(tmp_path / "columns")
+    dlt_file = dlt_transformipy.load(str(dlt_file_path))
+    # Small chunks, so the dictionaries and argument offsets span several chunks
+    assert transform(dlt_file, output_directory, chunk_size=7) == 30
+
+    columns, dictionaries = dlt_transformipy.load_columns(output_directory)
+    assert isinstance(columns["timestamp_seconds"], np.memmap)
+    assert columns["timestamp_seconds"].tolist() == list(range(1600000000, 1600000030))
+    assert [dictionaries["apid"][code] for code in columns["apid"]] == [
+        "A{}".format(i % 3) for i in range(30)
+    ]
+    assert [dictionaries["ctid"][code] for code in columns["ctid"]] == [
+        "C{}".format(i % 4) for i in range(30)
+    ]
+    argument_offsets = columns["argument_offsets"]
+    assert len(argument_offsets) == 31 and argument_offsets[-1] == sum(
+        i % 6 for i in range(30)
+    )
+    start, end = argument_offsets[5], argument_offsets[6]
+    assert columns["argument_type"][start:end].tolist() == [
+        ARGUMENT_TYPE_INT,
+        ARGUMENT_TYPE_UINT64,
+        ARGUMENT_TYPE_BOOL,
+        ARGUMENT_TYPE_STRG,
+        ARGUMENT_TYPE_RAWD,
+    ]
+    values = columns["argument_value"][start:end]
+    assert values[0] == -5 and values[2] == 1
+    assert values[1:2].view(np.uint64)[0] == 2 ** 64 - 1 - 5
+
+    # Filtered export
+    dlt_file = dlt_transformipy.load(
+        str(dlt_file_path), dlt_filter=DLTFilter(apids="A1")
+    )
+    assert dlt_transformipy.as_npy(dlt_file, str(tmp_path / "filtered")) == 10
+    columns, dictionaries = dlt_transformipy.load_columns(str(tmp_path / "filtered"))
+    # The codes index the IDs of the DLTFile's SymbolTable
+    assert dictionaries["apid"] == dlt_file.get_symbol_table().ids
+    assert [dictionaries["apid"][code] for code in columns["apid"]] == ["A1"] * 10
+    assert columns["timestamp_seconds"].tolist() == list(
+        range(1600000001, 1600000030, 3)
+    )
@@ -0,0 +1,98 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from benchmarks.synthetic import SyntheticTrace
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.compression import DecompressingReader, detect_compression
+
+COMPRESSORS = {"gzip": gzip.compress, "xz": lzma.compress, "bz2": bz2.compress}
+
+
+@pytest.fixture(scope="module")
+def dlt_file_path(tmp_path_factory):
+    dlt_file_path = str(tmp_path_factory.mktemp("compression") / "test.dlt")
+    SyntheticTrace(seed=19, corrupt_ratio=0.01).write(dlt_file_path, messages=3000)
+    return dlt_file_path
+
+
+def payloads(dlt_file, **kwargs):
+    return [list(message.payload) for message in dlt_file.iter_messages(**kwargs)]
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_compressed(dlt_file_path, tmp_path, compression):
+    with open(dlt_file_path, "rb") as f:
+        dlt_bytes = f.read()
+    # The compression is detected by the magic bytes, not by the extension
+    compressed_file_path = str(tmp_path / "test.bin")
+    with open(compressed_file_path, "wb") as f:
+        f.write(COMPRESSORS[compression](dlt_bytes))
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    compressed_dlt_file = dlt_transformipy.load(compressed_file_path, use_mmap=True)
+    assert compressed_dlt_file.get_compression() == compression
+    assert payloads(compressed_dlt_file, workers=2) == payloads(dlt_file)
+    assert compressed_dlt_file.get_skipped_bytes() == dlt_file.get_skipped_bytes()
+
+    # Random access needs the decompressed file
+    with pytest.raises(TypeError):
+        compressed_dlt_file.get_index()
+
+    csv_file_path = str(tmp_path / "test.csv")
+    compressed_csv_file_path = str(tmp_path / "compressed.csv")
+    dlt_transformipy.as_csv(dlt_file, csv_file_path)
+    dlt_transformipy.as_csv(compressed_dlt_file, compressed_csv_file_path, workers=2)
+    with open(csv_file_path, "rb") as f, open(compressed_csv_file_path, "rb") as g:
+        assert f.read() == g.read()
+
+
+def test_decompressing_reader(tmp_path):
+    data = bytes(range(256)) * 1000
+    compressed_file_path = str(tmp_path / "test.gz")
+    with open(compressed_file_path, "wb") as f:
+        f.write(gzip.compress(data))
+    assert detect_compression(compressed_file_path) == "gzip"
+
+    with DecompressingReader(
+        compressed_file_path, "gzip", block_size=1000, queue_size=2
+    ) as reader:
+        assert reader.peek(3) == b"\x00\x01\x02"
+        assert reader.read(10) == data[:10]
+        assert reader.read() == data[10:]
+        assert reader.read(10) == b""
+
+    # A truncated file raises in the reading thread
+    with open(compressed_file_path, "wb") as f:
+        f.write(gzip.compress(data)[:-100])
+    with DecompressingReader(compressed_file_path, "gzip") as reader:
+        with pytest.raises(EOFError):
+            reader.read()
+
+    # Closing stops the thread although the queue is full
+    reader = DecompressingReader(compressed_file_path, "gzip", 10, 1)
+    reader.read(1)
+    reader.close()
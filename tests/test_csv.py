@@ -19,11 +19,14 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import datetime
 import os
 import time
 from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core import parallel
+from benchmarks.synthetic import SyntheticTrace
 
-dlt_test_file_path = "tests/example_files/testfile.dlt"
+dlt_test_file_path = "tests/output/testfile.dlt"
 test_output_file_path = "tests/output"
 csv_output_file_path = "tests/output/testfile.csv"
 
@@ -34,6 +37,7 @@ def setup_module(module):
         os.makedirs(test_output_file_path)
     elif os.path.exists(csv_output_file_path):
         os.remove(csv_output_file_path)
+    SyntheticTrace(seed=1, corrupt_ratio=0.01).write(dlt_test_file_path, messages=2000)
 
 
 def test_csv():
@@ -46,3 +50,35 @@ def test_csv():
     assert os.path.exists(csv_output_file_path) == 1, "{} does not exist!".format(
         csv_output_file_path
     )
+
+
+def test_csv_rows():
+    dlt_file = dlt_transformipy.load(dlt_test_file_path)
+    dlt_transformipy.as_csv(dlt_file, csv_output_file_path, separator=",")
+    with open(csv_output_file_path, encoding="utf8") as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith('"Index","DateTime","Timestamp"')
+    assert len(lines) == len(dlt_file.get_messages()) + 1
+    message = dlt_file.get_messages()[0]
+    assert lines[1].startswith(
+        '"0","{}Z",'.format(
+            datetime.datetime.utcfromtimestamp(
+                message.storage_header.timestamp_seconds
+            ).isoformat()
+        )
+    )
+
+
+def test_csv_workers(monkeypatch):
+    monkeypatch.setattr(parallel, "MINIMUM_RANGE_BYTE_SIZE", 4096)
+    dlt_file = dlt_transformipy.load(dlt_test_file_path)
+    parallel_csv_output_file_path = csv_output_file_path + ".parallel"
+    number_of_rows = dlt_transformipy.as_csv(dlt_file, csv_output_file_path)
+    assert number_of_rows == len(dlt_file.get_messages())
+    assert (
+        dlt_transformipy.as_csv(dlt_file, parallel_csv_output_file_path, workers=2)
+        == number_of_rows
+    )
+    with open(csv_output_file_path, encoding="utf8") as f:
+        with open(parallel_csv_output_file_path, encoding="utf8") as f_parallel:
+            assert f.read() == f_parallel.read()
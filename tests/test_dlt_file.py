@@ -0,0 +1,151 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from struct import pack
+
+import pytest
+
+from benchmarks.synthetic import (
+    build_message,
+    TYPE_INFO_RAWD,
+    TYPE_INFO_STRG_ASCII,
+    TYPE_INFO_UINT32,
+)
+from dlt_transformipy import dlt_transformipy
+
+
+@pytest.fixture(params=[False, True], ids=["stream", "mmap"])
+def use_mmap(request):
+    return request.param
+
+
+def write_dlt_file(tmp_path, *chunks):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(b"".join(chunks))
+    return str(dlt_file_path)
+
+
+def counters(dlt_file):
+    return [message.payload[0] for message in dlt_file.get_messages()]
+
+
+def test_pattern_inside_payload(tmp_path, use_mmap):
+    raw = b"DLT\x01" * 10
+    dlt_file = dlt_transformipy.load(
+        write_dlt_file(
+            tmp_path,
+            *(
+                build_message([(TYPE_INFO_UINT32, i), (TYPE_INFO_RAWD, raw)])
+                for i in range(3)
+            )
+        ),
+        use_mmap=use_mmap,
+    )
+    assert counters(dlt_file) == [0, 1, 2]
+    assert dlt_file.get_messages()[1].payload[1] == raw.hex()
+    assert dlt_file.get_skipped_bytes() == 0
+
+
+def test_messages_larger_than_block(tmp_path, use_mmap):
+    raw = bytes(range(256)) * 200
+    dlt_file = dlt_transformipy.load(
+        write_dlt_file(
+            tmp_path,
+            *(
+                build_message([(TYPE_INFO_UINT32, i), (TYPE_INFO_RAWD, raw)])
+                for i in range(5)
+            )
+        ),
+        use_mmap=use_mmap,
+    )
+    assert counters(dlt_file) == [0, 1, 2, 3, 4]
+
+
+def test_resync_after_corruption(tmp_path, use_mmap):
+    garbage = b"\xde\xad\xbe\xef" * 5 + b"DLT"
+    dlt_file = dlt_transformipy.load(
+        write_dlt_file(
+            tmp_path,
+            build_message([(TYPE_INFO_UINT32, 0)]),
+            garbage,
+            build_message([(TYPE_INFO_UINT32, 1)]),
+            # Storage header pattern with an invalid length
+            b"DLT\x01" + bytes(12) + b"\x35\x00\x00\x01",
+            build_message([(TYPE_INFO_UINT32, 2)]),
+        ),
+        use_mmap=use_mmap,
+    )
+    assert counters(dlt_file) == [0, 1, 2]
+    assert dlt_file.get_skipped_bytes() == len(garbage) + 20
+
+
+def test_truncated_last_message(tmp_path, use_mmap):
+    last_message = build_message([(TYPE_INFO_UINT32, 1)])
+    dlt_file = dlt_transformipy.load(
+        write_dlt_file(
+            tmp_path, build_message([(TYPE_INFO_UINT32, 0)]), last_message[:-2]
+        ),
+        use_mmap=use_mmap,
+    )
+    assert counters(dlt_file) == [0]
+    assert dlt_file.get_skipped_bytes() == len(last_message) - 2
+
+
+def test_argument_length_beyond_message(tmp_path, use_mmap):
+    # The STRG argument claims 40 bytes, only 6 are left in the message
+    payload = pack("<IH", TYPE_INFO_STRG_ASCII, 40) + b"short\0"
+    dlt_file_path = write_dlt_file(
+        tmp_path,
+        build_message([(TYPE_INFO_STRG_ASCII, "")], payload=payload),
+        build_message([(TYPE_INFO_UINT32, 1)]),
+    )
+    # The arguments must not be decoded from the next message, the encoded payload is kept
+    expected = [[payload.hex()], [1]]
+    dlt_file = dlt_transformipy.load(dlt_file_path, use_mmap=use_mmap)
+    assert [list(message.payload) for message in dlt_file.get_messages()] == expected
+    dlt_file = dlt_transformipy.load(dlt_file_path, use_mmap=use_mmap)
+    assert [
+        list(message.payload) for message in dlt_file.get_messages(workers=2)
+    ] == expected
+
+
+def test_iter_messages_streams(tmp_path, use_mmap):
+    dlt_file = dlt_transformipy.load(
+        write_dlt_file(
+            tmp_path, *(build_message([(TYPE_INFO_UINT32, i)]) for i in range(10))
+        ),
+        use_mmap=use_mmap,
+    )
+    assert [message.payload[0] for message in dlt_file.iter_messages()] == list(
+        range(10)
+    )
+    # Iterating must not read the whole file into memory
+    assert dlt_file._DLTFile__dlt_messages is None
+
+
+def test_mmap_clean_up(tmp_path):
+    dlt_file = dlt_transformipy.load(
+        write_dlt_file(tmp_path, build_message([(TYPE_INFO_UINT32, 0)])),
+        use_mmap=True,
+    )
+    assert len(dlt_file.get_messages()) == 1
+    dlt_file.clean_up()
+    assert [message.payload[0] for message in dlt_file.iter_messages()] == [0]
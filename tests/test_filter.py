@@ -0,0 +1,123 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import datetime
+
+import pytest
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import (
+    DLTFilter,
+    LOG_ERROR,
+    LOG_INFO,
+    MESSAGE_TYPE_APP_TRACE,
+    to_microseconds,
+)
+
+
+def build_messages():
+    for i in range(20):
+        yield build_message(
+            [(TYPE_INFO_UINT32, i)],
+            seconds=1600000000 + i,
+            ecu_id="ECU{}".format(i % 2) if i % 4 else None,
+            storage_ecu_id="STOR",
+            session_id=i % 3,
+            apid="AP{}".format(i % 5),
+            ctid="CT{}".format(i % 2),
+            # APP_TRACE for i % 7 == 0, otherwise LOG with ERROR / INFO level
+            message_info=(
+                (MESSAGE_TYPE_APP_TRACE << 1 | 0x10 | 1)
+                if i % 7 == 0
+                else ((LOG_ERROR if i % 2 else LOG_INFO) << 4 | 1)
+            ),
+            extended_header=i != 19,
+        )
+
+
+@pytest.fixture(params=[False, True], ids=["stream", "mmap"])
+def dlt_file_path(request, tmp_path):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(b"".join(build_messages()))
+    return str(dlt_file_path), request.param
+
+
+def filtered(dlt_file_path, **kwargs):
+    path, use_mmap = dlt_file_path
+    dlt_file = dlt_transformipy.load(
+        path, use_mmap=use_mmap, dlt_filter=DLTFilter(**kwargs)
+    )
+    return [
+        message.storage_header.timestamp_seconds - 1600000000
+        for message in dlt_file.iter_messages()
+    ]
+
+
+def test_filter_ids(dlt_file_path):
+    assert filtered(dlt_file_path, apids="AP3") == [3, 8, 13, 18]
+    assert filtered(dlt_file_path, apids=["AP3", "AP4"], ctids="CT0") == [4, 8, 14, 18]
+    # Standard header ECU ID, storage header ECU ID if not present
+    assert filtered(dlt_file_path, ecu_ids="ECU1") == list(range(1, 20, 2))
+    assert filtered(dlt_file_path, ecu_ids="STOR") == [0, 4, 8, 12, 16]
+
+
+def test_filter_session_and_time(dlt_file_path):
+    assert filtered(dlt_file_path, session_ids=2) == [2, 5, 8, 11, 14, 17]
+    assert filtered(dlt_file_path, start_time=1600000005, end_time=1600000008) == [
+        5,
+        6,
+        7,
+    ]
+    assert filtered(
+        dlt_file_path,
+        start_time=datetime.datetime.fromtimestamp(1600000017, datetime.timezone.utc),
+    ) == [17, 18, 19]
+
+
+def test_naive_datetimes_are_utc(dlt_file_path, local_timezone):
+    assert to_microseconds(datetime.datetime(2020, 1, 1)) == 1577836800000000
+    assert (
+        to_microseconds(
+            datetime.datetime(
+                2020, 1, 1, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=1))
+            )
+        )
+        == 1577836800000000
+    )
+    assert filtered(
+        dlt_file_path, start_time=datetime.datetime(2020, 9, 13, 12, 26, 57)
+    ) == [17, 18, 19]
+
+
+def test_filter_message_type_and_log_level(dlt_file_path):
+    assert filtered(dlt_file_path, message_types=MESSAGE_TYPE_APP_TRACE) == [0, 7, 14]
+    assert filtered(dlt_file_path, log_levels=LOG_ERROR) == [1, 3, 5, 9, 11, 13, 15, 17]
+
+
+def test_filter_as_csv(tmp_path, dlt_file_path):
+    dlt_file = dlt_transformipy.load(
+        dlt_file_path[0], dlt_filter=DLTFilter(apids="AP1")
+    )
+    csv_output_file_path = str(tmp_path / "test.csv")
+    dlt_transformipy.as_csv(dlt_file, csv_output_file_path)
+    with open(csv_output_file_path, encoding="utf8") as f:
+        assert len(f.readlines()) == 1 + 4
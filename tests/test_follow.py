@@ -0,0 +1,97 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+
+
+def message(i):
+    return build_message([(TYPE_INFO_UINT32, i)])
+
+
+def test_follow(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    with open(dlt_file_path, "wb") as f:
+        f.write(message(0) + message(1) + message(2)[:10])
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    messages = dlt_file.follow(poll_interval=0.01, timeout=0.2)
+    assert next(messages).payload[0] == 0
+    assert next(messages).payload[0] == 1
+
+    # The partial message is completed by the next write
+    with open(dlt_file_path, "ab") as f:
+        f.write(message(2)[10:] + message(3))
+    assert next(messages).payload[0] == 2
+    assert next(messages).payload[0] == 3
+
+    # Truncation: the file is followed from its start again
+    with open(dlt_file_path, "wb") as f:
+        f.write(message(4))
+    assert next(messages).payload[0] == 4
+
+    # Rotation: the new file is followed from its start
+    with open(dlt_file_path + ".new", "wb") as f:
+        f.write(b"\x00" * 3 + message(5) * 2)
+    os.replace(dlt_file_path + ".new", dlt_file_path)
+    assert next(messages).payload[0] == 5
+    assert next(messages).payload[0] == 5
+
+    # No new data until the timeout
+    assert list(messages) == []
+    assert dlt_file.get_skipped_bytes() == 3
+
+
+def test_follow_from_end(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    with open(dlt_file_path, "wb") as f:
+        f.write(message(0))
+
+    messages = dlt_transformipy.load(dlt_file_path).follow(
+        offset=None, poll_interval=0.01, timeout=0.2
+    )
+    with open(dlt_file_path, "ab") as f:
+        f.write(message(1))
+    assert [message.payload[0] for message in messages] == [1]
+
+
+def test_follow_resumes_at_offset(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    with open(dlt_file_path, "wb") as f:
+        f.write(message(0) + message(1) + message(2)[:10])
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    # Not iterated yet: the offset to start at
+    messages = dlt_file.follow(poll_interval=0.01, timeout=0.1)
+    assert dlt_file.get_follow_offset() == 0
+    assert [message.payload[0] for message in messages] == [0, 1]
+    # The incomplete message is not consumed
+    assert dlt_file.get_follow_offset() == 2 * len(message(0))
+
+    with open(dlt_file_path, "ab") as f:
+        f.write(message(2)[10:] + message(3))
+    messages = dlt_file.follow(
+        offset=dlt_file.get_follow_offset(), poll_interval=0.01, timeout=0.1
+    )
+    assert [message.payload[0] for message in messages] == [2, 3]
+    assert dlt_file.get_follow_offset() == os.path.getsize(dlt_file_path)
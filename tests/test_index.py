@@ -0,0 +1,94 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import DLTFilter
+from dlt_transformipy.core.index import DLTIndex
+
+
+def write_dlt_file(tmp_path, count, first=0):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(
+        b"".join(
+            build_message([(TYPE_INFO_UINT32, i)], seconds=1600000000 + i)
+            for i in range(first, first + count)
+        )
+    )
+    return str(dlt_file_path)
+
+
+def test_random_access(tmp_path):
+    dlt_file = dlt_transformipy.load(write_dlt_file(tmp_path, 20))
+    assert len(dlt_file) == 20
+    assert dlt_file[0].payload[0] == 0
+    assert dlt_file[13].payload[0] == 13
+    assert dlt_file[-1].payload[0] == 19
+    assert [message.payload[0] for message in dlt_file[5:11:2]] == [5, 7, 9]
+    assert os.path.exists(str(tmp_path / "test.dlt.idx"))
+
+
+def test_random_access_with_filter(tmp_path):
+    dlt_file_path = write_dlt_file(tmp_path, 20)
+    dlt_file = dlt_transformipy.load(
+        dlt_file_path, dlt_filter=DLTFilter(start_time=1600000015)
+    )
+    # The filter applies before and after reading the DLTFile
+    for _ in range(2):
+        assert len(dlt_file) == 5
+        assert dlt_file[0].payload[0] == 15
+        assert dlt_file[-1].payload[0] == 19
+        assert [message.payload[0] for message in dlt_file[1:4:2]] == [16, 18]
+        dlt_file.read()
+
+    # A filter which matches no message
+    dlt_file = dlt_transformipy.load(
+        dlt_file_path, dlt_filter=DLTFilter(start_time=1700000000)
+    )
+    assert len(dlt_file) == 0
+    dlt_file.read()
+    assert len(dlt_file) == 0
+    assert dlt_file[:] == []
+
+
+def test_index_is_reused(tmp_path):
+    dlt_file_path = write_dlt_file(tmp_path, 5)
+    DLTIndex.load_or_build(dlt_file_path).close()
+
+    dlt_index = DLTIndex.load(dlt_file_path + ".idx")
+    assert dlt_index.is_valid_for(dlt_file_path)
+    assert list(dlt_index.timestamp_seconds) == [1600000000 + i for i in range(5)]
+    dlt_index.close()
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    dlt_file_path = write_dlt_file(tmp_path, 5)
+    DLTIndex.load_or_build(dlt_file_path).close()
+
+    write_dlt_file(tmp_path, 8, first=100)
+    stat = os.stat(dlt_file_path)
+    os.utime(dlt_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    assert len(dlt_file) == 8
+    assert dlt_file[0].payload[0] == 100
@@ -0,0 +1,107 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import gzip
+import json
+
+import pytest
+
+from benchmarks.synthetic import (
+    build_message,
+    TYPE_INFO_BOOL,
+    TYPE_INFO_SINT16,
+    TYPE_INFO_STRG_UTF8,
+    TYPE_INFO_UINT32,
+    TYPE_INFO_RAWD,
+)
+from dlt_transformipy import dlt_transformipy
+
+ARGUMENTS = [
+    (TYPE_INFO_STRG_UTF8, 'say "hi"\n'),
+    (TYPE_INFO_UINT32, 4000000000),
+    (TYPE_INFO_SINT16, -2),
+    (TYPE_INFO_BOOL, 1),
+    (TYPE_INFO_RAWD, b"\x01\xff"),
+]
+
+
+@pytest.fixture
+def dlt_file_path(tmp_path):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(
+        build_message(ARGUMENTS, microseconds=42, session_id=7, timestamp=1234)
+        + build_message(extended_header=False, payload=b"\xab\xcd")
+    )
+    return str(dlt_file_path)
+
+
+def read_lines(json_file_path, compressed=False):
+    with (gzip.open if compressed else open)(
+        json_file_path, "rt", encoding="utf8"
+    ) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl(dlt_file_path, tmp_path):
+    json_file_path = str(tmp_path / "test.jsonl")
+    assert (
+        dlt_transformipy.as_jsonl(dlt_transformipy.load(dlt_file_path), json_file_path)
+        == 2
+    )
+    first, second = read_lines(json_file_path)
+    assert first == {
+        "index": 0,
+        "date_time": "2020-09-13T12:26:40.000042Z",
+        "timestamp": 1234,
+        "count": 0,
+        "ecu_id": "ECU1",
+        "apid": "APP",
+        "ctid": "CTX",
+        "session_id": 7,
+        "mode": "verbose",
+        "noar": 5,
+        "payload": ['say "hi"\n', 4000000000, -2, True, {"hex": "01ff"}],
+    }
+    assert second["index"] == 1
+    assert second["apid"] is None and second["timestamp"] is None
+    assert second["payload"] == [{"hex": "abcd"}]
+
+
+def test_jsonl_gzip_base64(dlt_file_path, tmp_path):
+    json_file_path = str(tmp_path / "test.jsonl.gz")
+    assert (
+        dlt_transformipy.as_jsonl(
+            dlt_transformipy.load(dlt_file_path), json_file_path, raw_encoding="base64"
+        )
+        == 2
+    )
+    first, second = read_lines(json_file_path, compressed=True)
+    assert first["payload"][-1] == {"base64": "Af8="}
+    assert second["payload"] == [{"base64": "q80="}]
+
+
+def test_jsonl_invalid_raw_encoding(dlt_file_path, tmp_path):
+    with pytest.raises(ValueError):
+        dlt_transformipy.as_jsonl(
+            dlt_transformipy.load(dlt_file_path),
+            str(tmp_path / "test.jsonl"),
+            raw_encoding="base32",
+        )
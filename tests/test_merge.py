@@ -0,0 +1,117 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+
+from benchmarks.synthetic import SyntheticTrace, build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import DLTFilter
+from dlt_transformipy.core.merge import merge_messages
+
+
+def storage_time(message):
+    storage_header = message.storage_header
+    return (storage_header.timestamp_seconds, storage_header.timestamp_microseconds)
+
+
+def write_messages(dlt_file_path, times):
+    with open(dlt_file_path, "wb") as f:
+        for i, (seconds, microseconds) in enumerate(times):
+            f.write(
+                build_message(
+                    [(TYPE_INFO_UINT32, i)], seconds=seconds, microseconds=microseconds
+                )
+            )
+    return dlt_transformipy.load(dlt_file_path)
+
+
+def test_merge(tmp_path):
+    dlt_files = list()
+    for seed in range(4):
+        dlt_file_path = str(tmp_path / "test{}.dlt".format(seed))
+        SyntheticTrace(seed=seed, ecu_ids=["EC{}".format(seed)]).write(
+            dlt_file_path, messages=500
+        )
+        dlt_files.append(dlt_transformipy.load(dlt_file_path))
+
+    merged = list(dlt_transformipy.merge(dlt_files).iter_messages())
+    assert len(merged) == 2000
+    assert [storage_time(message) for message in merged] == sorted(
+        storage_time(message) for message in merged
+    )
+    # The order within every DLT file is kept
+    for seed, dlt_file in enumerate(dlt_files):
+        assert [
+            list(message.payload)
+            for message in merged
+            if message.storage_header.ecu_id == "EC{}".format(seed)
+        ] == [list(message.payload) for message in dlt_file.iter_messages()]
+
+
+def test_merge_order(tmp_path):
+    first = write_messages(str(tmp_path / "first.dlt"), [(1, 0), (2, 0), (2, 0)])
+    # Out of order within the reorder window
+    second = write_messages(str(tmp_path / "second.dlt"), [(3, 0), (2, 0), (1, 5)])
+    merged = [
+        (message.storage_header.timestamp_seconds, message.payload[0])
+        for message in merge_messages([first, second])
+    ]
+    # Equal times keep the order of the DLT files
+    assert merged == [(1, 0), (1, 2), (2, 1), (2, 2), (2, 1), (3, 0)]
+    assert merged == [
+        (message.storage_header.timestamp_seconds, message.payload[0])
+        for message in merge_messages([first, second], reorder_window=3)
+    ]
+    # Without reordering, the DLT files are assumed to be in order
+    assert [
+        message.payload[0]
+        for message in merge_messages([first, second], reorder_window=0)
+    ] == [0, 1, 2, 0, 1, 2]
+
+
+def test_merge_transform(tmp_path):
+    first = write_messages(str(tmp_path / "first.dlt"), [(1, 0), (3, 0)])
+    second_path = str(tmp_path / "second.dlt")
+    write_messages(second_path, [(2, 0), (4, 0), (5, 0)])
+    # The filter of every DLT file is applied
+    second = dlt_transformipy.load(second_path, dlt_filter=DLTFilter(start_time=3))
+    merged = dlt_transformipy.merge([first, second, dlt_transformipy.load(second_path)])
+
+    csv_file_path = str(tmp_path / "merged.csv")
+    dlt_transformipy.as_csv(merged, csv_file_path, workers=2)
+    with open(csv_file_path, encoding="utf8") as f:
+        rows = f.read().splitlines()[1:]
+    assert [row.split(";")[-1] for row in rows] == [
+        '"0"',
+        '"0"',
+        '"1"',
+        '"1"',
+        '"1"',
+        '"2"',
+        '"2"',
+    ]
+
+    jsonl_file_path = str(tmp_path / "merged.jsonl")
+    dlt_transformipy.as_jsonl(merged, jsonl_file_path)
+    with open(jsonl_file_path, encoding="utf8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["index"] for line in lines] == list(range(7))
+    assert [line["payload"] for line in lines] == [[0], [0], [1], [1], [1], [2], [2]]
@@ -0,0 +1,150 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from benchmarks.synthetic import (
+    build_message,
+    TYPE_INFO_BOOL,
+    TYPE_INFO_SINT16,
+    TYPE_INFO_SINT64,
+    TYPE_INFO_UINT8,
+    TYPE_INFO_UINT32,
+    TYPE_INFO_STRG_ASCII,
+    TYPE_INFO_STRG_UTF8,
+    TYPE_INFO_RAWD,
+)
+from dlt_transformipy.core.model.dlt_message import DLTMessage
+from dlt_transformipy.core.symbols import SymbolTable
+
+ARGUMENTS = [
+    (TYPE_INFO_STRG_ASCII, "hello"),
+    (TYPE_INFO_UINT32, 4000000000),
+    (TYPE_INFO_SINT16, -2),
+    (TYPE_INFO_BOOL, 1),
+    (TYPE_INFO_RAWD, b"\x01\xff"),
+    (TYPE_INFO_UINT8, 7),
+    (TYPE_INFO_SINT64, -(2 ** 40)),
+    (TYPE_INFO_STRG_UTF8, "äö"),
+]
+EXPECTED_VALUES = ["hello\0", 4000000000, -2, True, "01ff", 7, -(2 ** 40), "äö\0"]
+
+
+def test_headers():
+    message = DLTMessage(
+        build_message(
+            ARGUMENTS,
+            seconds=1600000001,
+            microseconds=42,
+            storage_ecu_id="STOR",
+            message_counter=9,
+            session_id=1234,
+            timestamp=5678,
+            apid="APID",
+            ctid="CTID",
+        )
+    )
+    assert message.storage_header.timestamp_seconds == 1600000001
+    assert message.storage_header.timestamp_microseconds == 42
+    assert message.storage_header.ecu_id == "STOR"
+    assert message.standard_header.message_counter == 9
+    assert message.standard_header.ecu_id == "ECU1"
+    assert message.standard_header.session_id == 1234
+    assert message.standard_header.timestamp == 5678
+    assert message.extended_header.apid == "APID"
+    assert message.extended_header.ctid == "CTID"
+    assert message.extended_header.noar == len(ARGUMENTS)
+    assert message.extended_header.message_info.verbose
+
+
+def test_payload_little_endian():
+    message = DLTMessage(build_message(ARGUMENTS))
+    assert list(message.payload) == EXPECTED_VALUES
+
+
+def test_payload_big_endian():
+    message = DLTMessage(build_message(ARGUMENTS, big_endian=True))
+    assert list(message.payload) == EXPECTED_VALUES
+
+
+def test_payload_with_offset():
+    dlt_message_bytes = build_message(ARGUMENTS)
+    message = DLTMessage(memoryview(b"garbage" + dlt_message_bytes), 7)
+    assert list(message.payload) == EXPECTED_VALUES
+
+
+def test_non_verbose_payload():
+    message = DLTMessage(build_message(verbose=False, payload=b"\x01\x02\x03\x04"))
+    assert list(message.payload) == ["01020304"]
+
+
+def test_headers_are_decoded_lazily():
+    message = DLTMessage(build_message(ARGUMENTS))
+    assert not hasattr(message, "__dict__")
+    assert message._standard_header is None and message._payload is None
+    assert message.extended_header.apid == "APP"
+    assert message._payload is None
+    assert message.payload[0] == "hello\0"
+
+
+def test_message_without_extended_header():
+    message = DLTMessage(build_message(extended_header=False, payload=b"\xab"))
+    assert message.extended_header is None
+    assert list(message.payload) == ["ab"]
+
+
+def test_payload_signature_cache():
+    # Decoded twice: first argument by argument, then by the fused signature decoder
+    for _ in range(2):
+        assert list(DLTMessage(build_message(ARGUMENTS)).payload) == EXPECTED_VALUES
+        assert list(DLTMessage(build_message(ARGUMENTS, big_endian=True)).payload) == (
+            EXPECTED_VALUES
+        )
+
+
+def test_payload_signature_mismatch():
+    # Same log statement, number of arguments and first TYPE_INFO, different signature
+    first = [(TYPE_INFO_STRG_ASCII, "a"), (TYPE_INFO_UINT32, 1)]
+    second = [(TYPE_INFO_STRG_ASCII, "b"), (TYPE_INFO_SINT16, -1)]
+    third = [(TYPE_INFO_STRG_ASCII, "c"), (TYPE_INFO_STRG_ASCII, "d")]
+    for _ in range(2):
+        assert list(DLTMessage(build_message(first)).payload) == ["a\0", 1]
+        assert list(DLTMessage(build_message(second)).payload) == ["b\0", -1]
+        assert list(DLTMessage(build_message(third)).payload) == ["c\0", "d\0"]
+
+
+def test_symbol_table():
+    symbol_table = SymbolTable()
+    messages = [
+        DLTMessage(
+            build_message(storage_ecu_id="EC", ecu_id="EC", apid=apid, ctid="CTX"),
+            symbol_table=symbol_table,
+        )
+        for apid in ("APP", "APP2", "APP")
+    ]
+    headers = [
+        (message.extended_header, message.storage_header) for message in messages
+    ]
+    # Equal IDs share one str, the padding is removed
+    assert headers[0][0].apid is headers[2][0].apid
+    assert headers[0][1].ecu_id is messages[1].standard_header.ecu_id == "EC"
+    assert symbol_table.ids == ["EC", "APP", "CTX", "APP2"]
+    assert symbol_table.get_code(b"APP2") == symbol_table.get_code_of_id("APP2") == 3
+    assert symbol_table.get_code_of_id("OTHR") is None
+    assert len(symbol_table) == 4 and "CTX" in symbol_table
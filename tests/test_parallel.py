@@ -0,0 +1,66 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mmap
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32, TYPE_INFO_RAWD
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core import parallel
+from dlt_transformipy.core.model.payload import RawData
+
+
+def write_dlt_file(tmp_path):
+    chunks = list()
+    for i in range(200):
+        chunks.append(
+            build_message([(TYPE_INFO_UINT32, i), (TYPE_INFO_RAWD, b"DLT\x01" * 3)])
+        )
+        if i % 50 == 25:
+            chunks.append(b"\xde\xad\xbe\xef")
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(b"".join(chunks))
+    return str(dlt_file_path)
+
+
+def test_ranges_start_at_message_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "MINIMUM_RANGE_BYTE_SIZE", 100)
+    with open(write_dlt_file(tmp_path), "rb") as dlt_file_descriptor:
+        dlt_mmap = mmap.mmap(dlt_file_descriptor.fileno(), 0, access=mmap.ACCESS_READ)
+    ranges = parallel.split_into_ranges(dlt_mmap, 16)
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(dlt_mmap)
+    for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]):
+        assert end == start
+        assert parallel.get_message_byte_size(dlt_mmap, start)
+    dlt_mmap.close()
+
+
+def test_parallel_read_keeps_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "MINIMUM_RANGE_BYTE_SIZE", 100)
+    dlt_file_path = write_dlt_file(tmp_path)
+
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    messages = dlt_file.get_messages(workers=2)
+    assert [message.payload[0] for message in messages] == list(range(200))
+    assert messages[7].storage_header.ecu_id == "ECU1"
+    assert isinstance(messages[7].payload[1], RawData)
+    assert messages[7].payload[1].to_bytes() == b"DLT\x01" * 3
+    assert dlt_file.get_skipped_bytes() == 4 * 4
@@ -0,0 +1,99 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import sqlite3
+
+from benchmarks.synthetic import (
+    build_message,
+    TYPE_INFO_BOOL,
+    TYPE_INFO_STRG_ASCII,
+    TYPE_INFO_UINT32,
+    TYPE_INFO_UINT64,
+    TYPE_INFO_RAWD,
+)
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import LOG_ERROR, LOG_INFO, MESSAGE_TYPE_LOG
+
+
+def test_sqlite(tmp_path):
+    dlt_file_path = tmp_path / "test.dlt"
+    dlt_file_path.write_bytes(
+        b"".join(
+            build_message(
+                [
+                    (TYPE_INFO_STRG_ASCII, "value"),
+                    (TYPE_INFO_UINT32, i),
+                    (TYPE_INFO_UINT64, 2**64 - 1),
+                    (TYPE_INFO_BOOL, 1),
+                    (TYPE_INFO_RAWD, b"\x01\x02"),
+                ],
+                seconds=1600000000 + i,
+                microseconds=500000,
+                apid="AP{}".format(i % 2),
+                ctid="CTX",
+                message_info=((LOG_ERROR if i % 3 else LOG_INFO) << 4) | 1,
+            )
+            for i in range(10)
+        )
+        + build_message(extended_header=False, payload=b"\xff")
+    )
+    db_path = str(tmp_path / "test.db")
+    dlt_transformipy.as_sqlite(dlt_transformipy.load(str(dlt_file_path)), db_path)
+    # Existing tables are replaced
+    assert (
+        dlt_transformipy.as_sqlite(dlt_transformipy.load(str(dlt_file_path)), db_path)
+        == 11
+    )
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("SELECT COUNT(*) FROM messages").fetchone() == (11,)
+    assert connection.execute(
+        "SELECT id, time, message_type, message_type_info, verbose, noar, payload "
+        "FROM messages WHERE apid = 'AP1' AND ctid = 'CTX' ORDER BY time LIMIT 1"
+    ).fetchone() == (
+        1,
+        1600000001.5,
+        MESSAGE_TYPE_LOG,
+        LOG_ERROR,
+        1,
+        5,
+        "value 1 18446744073709551615 True 0102",
+    )
+    assert connection.execute(
+        "SELECT type, value FROM arguments WHERE message_id = 3 ORDER BY position"
+    ).fetchall() == [
+        ("STRG", "value"),
+        ("INT", 3),
+        ("INT", "18446744073709551615"),
+        ("BOOL", 1),
+        ("RAWD", b"\x01\x02"),
+    ]
+    assert connection.execute(
+        "SELECT apid, verbose, payload FROM messages WHERE id = 10"
+    ).fetchone() == (None, None, "ff")
+    indexes = {
+        row[0]
+        for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    assert {"messages_time", "messages_apid_ctid", "messages_ecu_id"} <= indexes
+    connection.close()
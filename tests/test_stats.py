@@ -0,0 +1,97 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import gzip
+import json
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import DLTFilter, LOG_ERROR, LOG_INFO
+
+MESSAGES = [
+    # seconds, message_counter, apid, log level, payload
+    (10, 0, "APP", LOG_INFO, b"\x01" * 3),
+    (10, 1, "APP", LOG_ERROR, b""),
+    (11, 2, "APP", LOG_INFO, b"\x01" * 100),
+    # Two messages of APP are lost
+    (13, 5, "APP", LOG_INFO, b"\x01" * 4),
+    (13, 0, "OTHR", LOG_INFO, b"\x01"),
+    # The message counter wraps around
+    (13, 255, "OTHR", LOG_INFO, b"\x01"),
+    (14, 0, "OTHR", LOG_INFO, b"\x01"),
+]
+
+
+def write_trace(dlt_file_path):
+    dlt_bytes = b"".join(
+        build_message(
+            seconds=seconds,
+            message_counter=message_counter,
+            apid=apid,
+            message_info=(log_level << 4) | 0x01,
+            payload=payload,
+        )
+        for seconds, message_counter, apid, log_level, payload in MESSAGES
+    )
+    dlt_bytes += build_message(
+        [(TYPE_INFO_UINT32, 1)], seconds=14, ecu_id=None, extended_header=False
+    )
+    with open(dlt_file_path, "wb") as f:
+        f.write(dlt_bytes + b"\xff" * 5)
+    return dlt_bytes
+
+
+def test_stats(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    dlt_bytes = write_trace(dlt_file_path)
+
+    stats = dlt_transformipy.stats(dlt_file_path)
+    assert stats.message_count == 8
+    assert stats.byte_count == len(dlt_bytes)
+    assert stats.skipped_bytes == 5
+    assert stats.ecu_ids == {"ECU1": 8}
+    assert stats.apids == {"APP": 4, "OTHR": 3}
+    assert stats.ctids == {"CTX": 7}
+    assert stats.message_types == {0: 7}
+    assert stats.log_levels == {LOG_INFO: 6, LOG_ERROR: 1}
+    assert stats.messages_per_second == [(10, 2), (11, 1), (13, 3), (14, 2)]
+    # 0, 1, 2-3, 4-7, 8-15, ..., 64-127 bytes
+    assert stats.payload_sizes == [1, 3, 1, 1, 1, 0, 0, 1]
+    assert stats.counter_gaps == {("ECU1", "APP", "CTX"): 1, ("ECU1", "OTHR", "CTX"): 1}
+    assert stats.lost_messages == {
+        ("ECU1", "APP", "CTX"): 2,
+        ("ECU1", "OTHR", "CTX"): 254,
+    }
+    assert json.loads(json.dumps(stats.to_dict()))["lost_messages"] == {
+        "ECU1/APP/CTX": 2,
+        "ECU1/OTHR/CTX": 254,
+    }
+
+    # Compressed DLT files and filters
+    with open(dlt_file_path, "rb") as f, gzip.open(dlt_file_path + ".gz", "wb") as g:
+        g.write(f.read())
+    compressed_stats = dlt_transformipy.stats(dlt_file_path + ".gz")
+    assert compressed_stats.to_dict() == stats.to_dict()
+    filtered_stats = dlt_transformipy.stats(
+        dlt_file_path, dlt_filter=DLTFilter(apids="OTHR")
+    )
+    assert filtered_stats.message_count == 3
+    assert filtered_stats.apids == {"OTHR": 3}
@@ -0,0 +1,104 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import asyncio
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import DLTFilter
+from dlt_transformipy.core.stream import DLTStreamClient
+from dlt_transformipy.core.model.storage_header import STORAGE_HEADER_BYTE_SIZE
+
+MESSAGE_COUNT = 500
+
+
+def stream_message(i, **kwargs):
+    # A TCP stream has no storage headers
+    return build_message([(TYPE_INFO_UINT32, i)], **kwargs)[STORAGE_HEADER_BYTE_SIZE:]
+
+
+def serve(stream, chunk_size):
+    async def handle(reader, writer):
+        for chunk_start in range(0, len(stream), chunk_size):
+            writer.write(stream[chunk_start : chunk_start + chunk_size])
+            await writer.drain()
+        writer.close()
+
+    return asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def run_client(stream, chunk_size=7, **kwargs):
+    async def receive():
+        server = await serve(stream, chunk_size)
+        port = server.sockets[0].getsockname()[1]
+        async with DLTStreamClient("127.0.0.1", port, **kwargs) as client:
+            batches = [batch async for batch in client.iter_batches()]
+            skipped_bytes = client.get_skipped_bytes()
+        server.close()
+        await server.wait_closed()
+        return batches, skipped_bytes
+
+    return asyncio.run(receive())
+
+
+def test_stream():
+    stream = b"".join(stream_message(i) for i in range(MESSAGE_COUNT))
+    # Serial header and invalid data in between are skipped
+    stream += b"DLS\x01" + stream_message(MESSAGE_COUNT) + b"\xff" * 3
+    stream += stream_message(MESSAGE_COUNT + 1, ecu_id=None)
+
+    batches, skipped_bytes = run_client(stream, batch_size=64, queue_size=1)
+    messages = [message for batch in batches for message in batch]
+    assert max(len(batch) for batch in batches) <= 64
+    assert [message.payload[0] for message in messages] == list(
+        range(MESSAGE_COUNT + 2)
+    )
+    assert skipped_bytes == 3
+    # The storage header carries the ECU ID of the standard header (or the default)
+    assert messages[0].storage_header.ecu_id == "ECU1"
+    assert messages[-1].storage_header.ecu_id == "RECV"
+
+
+def test_stream_outputs(tmp_path):
+    storage_file_path = str(tmp_path / "stream.dlt")
+    csv_file_path = str(tmp_path / "stream.csv")
+    stream = b"".join(
+        stream_message(i, apid="APP" if i % 2 else "OTHR") for i in range(100)
+    )
+
+    batches, _ = run_client(
+        stream,
+        chunk_size=1000,
+        storage_file_path=storage_file_path,
+        csv_file_path=csv_file_path,
+        dlt_filter=DLTFilter(apids=["APP"]),
+    )
+    assert sum(len(batch) for batch in batches) == 50
+
+    # The written DLT file is readable like any other
+    dlt_file = dlt_transformipy.load(storage_file_path)
+    assert [message.payload[0] for message in dlt_file.iter_messages()] == list(
+        range(1, 100, 2)
+    )
+    with open(csv_file_path, encoding="utf8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 51
+    assert lines[-1].startswith('"49";')
@@ -0,0 +1,153 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+from struct import pack
+
+from benchmarks.synthetic import (
+    build_message,
+    TYPE_INFO_RAWD,
+    TYPE_INFO_STRG_ASCII,
+    TYPE_INFO_STRG_UTF8,
+    TYPE_INFO_UINT32,
+)
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.catalog import (
+    MessageCatalog,
+    TYPE_INFO_STRG_UTF8 as SIGNAL_STRG_UTF8,
+)
+from dlt_transformipy.core.filter import DLTFilter
+from dlt_transformipy.core.text_index import DLTTextIndex
+
+TEXTS = [
+    "Connection lost to ECU2",
+    "connection established",
+    "Temperature 42 degrees",
+    "Überlast erkannt",
+    "CONNECTION LOST twice",
+    "Lost and found",
+]
+
+
+def write_dlt_file(dlt_file_path):
+    with open(dlt_file_path, "wb") as f:
+        for i, text in enumerate(TEXTS * 50):
+            f.write(
+                build_message(
+                    [
+                        (TYPE_INFO_STRG_UTF8, text),
+                        (TYPE_INFO_UINT32, i),
+                        # Raw data is not indexed
+                        (TYPE_INFO_RAWD, b"lost"),
+                    ],
+                    apid="APP" if i % 2 else "OTHR",
+                )
+            )
+        f.write(build_message([(TYPE_INFO_STRG_ASCII, "last")]))
+
+
+def search(dlt_file, text, **kwargs):
+    return [message.payload[1] for message in dlt_file.search(text, **kwargs)]
+
+
+def expected(predicate):
+    return [i for i, text in enumerate(TEXTS * 50) if predicate(text)]
+
+
+def test_search(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    write_dlt_file(dlt_file_path)
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+
+    # Substrings, also across words and within words (case-sensitive)
+    for text in ["Connection lost", "nection", "ion lost to EC", "42 deg", "Über"]:
+        assert search(dlt_file, text) == expected(lambda t: text in t)
+    assert search(dlt_file, "ost") == expected(lambda t: "ost" in t)
+    assert search(dlt_file, "not there") == []
+    # Texts without words fall back to checking every message
+    assert len(search(dlt_file, " ")) == len(TEXTS) * 50
+
+    # Keywords (whole words, case-insensitive, any order)
+    assert search(dlt_file, "lost connection", keywords=True) == expected(
+        lambda t: "connection lost" in t.lower()
+    )
+    assert search(dlt_file, "überlast", keywords=True) == expected(
+        lambda t: t.startswith("Ü")
+    )
+    assert search(dlt_file, "conn", keywords=True) == []
+    # Queries without words match no message
+    assert search(dlt_file, "  ", keywords=True) == []
+
+    # The filter of the DLTFile is applied
+    filtered_dlt_file = dlt_transformipy.load(
+        dlt_file_path, dlt_filter=DLTFilter(apids="APP")
+    )
+    assert search(filtered_dlt_file, "found") == [
+        i for i in expected(lambda t: "found" in t) if i % 2
+    ]
+
+
+def test_text_index_is_persisted(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    write_dlt_file(dlt_file_path)
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    text_index = dlt_file.get_text_index()
+    assert os.path.exists(dlt_file_path + ".sidx")
+
+    loaded = DLTTextIndex.load(dlt_file_path + ".sidx")
+    assert loaded.is_valid_for(dlt_file_path)
+    assert loaded.message_count == len(TEXTS) * 50 + 1
+    assert len(loaded) == len(text_index)
+    assert "last" in loaded and "lost" in loaded
+    assert list(loaded.get_postings("lost")) == list(text_index.get_postings("lost"))
+    assert list(loaded.get_postings("temperature")) == list(range(2, 300, 6))
+    loaded.close()
+    # Delta/varint postings are much smaller than the messages
+    assert (
+        os.path.getsize(dlt_file_path + ".sidx") < os.path.getsize(dlt_file_path) / 10
+    )
+
+
+def test_text_index_depends_on_catalog(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    text = b"decoded by the catalog"
+    with open(dlt_file_path, "wb") as f:
+        f.write(
+            build_message(
+                verbose=False,
+                payload=pack("<IH", 10, len(text)) + text,
+            )
+        )
+    catalog = MessageCatalog({10: ("APP", "CTX", (SIGNAL_STRG_UTF8,), ())})
+
+    # Without catalog the non-verbose STRG argument is not indexed
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+    assert list(dlt_file.search("catalog", keywords=True)) == []
+    dlt_file.clean_up()
+
+    # The persisted index is rebuilt for the catalog
+    dlt_file = dlt_transformipy.load(dlt_file_path, catalog=catalog)
+    assert list(dlt_file.get_text_index().search("catalog")) == [0]
+    loaded = DLTTextIndex.load(dlt_file_path + ".sidx")
+    assert loaded.is_valid_for(dlt_file_path, catalog)
+    assert not loaded.is_valid_for(dlt_file_path)
+    loaded.close()
+    dlt_file.clean_up()
@@ -0,0 +1,111 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import datetime
+import os
+import random
+
+from benchmarks.synthetic import build_message, TYPE_INFO_UINT32
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core.filter import DLTFilter
+from dlt_transformipy.core.time_index import DLTTimeIndex
+
+START_SECONDS = 1600000000
+
+
+def write_dlt_file(dlt_file_path, count=2000):
+    random.seed(23)
+    times = list()
+    time = START_SECONDS * 1000000
+    with open(dlt_file_path, "wb") as f:
+        for i in range(count):
+            time += random.randint(0, 20000)
+            # Some storage times are out of order
+            message_time = time - random.randint(0, 300000) if i % 50 == 0 else time
+            times.append(message_time)
+            f.write(
+                build_message(
+                    [(TYPE_INFO_UINT32, i)],
+                    seconds=message_time // 1000000,
+                    microseconds=message_time % 1000000,
+                    apid="APP" if i % 3 else "OTHR",
+                )
+            )
+    return times
+
+
+def test_time_range(tmp_path, local_timezone):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    times = write_dlt_file(dlt_file_path)
+    dlt_file = dlt_transformipy.load(dlt_file_path)
+
+    for start, end in [(1.0, 3.5), (0.0, 0.1), (7.2, 7.3), (19.0, 30.0), (5.0, 5.0)]:
+        start_time = START_SECONDS + start
+        end_time = START_SECONDS + end
+        expected = [
+            i
+            for i, time in enumerate(times)
+            if start_time * 1000000 <= time < end_time * 1000000
+        ]
+        assert [
+            message.payload[0]
+            for message in dlt_file.iter_time_range(start_time, end_time)
+        ] == expected
+
+    # Open ranges, datetimes and the filter of the DLTFile
+    assert len(list(dlt_file.iter_time_range())) == len(times)
+    start = datetime.datetime.fromtimestamp(START_SECONDS + 10, datetime.timezone.utc)
+    assert [
+        message.payload[0] for message in dlt_file.iter_time_range(start_time=start)
+    ] == [i for i, time in enumerate(times) if time >= (START_SECONDS + 10) * 1000000]
+    # Naive datetimes are UTC like the storage times
+    assert [
+        message.payload[0]
+        for message in dlt_file.iter_time_range(start_time=start.replace(tzinfo=None))
+    ] == [i for i, time in enumerate(times) if time >= (START_SECONDS + 10) * 1000000]
+    filtered_dlt_file = dlt_transformipy.load(
+        dlt_file_path, dlt_filter=DLTFilter(apids="OTHR")
+    )
+    assert [
+        message.payload[0]
+        for message in filtered_dlt_file.iter_time_range(end_time=START_SECONDS + 2)
+    ] == [
+        i
+        for i, time in enumerate(times)
+        if time < (START_SECONDS + 2) * 1000000 and not i % 3
+    ]
+
+
+def test_time_index(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    times = write_dlt_file(dlt_file_path)
+
+    time_index = DLTTimeIndex.load_or_build(dlt_file_path, message_interval=100)
+    assert os.path.exists(dlt_file_path + ".tidx")
+    # One entry per 100 messages or per second
+    assert len(time_index) > len(times) // 100
+    assert len(time_index) < len(times) // 10
+
+    loaded = DLTTimeIndex.load(dlt_file_path + ".tidx")
+    assert loaded.is_valid_for(dlt_file_path)
+    assert list(loaded.offsets) == list(time_index.offsets)
+    assert list(loaded.block_min_times) == list(time_index.block_min_times)
+    assert loaded.find_range(times[-1] + 1) is None
@@ -0,0 +1,166 @@
+# MIT License
+#
+# Copyright (c) 2021 Dennis Schwarz
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+
+from benchmarks.synthetic import (
+    build_message,
+    TYPE_INFO_UINT32,
+    TYPE_INFO_RAWD,
+    TYPE_INFO_STRG_ASCII,
+)
+from dlt_transformipy import dlt_transformipy
+from dlt_transformipy.core import parallel
+from dlt_transformipy.core.filter import DLTFilter
+from dlt_transformipy.core.model.payload import RawData
+from dlt_transformipy.core.trace_cache import TraceCache
+
+
+def write_dlt_file(dlt_file_path, count=300, text="cached"):
+    chunks = list()
+    for i in range(count):
+        chunks.append(
+            build_message(
+                [
+                    (TYPE_INFO_UINT32, i),
+                    (TYPE_INFO_STRG_ASCII, text),
+                    (TYPE_INFO_RAWD, b"\x00\x01"),
+                ],
+                apid="APP" if i % 3 else "OTHR",
+            )
+        )
+        if i == 100:
+            chunks.append(b"\xde\xad\xbe\xef")
+    with open(dlt_file_path, "wb") as f:
+        f.write(b"".join(chunks))
+
+
+def read_payloads(dlt_file_path, cache_directory, **kwargs):
+    dlt_file = dlt_transformipy.load(dlt_file_path, cache=cache_directory, **kwargs)
+    payloads = [list(message.payload) for message in dlt_file.iter_messages()]
+    apids = [message.extended_header.apid for message in dlt_file.iter_messages()]
+    skipped_bytes = dlt_file.get_skipped_bytes()
+    dlt_file.clean_up()
+    return payloads, apids, skipped_bytes
+
+
+def fail_decoding(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("decoded although cached")
+
+    monkeypatch.setattr(parallel, "decode_range", fail)
+
+
+def test_reload_from_cache(tmp_path, monkeypatch):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    cache_directory = str(tmp_path / "cache")
+    write_dlt_file(dlt_file_path)
+
+    payloads, apids, skipped_bytes = read_payloads(dlt_file_path, cache_directory)
+    assert [payload[0] for payload in payloads] == list(range(300))
+    assert skipped_bytes == 4
+    assert len(os.listdir(cache_directory)) == 1
+
+    # The reload must not decode any payload
+    fail_decoding(monkeypatch)
+    cached_payloads, cached_apids, cached_skipped_bytes = read_payloads(
+        dlt_file_path, cache_directory
+    )
+    assert cached_payloads == payloads
+    assert cached_apids == apids
+    assert cached_skipped_bytes == skipped_bytes
+    assert isinstance(cached_payloads[5][2], RawData)
+    assert cached_payloads[5][2].to_bytes() == b"\x00\x01"
+
+    # The unfiltered DLT file is cached, filters are applied on reload
+    filtered_payloads, _, _ = read_payloads(
+        dlt_file_path, cache_directory, dlt_filter=DLTFilter(apids=["OTHR"])
+    )
+    assert [payload[0] for payload in filtered_payloads] == list(range(0, 300, 3))
+
+
+def test_entry_is_validated(tmp_path, monkeypatch):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    trace_cache = TraceCache(str(tmp_path / "cache"))
+    write_dlt_file(dlt_file_path, text="before")
+    stat = os.stat(dlt_file_path)
+    read_payloads(dlt_file_path, trace_cache)
+
+    # Same size and modification time, but different content
+    write_dlt_file(dlt_file_path, text="after!")
+    os.utime(dlt_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(dlt_file_path).st_size == stat.st_size
+    assert trace_cache.load(dlt_file_path) is None
+    payloads, _, _ = read_payloads(dlt_file_path, trace_cache)
+    assert payloads[0][1].startswith("after!")
+
+    # A touched but unchanged DLT file is still served from the cache
+    os.utime(dlt_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    fail_decoding(monkeypatch)
+    assert read_payloads(dlt_file_path, trace_cache)[0] == payloads
+
+
+def test_incomplete_entry_is_not_published(tmp_path):
+    dlt_file_path = str(tmp_path / "test.dlt")
+    cache_directory = str(tmp_path / "cache")
+    write_dlt_file(dlt_file_path)
+
+    dlt_file = dlt_transformipy.load(dlt_file_path, cache=cache_directory)
+    messages = dlt_file.iter_messages()
+    assert next(messages).payload[0] == 0
+    messages.close()
+    dlt_file.clean_up()
+    assert os.listdir(cache_directory) == []
+
+
+def test_lru_eviction(tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    dlt_file_paths = [str(tmp_path / "test{}.dlt".format(i)) for i in range(3)]
+    for i, dlt_file_path in enumerate(dlt_file_paths):
+        write_dlt_file(dlt_file_path, text="file{}".format(i))
+
+    entry_byte_size = None
+    trace_cache = TraceCache(cache_directory)
+    for dlt_file_path in dlt_file_paths[:2]:
+        read_payloads(dlt_file_path, trace_cache)
+        entry_byte_size = entry_byte_size or trace_cache.get_byte_size()
+    first, second, third = [
+        trace_cache.get_entry_path(trace_cache.get_key(dlt_file_path))
+        for dlt_file_path in dlt_file_paths
+    ]
+    # The first entry becomes the most recently used one
+    os.utime(second, ns=(0, 1))
+    read_payloads(dlt_file_paths[0], trace_cache)
+
+    # Room for two entries, the least recently used one is evicted
+    trace_cache.max_byte_size = 2 * entry_byte_size
+    read_payloads(dlt_file_paths[2], trace_cache)
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert os.path.exists(third)
+    assert trace_cache.get_byte_size() <= trace_cache.max_byte_size
+
+    # Entries larger than the cache are not written
+    trace_cache.clear()
+    trace_cache.max_byte_size = entry_byte_size // 2
+    payloads, _, _ = read_payloads(dlt_file_paths[0], trace_cache)
+    assert len(payloads) == 300
+    assert trace_cache.get_byte_size() == 0